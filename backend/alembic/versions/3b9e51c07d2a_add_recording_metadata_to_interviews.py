@@ -0,0 +1,32 @@
+"""add recording metadata to interviews
+
+Revision ID: 3b9e51c07d2a
+Revises: feb04ca3cafb
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e51c07d2a'
+down_revision: Union[str, None] = 'feb04ca3cafb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('interviews', sa.Column('recording_status', sa.String(), nullable=True))
+    op.add_column('interviews', sa.Column('recording_duration', sa.Float(), nullable=True))
+    op.add_column('interviews', sa.Column('recording_size', sa.BigInteger(), nullable=True))
+    op.add_column('interviews', sa.Column('audio_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('interviews', 'audio_url')
+    op.drop_column('interviews', 'recording_size')
+    op.drop_column('interviews', 'recording_duration')
+    op.drop_column('interviews', 'recording_status')
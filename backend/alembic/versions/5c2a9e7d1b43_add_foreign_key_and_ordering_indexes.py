@@ -0,0 +1,43 @@
+"""add foreign key and ordering indexes
+
+Revision ID: 5c2a9e7d1b43
+Revises: 8d1f4c6b2e90
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2a9e7d1b43'
+down_revision: Union[str, None] = '8d1f4c6b2e90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (インデックス名, テーブル, カラム)
+INDEXES = [
+    ('ix_interviews_job_posting_id', 'interviews', ['job_posting_id']),
+    ('ix_interviews_status', 'interviews', ['status']),
+    ('ix_custom_questions_interview_id_order', 'custom_questions', ['interview_id', 'order']),
+    ('ix_interview_responses_interview_id_created_at', 'interview_responses', ['interview_id', 'created_at']),
+    ('ix_base_questions_job_posting_id_order', 'base_questions', ['job_posting_id', 'order']),
+    ('ix_job_postings_company_id', 'job_postings', ['company_id']),
+    ('ix_users_company_id', 'users', ['company_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY はトランザクション内で実行できないため autocommit で作成する
+    # （テーブルへの書き込みをロックしない）
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,46 @@
+"""add recording lifecycle policies
+
+Revision ID: 8d1f4c6b2e90
+Revises: 3b9e51c07d2a
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d1f4c6b2e90'
+down_revision: Union[str, None] = '3b9e51c07d2a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('companies', sa.Column('recording_cold_after_days', sa.Integer(), nullable=True))
+    op.add_column('companies', sa.Column('recording_retention_days', sa.Integer(), nullable=True))
+    op.add_column('interviews', sa.Column('recording_tier', sa.String(), nullable=True))
+    op.create_table(
+        'recording_lifecycle_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('compressed', sa.Integer(), nullable=True),
+        sa.Column('purged', sa.Integer(), nullable=True),
+        sa.Column('failed', sa.Integer(), nullable=True),
+        sa.Column('bytes_before', sa.BigInteger(), nullable=True),
+        sa.Column('bytes_after', sa.BigInteger(), nullable=True),
+        sa.Column('reclaimed_bytes', sa.BigInteger(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_recording_lifecycle_runs_id'), 'recording_lifecycle_runs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_recording_lifecycle_runs_id'), table_name='recording_lifecycle_runs')
+    op.drop_table('recording_lifecycle_runs')
+    op.drop_column('interviews', 'recording_tier')
+    op.drop_column('companies', 'recording_retention_days')
+    op.drop_column('companies', 'recording_cold_after_days')
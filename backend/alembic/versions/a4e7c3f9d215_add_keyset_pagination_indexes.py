@@ -0,0 +1,39 @@
+"""add keyset pagination indexes
+
+Revision ID: a4e7c3f9d215
+Revises: 5c2a9e7d1b43
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4e7c3f9d215'
+down_revision: Union[str, None] = '5c2a9e7d1b43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# 一覧の (created_at, id) 降順のキーセットページング用
+INDEXES = [
+    ('ix_interviews_created_at_id', 'interviews', ['created_at', 'id']),
+    ('ix_interviews_job_posting_id_created_at_id', 'interviews', ['job_posting_id', 'created_at', 'id']),
+    ('ix_job_postings_created_at_id', 'job_postings', ['created_at', 'id']),
+    ('ix_job_postings_company_id_created_at_id', 'job_postings', ['company_id', 'created_at', 'id']),
+    ('ix_companies_created_at_id', 'companies', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
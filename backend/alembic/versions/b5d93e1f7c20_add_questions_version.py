@@ -0,0 +1,35 @@
+"""add questions_version to job_postings and interviews
+
+Revision ID: b5d93e1f7c20
+Revises: c71f2d9e4a58
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d93e1f7c20'
+down_revision: Union[str, None] = 'c71f2d9e4a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 定数のデフォルト値のため、既存行の書き換えは発生しない
+    op.add_column(
+        'job_postings',
+        sa.Column('questions_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.add_column(
+        'interviews',
+        sa.Column('questions_version', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('interviews', 'questions_version')
+    op.drop_column('job_postings', 'questions_version')
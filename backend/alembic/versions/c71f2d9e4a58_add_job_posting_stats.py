@@ -0,0 +1,37 @@
+"""add job posting stats
+
+Revision ID: c71f2d9e4a58
+Revises: e3b8d0a6c174
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71f2d9e4a58'
+down_revision: Union[str, None] = 'e3b8d0a6c174'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 既存の面接の集計は python -m app.scripts.rebuild_job_posting_stats で作成する
+    op.create_table(
+        'job_posting_stats',
+        sa.Column('job_posting_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('interview_count', sa.Integer(), nullable=False),
+        sa.Column('scored_count', sa.Integer(), nullable=False),
+        sa.Column('score_total', sa.Float(), nullable=False),
+        sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['job_posting_id'], ['job_postings.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_posting_id', 'status')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('job_posting_stats')
@@ -0,0 +1,28 @@
+"""add updated_at to job_postings
+
+Revision ID: d42f8a1b6e93
+Revises: b5d93e1f7c20
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd42f8a1b6e93'
+down_revision: Union[str, None] = 'b5d93e1f7c20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('job_postings', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # 既存の求人は作成日時を最終更新日時とする（ETag・Last-Modifiedの基準）
+    op.execute('UPDATE job_postings SET updated_at = created_at')
+
+
+def downgrade() -> None:
+    op.drop_column('job_postings', 'updated_at')
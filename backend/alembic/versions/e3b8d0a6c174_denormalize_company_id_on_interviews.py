@@ -0,0 +1,71 @@
+"""denormalize company_id on interviews
+
+Revision ID: e3b8d0a6c174
+Revises: a4e7c3f9d215
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3b8d0a6c174'
+down_revision: Union[str, None] = 'a4e7c3f9d215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BATCH_SIZE = 10000
+
+BACKFILL = """
+UPDATE interviews
+SET company_id = job_postings.company_id
+FROM job_postings
+WHERE job_postings.id = interviews.job_posting_id
+  AND interviews.company_id IS NULL
+"""
+
+
+def _backfill_in_batches(bind) -> None:
+    # idの範囲ごとにコミットし、長時間の行ロックを避ける
+    max_id = bind.execute(sa.text("SELECT max(id) FROM interviews")).scalar() or 0
+    for start in range(0, max_id + 1, BATCH_SIZE):
+        bind.execute(
+            sa.text(BACKFILL + " AND interviews.id >= :start AND interviews.id < :stop"),
+            {"start": start, "stop": start + BATCH_SIZE},
+        )
+
+
+def upgrade() -> None:
+    op.add_column('interviews', sa.Column('company_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'interviews_company_id_fkey', 'interviews', 'companies', ['company_id'], ['id'],
+        ondelete='SET NULL',
+    )
+    context = op.get_context()
+    with context.autocommit_block():
+        if context.as_sql:
+            op.execute(BACKFILL)
+        else:
+            _backfill_in_batches(op.get_bind())
+        op.create_index(
+            'ix_interviews_company_id_created_at_id',
+            'interviews',
+            ['company_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_interviews_company_id_created_at_id',
+            table_name='interviews',
+            postgresql_concurrently=True,
+        )
+    op.drop_constraint('interviews_company_id_fkey', 'interviews', type_='foreignkey')
+    op.drop_column('interviews', 'company_id')
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+
+# ブラウザが古い内容をそのまま使わないよう、キャッシュは常に再検証させる
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """行の版・更新日時などから弱いETagを作る（同じ版であれば同じ値になる）"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def latest(*values: Optional[datetime]) -> Optional[datetime]:
+    """Noneを除いた最新の日時（Last-Modified用）"""
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+def _http_date(value: datetime) -> str:
+    # DBの日時はUTCのnaive datetime
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def validator_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    """条件付きGET用のヘッダー（本文をResponseで直接返すエンドポイントはこれを付ける）"""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Matchは弱い比較（W/の有無は無視する）
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def _not_modified_since(header: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+
+def not_modified(
+    request: Request,
+    response: Response,
+    *,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> Optional[Response]:
+    """
+    ETag・Last-Modifiedをレスポンスに設定し、条件付きGETで変更がなければ304を返す。
+    If-None-Matchがあればそれだけで判定し、なければIf-Modified-Sinceで判定する。
+    変更があればNoneを返すので、呼び出し側は通常どおり本文を組み立てる
+    """
+    headers = validator_headers(etag, last_modified)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        unchanged = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        unchanged = (
+            if_modified_since is not None
+            and last_modified is not None
+            and _not_modified_since(if_modified_since, last_modified)
+        )
+    return Response(status_code=304, headers=headers) if unchanged else None
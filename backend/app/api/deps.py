@@ -1,32 +1,63 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+import time
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.database import SessionLocal
+from app.core.database import AsyncSessionLocal, SessionLocal, replicas
+from app.core.db_routing import READ_YOUR_WRITES_COOKIE, reads_from_replica
+from app.api.unit_of_work import register_session
 from app.crud import crud_user
-from app.models.models import User
-from app.schemas.user import TokenPayload
+from app.schemas.user import Principal, TokenPayload
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
 
-def get_db() -> Generator:
+def _route_request(request: Request, response: Response) -> bool:
+    """
+    レプリカから読むかどうか。書き込みのリクエストでは、直後の読み取りが
+    レプリカの遅延で古くならないよう一定時間プライマリを使うCookieを設定する
+    """
+    if not replicas:
+        return False
+    if reads_from_replica(request.method, request.cookies):
+        return True
+    if request.method not in ("GET", "HEAD"):
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            str(int(time.time()) + settings.DB_REPLICA_STICKY_SECONDS),
+            max_age=settings.DB_REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return False
+
+def get_db(request: Request, response: Response) -> Generator:
+    db = SessionLocal()
+    db.info["read_only"] = _route_request(request, response)
+    register_session(request, db)
     try:
-        db = SessionLocal()
         yield db
     finally:
         db.close()
 
+async def get_async_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
+    # 非同期セッションは常にプライマリを使う（書き込みのCookieのみ設定する）
+    _route_request(request, response)
+    async with AsyncSessionLocal() as db:
+        register_session(request, db)
+        yield db
+
 def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(reusable_oauth2)
-) -> User:
+) -> Principal:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -37,21 +68,22 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="認証情報が正しくありません",
         )
-    user = crud_user.user.get(db, id=token_data.sub)
+    # ユーザーの行ではなくキャッシュしたスナップショットを返す（ORMのオブジェクトが必要な場合は読み直す）
+    user = crud_user.user.get_principal(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="ユーザーが見つかりません")
     return user
 
 def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if not crud_user.user.is_active(current_user):
         raise HTTPException(status_code=400, detail="アカウントが無効です")
     return current_user
 
 def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     if not crud_user.user.is_superuser(current_user):
         raise HTTPException(
             status_code=400, detail="権限が不足しています"
@@ -0,0 +1,92 @@
+import logging
+from typing import Callable, List, Union
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+COMMITS_HEADER = "X-DB-Commits"
+
+
+def register_session(request: Request, db: Union[Session, AsyncSession]) -> None:
+    """
+    UnitOfWorkRouteのリクエストであれば、セッションをリクエスト単位のトランザクションにする。
+    CRUDはflushのみ行い、コミット（エラー時はロールバック）はルートがまとめて行う
+    """
+    sessions = getattr(request.state, "db_sessions", None)
+    if sessions is None:
+        return
+    db.info["unit_of_work"] = True
+    sessions.append(db)
+
+
+def _has_pending_writes(db: Session) -> bool:
+    return bool(db.info.get("pending_writes") or db.new or db.dirty or db.deleted)
+
+
+def _check_open(db: Session) -> None:
+    """
+    書き込み済みのセッションがコミット前に閉じられていないことを確認する。
+    get_db/get_async_dbの終了処理はレスポンスの後に実行される前提（FastAPI 0.104）で、
+    0.106以降のようにハンドラーの終了時に閉じられると、flushした書き込みは黙って破棄される
+    """
+    if db.info.get("pending_writes") and not db.in_transaction():
+        raise RuntimeError(
+            "database session was closed before the unit of work committed; "
+            "flushed writes were rolled back (see the fastapi pin in requirements.txt)"
+        )
+
+
+async def _commit(db: Union[Session, AsyncSession]) -> None:
+    if isinstance(db, AsyncSession):
+        _check_open(db.sync_session)
+        if _has_pending_writes(db.sync_session):
+            await db.commit()
+    else:
+        _check_open(db)
+        if _has_pending_writes(db):
+            await run_in_threadpool(db.commit)
+
+
+async def _rollback(db: Union[Session, AsyncSession]) -> None:
+    if isinstance(db, AsyncSession):
+        await db.rollback()
+    else:
+        await run_in_threadpool(db.rollback)
+
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    レスポンスを返す前にリクエスト内の書き込みを1回でコミットするルート。
+    例外またはエラーのステータスの場合はロールバックする。
+    コミット回数はX-DB-Commitsヘッダーで確認できる
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def unit_of_work_handler(request: Request) -> Response:
+            sessions: List[Union[Session, AsyncSession]] = []
+            request.state.db_sessions = sessions
+            try:
+                response = await handler(request)
+            except Exception:
+                for db in sessions:
+                    await _rollback(db)
+                raise
+            if response.status_code >= 400:
+                for db in sessions:
+                    await _rollback(db)
+            else:
+                for db in sessions:
+                    await _commit(db)
+            commits = sum(db.info.get("commits", 0) for db in sessions)
+            response.headers[COMMITS_HEADER] = str(commits)
+            logger.debug("%s %s: %d commit(s)", request.method, request.url.path, commits)
+            return response
+
+        return unit_of_work_handler
@@ -6,6 +6,9 @@ from .endpoints import (
     job_postings,
     auth,
     base_questions,
+    recordings,
+    uploads,
+    internal,
 )
 
 api_router = APIRouter()
@@ -19,4 +22,7 @@ api_router.include_router(
     base_questions.router,
     prefix="/base-questions",
     tags=["base-questions"]
-) 
\ No newline at end of file
+)
+api_router.include_router(recordings.router, prefix="/recordings", tags=["recordings"]) 
+api_router.include_router(uploads.router, prefix="/uploads", tags=["uploads"])
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"])
\ No newline at end of file
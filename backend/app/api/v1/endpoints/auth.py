@@ -5,13 +5,14 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.unit_of_work import UnitOfWorkRoute
 from app.core import security
 from app.core.config import settings
 from app.core.security import get_password_hash
 from app.crud import crud_user
 from app.schemas.user import User, Token
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 @router.post("/login/access-token", response_model=Token)
 def login_access_token(
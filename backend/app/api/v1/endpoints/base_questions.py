@@ -3,6 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.unit_of_work import UnitOfWorkRoute
 from app.crud import crud_base_question
 from app.models.models import User
 from app.schemas.base_question import (
@@ -11,7 +12,7 @@ from app.schemas.base_question import (
     BaseQuestionUpdate,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 @router.get("/", response_model=List[BaseQuestion])
 def read_base_questions(
@@ -1,31 +1,38 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.unit_of_work import UnitOfWorkRoute
+from app.core.serialization import model_response
 from app.crud import crud_company
 from app.models.models import User
 from app.schemas.company import Company, CompanyCreate, CompanyUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 @router.get("/", response_model=List[Company])
 def read_companies(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    企業一覧の取得
+    企業一覧の取得（cursor指定時はキーセットページング、次ページはX-Next-Cursorヘッダー）
     """
-    if crud_company.company.is_superuser(current_user):
-        companies = crud_company.company.get_multi(db, skip=skip, limit=limit)
+    if current_user.is_superuser:
+        companies = crud_company.company.get_multi(db, skip=skip, limit=limit, cursor=cursor)
     else:
         companies = crud_company.company.get_multi_by_user(
-            db=db, user_id=current_user.id, skip=skip, limit=limit
+            db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor
         )
-    return companies
+    next_cursor = crud_company.company.next_cursor(companies, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return model_response(response, List[Company], companies)
 
 @router.post("/", response_model=Company)
 def create_company(
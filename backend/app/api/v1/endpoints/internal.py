@@ -0,0 +1,58 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.api.unit_of_work import UnitOfWorkRoute
+from app.core.database import async_engine, engine, replicas
+from app.core.db_pool import pool_metrics
+from app.core.recording_lifecycle import lifecycle_metrics
+from app.crud.crud_interview import interview_url_cache
+from app.crud.crud_job_posting import question_set_cache
+from app.crud.crud_user import principal_cache
+from app.models.models import User
+
+router = APIRouter(route_class=UnitOfWorkRoute)
+
+
+@router.get("/recording-lifecycle/metrics")
+def read_recording_lifecycle_metrics(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    録画ライフサイクル処理のメトリクス（解放した容量・ティアごとの録画数）
+    """
+    return lifecycle_metrics(db)
+
+
+@router.get("/db-pool/metrics")
+def read_db_pool_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    データベース接続プールのメトリクス（使用中の接続数・取得の待ち時間・タイムアウト回数）
+    """
+    return {
+        "sync": pool_metrics(engine),
+        "async": pool_metrics(async_engine.sync_engine),
+        "replicas": [
+            {**status, **pool_metrics(replica)}
+            for status, replica in zip(replicas.status(), replicas.engines)
+        ],
+    }
+
+
+@router.get("/cache/metrics")
+def read_cache_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    プロセス内キャッシュのメトリクス（件数・ヒット率・追い出し・無効化の回数）
+    """
+    return {
+        "interview_url": interview_url_cache.stats(),
+        "principal": principal_cache.stats(),
+        "question_set": question_set_cache.stats(),
+    }
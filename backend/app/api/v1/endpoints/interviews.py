@@ -1,13 +1,30 @@
 from typing import Any, List, Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Header, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import json
-import os
-from pathlib import Path
-import time
-
-from app.api import deps
-from app.crud import crud_interview
+import logging
+from datetime import datetime
+
+from app.api import conditional, deps
+from app.api.unit_of_work import UnitOfWorkRoute
+
+from app.core import direct_uploads, upload_sessions
+from app.core.config import settings
+from app.core.security import create_signed_storage_url
+from app.core.serialization import model_response
+from app.core.recording_jobs import RecordingQueueFull, recording_jobs
+from app.core.storage import (
+    InvalidContentKey,
+    ObjectNotFound,
+    UploadVerificationFailed,
+    normalize_suffix,
+    storage,
+)
+from app.crud import crud_interview, crud_job_posting
+from app.crud.base import InvalidCursor
+from app.crud.crud_interview import ResponseValidationError
 from app.models.models import User
 from app.schemas.interview import (
     Interview,
@@ -18,42 +35,62 @@ from app.schemas.interview import (
     CustomQuestion,
     CustomQuestionCreate,
     CustomQuestionUpdateText,
+    DirectUpload,
+    DirectUploadCreate,
+    DirectUploadFinalize,
     InterviewResponse,
     InterviewResponseCreate,
+    InterviewSummary,
+    RecordingJob,
+    RecordingURL,
+    RecordingUploadSession,
+    RecordingUploadSessionCreate,
 )
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# 書き込みはリクエスト単位で1回だけコミットする
+router = APIRouter(route_class=UnitOfWorkRoute)
 
-@router.get("/", response_model=List[Interview])
+@router.get("/", response_model=List[InterviewSummary])
 def read_interviews(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     job_posting_id: Optional[int] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    面接一覧の取得
+    面接一覧の取得（cursor指定時はキーセットページング、次ページはX-Next-Cursorヘッダー）
     """
     try:
         print(f"Fetching interviews with params: job_posting_id={job_posting_id}, user={current_user.email}")
         
         if current_user.is_superuser:
-            interviews = crud_interview.interview.get_multi(db, skip=skip, limit=limit)
+            interviews = crud_interview.interview.get_multi(
+                db, skip=skip, limit=limit, cursor=cursor
+            )
         else:
             if job_posting_id:
                 print(f"Fetching interviews for job posting {job_posting_id}")
                 interviews = crud_interview.interview.get_by_job_posting(
-                    db=db, job_posting_id=job_posting_id, skip=skip, limit=limit
+                    db=db, job_posting_id=job_posting_id, skip=skip, limit=limit, cursor=cursor
                 )
             else:
                 print(f"Fetching interviews for company {current_user.company_id}")
                 interviews = crud_interview.interview.get_by_company(
-                    db=db, company_id=current_user.company_id, skip=skip, limit=limit
+                    db=db, company_id=current_user.company_id, skip=skip, limit=limit, cursor=cursor
                 )
         
         print(f"Found {len(interviews)} interviews")
-        return interviews
+        next_cursor = crud_interview.interview.next_cursor(interviews, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return model_response(response, List[InterviewSummary], interviews)
+    except InvalidCursor:
+        raise
     except Exception as e:
         print(f"Error fetching interviews: {str(e)}")
         raise HTTPException(
@@ -77,31 +114,68 @@ def create_interview(
 @router.get("/{interview_id}", response_model=Interview)
 def read_interview(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     interview_id: int,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    特定の面接情報の取得
+    特定の面接情報の取得（ETag・Last-Modifiedによる条件付きGETに対応）
     """
-    interview = crud_interview.interview.get(db, id=interview_id)
+    # 版だけを先に読み、変更がなければ質問・回答を読み込まずに304を返す
+    version = crud_interview.interview.get_version(db, interview_id=interview_id)
+    if not version:
+        raise HTTPException(status_code=404, detail="面接が見つかりません")
+    unchanged = conditional.not_modified(
+        request,
+        response,
+        etag=conditional.make_etag(interview_id, *version),
+        last_modified=conditional.latest(version.updated_at, version.responses_updated_at),
+    )
+    if unchanged:
+        return unchanged
+
+    interview = crud_interview.interview.get(
+        db, id=interview_id, options=crud_interview.interview.loader_options(Interview)
+    )
     if not interview:
         raise HTTPException(status_code=404, detail="面接が見つかりません")
     return interview
 
+def _interview_detail_etag(detail: Interview) -> str:
+    """キャッシュ済みの面接詳細から作るETag（DBを読まずに判定できる）"""
+    return conditional.make_etag(
+        detail.id,
+        detail.updated_at,
+        [(q.id, q.order, q.question_text) for q in detail.custom_questions],
+        [(r.id, r.updated_at) for r in detail.responses],
+    )
+
+def _interview_detail_last_modified(detail: Interview) -> Optional[datetime]:
+    return conditional.latest(detail.updated_at, *(r.updated_at for r in detail.responses))
+
 @router.get("/url/{interview_url}", response_model=Interview)
 def read_interview_by_url(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     interview_url: str,
 ) -> Any:
     """
-    URLから面接情報の取得（候補者用）
+    URLから面接情報の取得（候補者用。ETag・Last-Modifiedによる条件付きGETに対応）
     """
-    interview = crud_interview.interview.get_by_url(db, url=interview_url)
+    interview = crud_interview.interview.get_detail_by_url(db, url=interview_url)
     if not interview:
         raise HTTPException(status_code=404, detail="面接が見つかりません")
-    return interview
+    unchanged = conditional.not_modified(
+        request,
+        response,
+        etag=_interview_detail_etag(interview),
+        last_modified=_interview_detail_last_modified(interview),
+    )
+    return unchanged or interview
 
 @router.put("/{interview_id}", response_model=Interview)
 def update_interview(
@@ -123,7 +197,7 @@ def update_interview(
 @router.post("/{interview_id}/documents", response_model=Interview)
 async def upload_documents(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     interview_id: int,
     resume: UploadFile = File(None),
     cv: UploadFile = File(None),
@@ -131,26 +205,48 @@ async def upload_documents(
     """
     履歴書・職務経歴書のアップロード
     """
-    interview = crud_interview.interview.get(db, id=interview_id)
+    interview = await crud_interview.interview.get_async(db, id=interview_id)
     if not interview:
         raise HTTPException(status_code=404, detail="面接が見つかりません")
 
-    # TODO: ファイルのアップロード処理を実装
-    # ここではダミーのURLを返します
-    resume_url = f"/uploads/resume_{interview_id}.pdf" if resume else None
-    cv_url = f"/uploads/cv_{interview_id}.pdf" if cv else None
+    resume_url = None
+    cv_url = None
+    if resume:
+        stored = await storage.put_upload(resume, suffix=normalize_suffix(resume.filename, ".pdf"))
+        resume_url = stored.key
+    if cv:
+        stored = await storage.put_upload(cv, suffix=normalize_suffix(cv.filename, ".pdf"))
+        cv_url = stored.key
 
-    interview = crud_interview.interview.upload_documents(
+    await crud_interview.interview.upload_documents_async(
         db, db_obj=interview, resume_url=resume_url, cv_url=cv_url
     )
-    return interview
+    return await crud_interview.interview.get_detail_async(db, id=interview_id)
+
+async def _save_completion_video(video: UploadFile) -> str:
+    """面接完了時に送信された録画ファイルを保存し、コンテンツキーを返す"""
+    try:
+        # 動画ファイルをチャンク単位でハッシュしながらストリーミング保存
+        stored = await storage.put_upload(video, suffix=".webm")
+        logger.info(
+            "Saved completion video %s (%s) as %s: %d bytes, %.0f bytes/sec, peak buffer %d bytes",
+            video.filename, video.content_type, stored.key,
+            stored.size, stored.bytes_per_second, stored.peak_buffer_size,
+        )
+        return stored.key
+    except Exception as e:
+        logger.error("Failed to save completion video %s: %s", video.filename, e)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to save video: {str(e)}"
+        )
 
 @router.post("/{interview_id}/complete")
 async def complete_interview(
     interview_id: int,
-    video: UploadFile = File(...),
+    video: Optional[UploadFile] = File(None),
     answers: str = Form(...),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """面接完了処理"""
     try:
@@ -158,43 +254,10 @@ async def complete_interview(
         print(f"Interview ID: {interview_id}")
         
         # 面接データの取得
-        interview = crud_interview.interview.get(db, id=interview_id)
+        interview = await crud_interview.interview.get_async(db, id=interview_id)
         if not interview:
             raise HTTPException(status_code=404, detail="Interview not found")
 
-        # 動画ファイルの保存
-        try:
-            print(f"Video File Info:")
-            print(f"  - Filename: {video.filename}")
-            print(f"  - Content Type: {video.content_type}")
-            video_content = await video.read()
-            print(f"  - File Size: {len(video_content)} bytes")
-            
-            # 動画ファイルの保存パスを設定
-            video_filename = f"interview_{interview_id}_{int(time.time())}.webm"
-            video_path = f"recordings/{video_filename}"
-            
-            # 動画ファイルを保存
-            os.makedirs("recordings", exist_ok=True)
-            with open(video_path, "wb") as f:
-                f.write(video_content)
-            
-            # 面接データの更新（録画URLを保存）
-            crud_interview.interview.update(
-                db,
-                db_obj=interview,
-                obj_in={
-                    "recording_url": video_path,
-                    "status": "completed"
-                }
-            )
-        except Exception as e:
-            print(f"Error saving video: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to save video: {str(e)}"
-            )
-
         # 回答データの処理
         print("\nAnswers Data:")
         try:
@@ -208,46 +271,50 @@ async def complete_interview(
                 detail=f"Invalid answers format: {str(e)}"
             )
 
-        # バリデーションと回答の保存
-        if not isinstance(answers_data, list):
-            print("Error: answers_data is not a list")
+        # 録画・回答を保存する前に全回答を検証
+        try:
+            crud_interview.interview.validate_responses(
+                interview_id=interview_id, answers=answers_data
+            )
+        except ResponseValidationError as e:
+            logger.info("Rejected answers for interview %d: %s", interview_id, e.errors)
+            raise HTTPException(status_code=422, detail=e.errors)
+
+        # 後処理のジョブが投入されるまではpending（キューが満杯の場合はそのまま残り、後で投入し直せる）
+        interview_update = {"status": "completed", "recording_status": "pending"}
+        if video is None:
+            # 再開可能アップロードで録画が保存済みの場合は動画の受信を省略
+            if not interview.recording_url:
+                raise HTTPException(status_code=422, detail="Video is required")
+        else:
+            # 動画ファイルの保存（面接データへの反映は回答と同じトランザクションで行う）
+            interview_update["recording_url"] = await _save_completion_video(video)
+
+        # 回答の一括保存とステータス更新を1トランザクションで実行
+        try:
+            response_ids = await crud_interview.interview.add_responses_async(
+                db, db_obj=interview, answers=answers_data, obj_in=interview_update
+            )
+        except Exception as e:
+            logger.error("Failed to save answers for interview %d: %s", interview_id, e)
             raise HTTPException(
-                status_code=422,
-                detail="Answers must be a list of objects"
+                status_code=500,
+                detail=f"Failed to save answers: {str(e)}"
             )
+        logger.info("Saved %d answers for interview %d", len(response_ids), interview_id)
+        # 後処理のジョブは別のセッションで面接を読むため、投入前にコミットする
+        await db.commit()
 
-        for i, answer in enumerate(answers_data):
-            print(f"\nValidating answer {i + 1}:")
-            required_fields = ['question_id', 'question_text', 'answer_text', 'question_type']
-            missing_fields = [field for field in required_fields if field not in answer]
-            
-            if missing_fields:
-                print(f"  - Missing required fields: {missing_fields}")
-                raise HTTPException(
-                    status_code=422,
-                    detail=f"Answer {i + 1} is missing required fields: {missing_fields}"
-                )
-            
-            print(f"  - Question ID: {answer['question_id']}")
-            print(f"  - Question Type: {answer['question_type']}")
-            print(f"  - Answer Text Length: {len(answer['answer_text'])}")
-            
-            try:
-                # 回答データを保存
-                response_data = {
-                    "interview_id": interview_id,
-                    "question_id": answer['question_id'],
-                    "question_text": answer['question_text'],
-                    "answer_text": answer['answer_text'],
-                    "question_type": answer['question_type']
-                }
-                crud_interview.interview.add_response(db, obj_in=response_data)
-            except Exception as e:
-                print(f"Error saving answer {i + 1}: {str(e)}")
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to save answer {i + 1}: {str(e)}"
-                )
+        # 録画の後処理（シーク可能化・音声抽出）をバックグラウンドで実行
+        try:
+            await run_in_threadpool(
+                recording_jobs.submit, interview_id, interview.recording_url
+            )
+        except RecordingQueueFull as e:
+            logger.warning(
+                "Recording post-processing of interview %d not queued, left pending: %s",
+                interview_id, e,
+            )
 
         print("\n=== End Debug Log ===\n")
         return {"status": "success", "message": "Interview completed successfully"}
@@ -261,35 +328,116 @@ async def complete_interview(
             detail=f"An unexpected error occurred: {str(e)}"
         )
 
-@router.get("/{interview_id}/base-questions", response_model=List[BaseQuestion])
-def read_base_questions(
+@router.get("/{interview_id}/recording-url", response_model=RecordingURL)
+def read_recording_url(
     *,
     db: Session = Depends(deps.get_db),
     interview_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    ベース質問の取得
+    録画の署名付きURLの発行（自社の面接のみ）
     """
     interview = crud_interview.interview.get(db, id=interview_id)
     if not interview:
         raise HTTPException(status_code=404, detail="面接が見つかりません")
-    
-    questions = crud_interview.interview.get_base_questions(
-        db, job_posting_id=interview.job_posting_id
+    if not current_user.is_superuser:
+        if interview.job_posting.company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="権限が不足しています")
+    if not interview.recording_url:
+        raise HTTPException(status_code=404, detail="録画が見つかりません")
+
+    url, expires = create_signed_storage_url(
+        f"{settings.API_V1_STR}/recordings/{interview.recording_url}",
+        interview.recording_url,
+        settings.RECORDING_URL_TTL_SECONDS,
+    )
+    return RecordingURL(url=url, expires_at=datetime.utcfromtimestamp(expires))
+
+@router.get("/{interview_id}/recording-jobs", response_model=List[RecordingJob])
+def read_recording_jobs(
+    *,
+    db: Session = Depends(deps.get_db),
+    interview_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    録画後処理ジョブの状態取得（自社の面接のみ）
+    """
+    interview = crud_interview.interview.get(db, id=interview_id)
+    if not interview:
+        raise HTTPException(status_code=404, detail="面接が見つかりません")
+    if not current_user.is_superuser:
+        if interview.job_posting.company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="権限が不足しています")
+    return [
+        RecordingJob(
+            job_id=job.job_id,
+            interview_id=job.interview_id,
+            status=job.status,
+            attempts=job.attempts,
+            error=job.error,
+            created_at=datetime.utcfromtimestamp(job.created_at),
+            finished_at=datetime.utcfromtimestamp(job.finished_at) if job.finished_at else None,
+        )
+        for job in recording_jobs.list_for_interview(interview_id)
+    ]
+
+@router.get("/{interview_id}/base-questions", response_model=List[BaseQuestion])
+def read_base_questions(
+    *,
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    interview_id: int,
+) -> Any:
+    """
+    ベース質問の取得（求人の質問の版ごとにキャッシュしたJSONを返す。ETagによる条件付きGETに対応）
+    """
+    versions = crud_interview.interview.get_question_versions(db, interview_id=interview_id)
+    if not versions:
+        raise HTTPException(status_code=404, detail="面接が見つかりません")
+    if versions.base_questions_version is None:
+        return []
+
+    etag = conditional.make_etag("base", versions.job_posting_id, versions.base_questions_version)
+    unchanged = conditional.not_modified(request, response, etag=etag)
+    if unchanged:
+        return unchanged
+
+    content = crud_job_posting.job_posting.get_base_questions_json(
+        db, job_posting_id=versions.job_posting_id, version=versions.base_questions_version
+    )
+    return Response(
+        content=content, media_type="application/json", headers=conditional.validator_headers(etag)
     )
-    return questions
 
 @router.get("/{interview_id}/custom-questions", response_model=List[CustomQuestion])
 def read_custom_questions(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     interview_id: int,
 ) -> Any:
     """
-    カスタム質問の取得
+    カスタム質問の取得（面接の質問の版ごとにキャッシュしたJSONを返す。ETagによる条件付きGETに対応）
     """
-    questions = crud_interview.interview.get_custom_questions(db, interview_id=interview_id)
-    return questions
+    versions = crud_interview.interview.get_question_versions(db, interview_id=interview_id)
+    if not versions:
+        return []
+
+    etag = conditional.make_etag("custom", interview_id, versions.questions_version)
+    unchanged = conditional.not_modified(request, response, etag=etag)
+    if unchanged:
+        return unchanged
+
+    content = crud_interview.interview.get_custom_questions_json(
+        db, interview_id=interview_id, version=versions.questions_version
+    )
+    return Response(
+        content=content, media_type="application/json", headers=conditional.validator_headers(etag)
+    )
 
 @router.post("/{interview_id}/custom-questions", response_model=CustomQuestion)
 def create_custom_question(
@@ -330,12 +478,32 @@ def update_custom_question(
 @router.get("/{interview_id}/responses", response_model=List[InterviewResponse])
 def read_responses(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     interview_id: int,
 ) -> Any:
     """
-    面接回答の取得
+    面接回答の取得（ETag・Last-Modifiedによる条件付きGETに対応）
     """
+    version = crud_interview.interview.get_version(db, interview_id=interview_id)
+    if not version:
+        return []
+    unchanged = conditional.not_modified(
+        request,
+        response,
+        etag=conditional.make_etag(
+            "responses",
+            interview_id,
+            version.response_count,
+            version.last_response_id,
+            version.responses_updated_at,
+        ),
+        last_modified=version.responses_updated_at,
+    )
+    if unchanged:
+        return unchanged
+
     responses = crud_interview.interview.get_responses(db, interview_id=interview_id)
     return responses
 
@@ -355,13 +523,21 @@ def create_response(
 @router.get("/by-url/{url}", response_model=Interview)
 def get_interview_by_url(
     url: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
 ):
-    """面接URLから面接情報を取得"""
-    db_interview = crud_interview.interview.get_by_url(db, url=url)
+    """面接URLから面接情報を取得（ETag・Last-Modifiedによる条件付きGETに対応）"""
+    db_interview = crud_interview.interview.get_detail_by_url(db, url=url)
     if not db_interview:
         raise HTTPException(status_code=404, detail="Interview not found")
-    return db_interview
+    unchanged = conditional.not_modified(
+        request,
+        response,
+        etag=_interview_detail_etag(db_interview),
+        last_modified=_interview_detail_last_modified(db_interview),
+    )
+    return unchanged or db_interview
 
 @router.post("/", response_model=Interview)
 def create_interview(
@@ -377,20 +553,23 @@ async def upload_document(
     interview_id: int,
     type: str,
     file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """履歴書・職務経歴書をアップロード"""
-    db_interview = crud_interview.interview.get(db, id=interview_id)
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
     if not db_interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    # TODO: ファイルの保存処理
-    file_url = f"uploads/{file.filename}"  # 仮の実装
+    if type not in ("resume", "cv"):
+        raise HTTPException(status_code=400, detail="Invalid document type")
+
+    stored = await storage.put_upload(file, suffix=normalize_suffix(file.filename, ".pdf"))
+    file_url = stored.key
     
     if type == "resume":
-        db_interview = crud_interview.interview.upload_documents(db, db_obj=db_interview, resume_url=file_url)
+        db_interview = await crud_interview.interview.upload_documents_async(db, db_obj=db_interview, resume_url=file_url)
     elif type == "cv":
-        db_interview = crud_interview.interview.upload_documents(db, db_obj=db_interview, cv_url=file_url)
+        db_interview = await crud_interview.interview.upload_documents_async(db, db_obj=db_interview, cv_url=file_url)
     else:
         raise HTTPException(status_code=400, detail="Invalid document type")
 
@@ -400,17 +579,17 @@ async def upload_document(
 async def upload_recording(
     interview_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """面接の録画データをアップロード"""
-    db_interview = crud_interview.interview.get(db, id=interview_id)
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
     if not db_interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
-    # TODO: 録画データの保存処理
-    recording_url = f"recordings/{file.filename}"  # 仮の実装
+    stored = await storage.put_upload(file, suffix=".webm")
+    recording_url = stored.key
 
-    db_interview = crud_interview.interview.update(
+    db_interview = await crud_interview.interview.update_async(
         db,
         db_obj=db_interview,
         obj_in={"recording_url": recording_url}
@@ -418,19 +597,184 @@ async def upload_recording(
 
     return {"message": "Recording uploaded successfully"}
 
+def _upload_session_response(session: upload_sessions.UploadSession) -> RecordingUploadSession:
+    return RecordingUploadSession(
+        session_id=session.session_id,
+        interview_id=session.interview_id,
+        offset=session.offset,
+        total_size=session.total_size,
+        expires_at=datetime.utcfromtimestamp(session.expires_at),
+    )
+
+@router.post(
+    "/{interview_id}/upload-recording/sessions",
+    response_model=RecordingUploadSession,
+)
+async def create_recording_upload_session(
+    interview_id: int,
+    session_in: RecordingUploadSessionCreate,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """再開可能な録画アップロードセッションを作成"""
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
+    if not db_interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    session = await upload_sessions.create_session(
+        interview_id, total_size=session_in.total_size
+    )
+    return _upload_session_response(session)
+
+@router.get(
+    "/{interview_id}/upload-recording/sessions/{session_id}",
+    response_model=RecordingUploadSession,
+)
+async def read_recording_upload_session(
+    interview_id: int,
+    session_id: str,
+):
+    """アップロード済みのオフセットを取得（再開時に使用）"""
+    try:
+        session = await upload_sessions.get_session(session_id, interview_id)
+    except upload_sessions.UploadSessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return _upload_session_response(session)
+
+@router.patch(
+    "/{interview_id}/upload-recording/sessions/{session_id}",
+    response_model=RecordingUploadSession,
+)
+async def append_recording_upload_chunk(
+    interview_id: int,
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+):
+    """指定オフセットに録画データのチャンクを追記"""
+    try:
+        session = await upload_sessions.append_chunk(
+            session_id, interview_id, upload_offset, request.stream()
+        )
+    except upload_sessions.UploadSessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_sessions.UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e),
+            headers={"Upload-Offset": str(e.offset)},
+        )
+    except upload_sessions.UploadSizeExceeded:
+        raise HTTPException(status_code=413, detail="Upload exceeds declared size")
+    return _upload_session_response(session)
+
+@router.post("/{interview_id}/upload-recording/sessions/{session_id}/finalize")
+async def finalize_recording_upload_session(
+    interview_id: int,
+    session_id: str,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """アップロードを確定し、録画URLを面接に保存"""
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
+    if not db_interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    try:
+        _, stored = await upload_sessions.finalize_session(session_id, interview_id)
+    except upload_sessions.UploadSessionNotFound:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    except upload_sessions.UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e),
+            headers={"Upload-Offset": str(e.offset)},
+        )
+
+    await crud_interview.interview.update_async(
+        db,
+        db_obj=db_interview,
+        obj_in={"recording_url": stored.key}
+    )
+
+    return {"message": "Recording uploaded successfully", "recording_url": stored.key}
+
+@router.post("/{interview_id}/direct-uploads", response_model=DirectUpload)
+async def create_direct_upload(
+    interview_id: int,
+    upload_in: DirectUploadCreate,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """録画・書類をストレージへ直接アップロードするための署名付きURLを発行"""
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
+    if not db_interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    try:
+        upload = await direct_uploads.create_direct_upload(
+            interview_id,
+            upload_in.target,
+            size=upload_in.size,
+            sha256=upload_in.sha256,
+            filename=upload_in.filename,
+        )
+    except direct_uploads.InvalidDirectUpload as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    upload_url = upload.upload_url
+    if upload_url is None:
+        # ローカルストレージの場合はAPIの署名付きPUTエンドポイントで受け付ける
+        upload_id = upload.incoming_key.split("/", 1)[1]
+        upload_url = f"{settings.API_V1_STR}/uploads/{upload_id}?token={upload.upload_token}"
+
+    return DirectUpload(
+        upload_token=upload.upload_token,
+        upload_url=upload_url,
+        headers=upload.upload_headers or {},
+        expires_at=datetime.utcfromtimestamp(upload.expires_at),
+    )
+
+@router.post("/{interview_id}/direct-uploads/finalize")
+async def finalize_direct_upload(
+    interview_id: int,
+    finalize_in: DirectUploadFinalize,
+    db: AsyncSession = Depends(deps.get_async_db)
+):
+    """直接アップロードのサイズとチェックサムを検証し、面接のURLを更新"""
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
+    if not db_interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    try:
+        upload, stored = await direct_uploads.finalize_direct_upload(
+            finalize_in.upload_token, interview_id
+        )
+    except (direct_uploads.InvalidDirectUpload, InvalidContentKey):
+        raise HTTPException(status_code=403, detail="アップロードトークンが不正です")
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="Uploaded object not found")
+    except UploadVerificationFailed as e:
+        raise HTTPException(status_code=422, detail=f"Upload verification failed: {str(e)}")
+
+    await crud_interview.interview.update_async(
+        db,
+        db_obj=db_interview,
+        obj_in={upload.column: stored.key}
+    )
+
+    return {"message": "Upload finalized successfully", upload.column: stored.key}
+
 @router.post("/{interview_id}/responses")
 async def save_response(
     interview_id: int,
     response_data: dict,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ):
     """面接の回答を保存"""
-    db_interview = crud_interview.interview.get(db, id=interview_id)
+    db_interview = await crud_interview.interview.get_async(db, id=interview_id)
     if not db_interview:
         raise HTTPException(status_code=404, detail="Interview not found")
 
     # TODO: 回答の保存処理
-    response = crud_interview.interview.add_response(
+    response = await crud_interview.interview.add_response_async(
         db,
         obj_in={
             "interview_id": interview_id,
@@ -444,13 +788,13 @@ async def save_response(
 @router.post("/{interview_id}/generate-questions", response_model=Interview)
 async def generate_questions(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     interview_id: int,
 ) -> Any:
     """
     ���歴書と職務経歴書から質問を生成
     """
-    interview = crud_interview.interview.get(db, id=interview_id)
+    interview = await crud_interview.interview.get_async(db, id=interview_id)
     if not interview:
         raise HTTPException(status_code=404, detail="面接が見つかりません")
     
@@ -478,16 +822,16 @@ async def generate_questions(
                 question_text=question,
                 order=i + 1
             )
-            crud_interview.interview.add_custom_question(db, obj_in=question_in)
+            await crud_interview.interview.add_custom_question_async(db, obj_in=question_in)
 
         # 質問生成完了フラグを更新
-        interview = crud_interview.interview.update(
+        await crud_interview.interview.update_async(
             db,
             db_obj=interview,
             obj_in={"questions_generated": True}
         )
         
-        return interview
+        return await crud_interview.interview.get_detail_async(db, id=interview_id)
 
     except Exception as e:
         raise HTTPException(
@@ -1,50 +1,78 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
-from app.api import deps
-from app.crud import crud_job_posting
+from app.api import conditional, deps
+from app.api.unit_of_work import UnitOfWorkRoute
+from app.core.serialization import model_response
+from app.crud import crud_job_posting, crud_job_posting_stats
 from app.models.models import User
 from app.schemas.job_posting import (
     JobPosting,
     JobPostingCreate,
     JobPostingUpdate,
-    BaseQuestionCreate,
+    JobPostingStats,
+    BaseQuestionIn,
 )
 from app.schemas.interview import BaseQuestion, Interview, InterviewCreate
 from app.crud.crud_interview import interview
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 @router.get("/", response_model=List[JobPosting])
 def read_job_postings(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    求人一覧の取得
+    求人一覧の取得（cursor指定時はキーセットページング、次ページはX-Next-Cursorヘッダー）
     """
+    # 一覧でも基本質問を含めるため、リレーションはまとめて読み込む
+    options = crud_job_posting.job_posting.loader_options(JobPosting)
     if current_user.is_superuser:
-        job_postings = crud_job_posting.job_posting.get_multi(db, skip=skip, limit=limit)
+        job_postings = crud_job_posting.job_posting.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, options=options
+        )
     else:
         job_postings = crud_job_posting.job_posting.get_by_company(
-            db=db, company_id=current_user.company_id, skip=skip, limit=limit
+            db=db,
+            company_id=current_user.company_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            options=options,
         )
-    return job_postings
+    next_cursor = crud_job_posting.job_posting.next_cursor(job_postings, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return model_response(response, List[JobPosting], job_postings)
 
 @router.get("/active", response_model=List[JobPosting])
 def read_active_job_postings(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ) -> Any:
     """
     アクティブな求人一覧の取得（認証不要）
     """
-    job_postings = crud_job_posting.job_posting.get_active(db, skip=skip, limit=limit)
-    return job_postings
+    job_postings = crud_job_posting.job_posting.get_active(
+        db,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        options=crud_job_posting.job_posting.loader_options(JobPosting),
+    )
+    next_cursor = crud_job_posting.job_posting.next_cursor(job_postings, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return model_response(response, List[JobPosting], job_postings)
 
 @router.post("/", response_model=JobPosting)
 def create_job_posting(
@@ -76,22 +104,36 @@ def create_job_posting(
 @router.get("/{job_posting_id}", response_model=JobPosting)
 def read_job_posting(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     job_posting_id: int,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    特定の求人情報の取得
+    特定の求人情報の取得（ETag・Last-Modifiedによる条件付きGETに対応）
     """
-    job_posting = crud_job_posting.job_posting.get(db, id=job_posting_id)
-    if not job_posting:
+    version = crud_job_posting.job_posting.get_version(db, job_posting_id=job_posting_id)
+    if not version:
         raise HTTPException(status_code=404, detail="求人が見つかりません")
     
     # 管理者以外は自社の求人のみ閲覧可能
     if not current_user.is_superuser:
-        if job_posting.company_id != current_user.company_id:
+        if version.company_id != current_user.company_id:
             raise HTTPException(status_code=400, detail="権限が不足しています")
-    
+
+    unchanged = conditional.not_modified(
+        request,
+        response,
+        etag=conditional.make_etag(job_posting_id, version.updated_at, version.questions_version),
+        last_modified=version.updated_at or version.created_at,
+    )
+    if unchanged:
+        return unchanged
+
+    job_posting = crud_job_posting.job_posting.get(db, id=job_posting_id)
+    if not job_posting:
+        raise HTTPException(status_code=404, detail="求人が見つかりません")
     return job_posting
 
 @router.put("/{job_posting_id}", response_model=JobPosting)
@@ -141,31 +183,61 @@ def delete_job_posting(
     job_posting = crud_job_posting.job_posting.remove(db, id=job_posting_id)
     return job_posting
 
-@router.get("/{job_posting_id}/base-questions", response_model=List[BaseQuestion])
-def read_base_questions(
+@router.get("/{job_posting_id}/stats", response_model=JobPostingStats)
+def read_job_posting_stats(
     *,
     db: Session = Depends(deps.get_db),
     job_posting_id: int,
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    ベース質問の取得
+    求人の面接の集計（ステータスごとの件数・完了数・AIスコアの平均・最終更新日時）
     """
     job_posting = crud_job_posting.job_posting.get(db, id=job_posting_id)
     if not job_posting:
         raise HTTPException(status_code=404, detail="求人が見つかりません")
-    
-    questions = crud_job_posting.job_posting.get_base_questions(
-        db, job_posting_id=job_posting_id
+
+    # 管理者以外は自社の求人のみ閲覧可能
+    if not current_user.is_superuser:
+        if job_posting.company_id != current_user.company_id:
+            raise HTTPException(status_code=400, detail="権限が不足しています")
+
+    return crud_job_posting_stats.job_posting_stats.get(db, job_posting_id=job_posting_id)
+
+@router.get("/{job_posting_id}/base-questions", response_model=List[BaseQuestion])
+def read_base_questions(
+    *,
+    request: Request,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    job_posting_id: int,
+    current_user: User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    ベース質問の取得（質問の版ごとにキャッシュしたJSONを返す。ETagによる条件付きGETに対応）
+    """
+    version = crud_job_posting.job_posting.get_questions_version(db, job_posting_id=job_posting_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="求人が見つかりません")
+
+    etag = conditional.make_etag("base", job_posting_id, version)
+    unchanged = conditional.not_modified(request, response, etag=etag)
+    if unchanged:
+        return unchanged
+
+    content = crud_job_posting.job_posting.get_base_questions_json(
+        db, job_posting_id=job_posting_id, version=version
+    )
+    return Response(
+        content=content, media_type="application/json", headers=conditional.validator_headers(etag)
     )
-    return questions
 
 @router.post("/{job_posting_id}/base-questions", response_model=List[BaseQuestion])
 def create_base_questions(
     *,
     db: Session = Depends(deps.get_db),
     job_posting_id: int,
-    questions_in: List[BaseQuestionCreate],
+    questions_in: List[BaseQuestionIn],
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
@@ -190,7 +262,7 @@ def update_base_questions(
     *,
     db: Session = Depends(deps.get_db),
     job_posting_id: int,
-    questions_in: List[BaseQuestionCreate],
+    questions_in: List[BaseQuestionIn],
     current_user: User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
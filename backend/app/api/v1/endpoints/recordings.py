@@ -0,0 +1,135 @@
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+
+from app.core.config import settings
+from app.core.security import verify_storage_signature
+from app.core.storage import InvalidContentKey, ObjectNotFound, is_content_key, storage
+
+router = APIRouter()
+
+mimetypes.add_type("video/webm", ".webm")
+mimetypes.add_type("audio/ogg", ".opus")
+
+
+def _not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """単一の「bytes=」レンジを解析する。複数レンジは未対応として全体を返す"""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start_s, _, end_s = spec.strip().partition("-")
+    if start_s == "":
+        length = int(end_s)
+        if length <= 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, min(end, size - 1)
+
+
+def _offload_target(key: str) -> Optional[str]:
+    """
+    フロントプロキシに渡す配信先。検証済みのキーから組み立てる。
+    X-Accel-Redirectのinternal locationはストアのみを指すため、旧形式のキーはNone（Pythonから配信）
+    """
+    local_path = storage.local_path(key)
+    if local_path is None:
+        return None
+    if settings.RECORDING_OFFLOAD_HEADER.lower() == "x-accel-redirect":
+        if not is_content_key(key):
+            return None
+        return settings.RECORDING_OFFLOAD_PREFIX.rstrip("/") + "/" + storage.relative_path(key)
+    return local_path
+
+
+@router.get("/{key:path}")
+async def read_recording(
+    key: str,
+    expires: int,
+    signature: str,
+    request: Request,
+):
+    """
+    署名付きURLによる録画の配信（Range・条件付きリクエスト対応）
+    """
+    if not verify_storage_signature(key, expires, signature):
+        raise HTTPException(status_code=403, detail="URLの有効期限が切れているか、署名が不正です")
+    try:
+        info = await storage.stat(key)
+    except (InvalidContentKey, ObjectNotFound):
+        raise HTTPException(status_code=404, detail="録画が見つかりません")
+
+    etag = f'"{info.etag}"'
+    last_modified = info.last_modified.timestamp()
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600",
+    }
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    # オブジェクトストレージの場合はストレージから直接ダウンロードさせる
+    presigned_url = await storage.presigned_get_url(key, settings.RECORDING_URL_TTL_SECONDS)
+    if presigned_url:
+        return RedirectResponse(presigned_url, status_code=307)
+
+    media_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+    # フロントプロキシに実際の転送（Rangeを含む）を任せる
+    offload_target = _offload_target(key) if settings.RECORDING_OFFLOAD_HEADER else None
+    if offload_target:
+        headers[settings.RECORDING_OFFLOAD_HEADER] = offload_target
+        return Response(media_type=media_type, headers=headers)
+
+    size = info.size
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except ValueError:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            storage.iter_range(key, 0, size), media_type=media_type, headers=headers
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        storage.iter_range(key, start, length),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
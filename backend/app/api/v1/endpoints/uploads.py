@@ -0,0 +1,26 @@
+from fastapi import APIRouter, HTTPException, Request
+
+from app.core import direct_uploads
+from app.core.storage import InvalidContentKey, UploadVerificationFailed
+
+router = APIRouter()
+
+
+@router.put("/{upload_id}")
+async def put_direct_upload(
+    upload_id: str,
+    token: str,
+    request: Request,
+):
+    """
+    署名付きPUT URLに対応しないストレージ（ローカル）向けの直接アップロード受付
+    """
+    try:
+        upload = await direct_uploads.receive_direct_upload(
+            upload_id, token, request.stream()
+        )
+    except (direct_uploads.InvalidDirectUpload, InvalidContentKey):
+        raise HTTPException(status_code=403, detail="URLの有効期限が切れているか、署名が不正です")
+    except UploadVerificationFailed:
+        raise HTTPException(status_code=413, detail="Upload exceeds declared size")
+    return {"message": "Upload received", "size": upload.size}
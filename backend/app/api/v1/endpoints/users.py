@@ -1,28 +1,35 @@
-from typing import Any, List
-from fastapi import APIRouter, Body, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Response
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.unit_of_work import UnitOfWorkRoute
 from app.crud import crud_user
 from app.models.models import User
 from app.schemas.user import User, UserCreate, UserUpdate
 from app.core.config import settings
+from app.core.serialization import model_response
 
-router = APIRouter()
+router = APIRouter(route_class=UnitOfWorkRoute)
 
 @router.get("/", response_model=List[User])
 def read_users(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    全ユーザーの取得（管理者のみ）
+    全ユーザーの取得（管理者のみ、cursor指定時はキーセットページング）
     """
-    users = crud_user.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    users = crud_user.user.get_multi(db, skip=skip, limit=limit, cursor=cursor)
+    next_cursor = crud_user.user.next_cursor(users, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return model_response(response, List[User], users)
 
 @router.post("/", response_model=User)
 def create_user(
@@ -66,13 +73,15 @@ def update_user_me(
     """
     current_user_data = jsonable_encoder(current_user)
     user_in = UserUpdate(**current_user_data)
+    # current_userはキャッシュしたスナップショットのため、更新するユーザーを読み直す
+    db_user = crud_user.user.get(db, id=current_user.id)
     if full_name is not None:
         user_in.full_name = full_name
     if email is not None:
         user_in.email = email
     if password is not None:
         user_in.password = password
-    user = crud_user.user.update(db, db_obj=current_user, obj_in=user_in)
+    user = crud_user.user.update(db, db_obj=db_user, obj_in=user_in)
     return user
 
 @router.get("/{user_id}", response_model=User)
@@ -85,7 +94,7 @@ def read_user_by_id(
     特定のユーザー情報の取得
     """
     user = crud_user.user.get(db, id=user_id)
-    if user == current_user:
+    if user is not None and user.id == current_user.id:
         return user
     if not crud_user.user.is_superuser(current_user):
         raise HTTPException(
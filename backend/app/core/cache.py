@@ -0,0 +1,228 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    件数の上限（LRUで追い出し）と有効期限付きの、プロセス内のキャッシュ。
+
+    無効化より前に読み始めた値で上書きしないよう、読み込み前にtoken()を取得し、
+    set(..., token=token)で渡す（読み込み中に無効化されたキーには保存しない）
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # キーごとの最後の無効化の世代（件数はmaxsizeまで。追い出した分は_floorにまとめる）
+        self._generation = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def token(self, key: Optional[Hashable] = None) -> int:
+        # keyはRedisCacheとの互換のため（プロセス内では全キー共通の世代を使う）
+        with self._lock:
+            return self._generation
+
+    def set(self, key: Hashable, value: Any, *, token: Optional[int] = None) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if token is not None and self._invalidated.get(key, self._floor) > token:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+            self._invalidated[key] = self._generation
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > max(self.maxsize, 1):
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._invalidated.clear()
+            self._floor = self._generation
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# 値の世代が読み込み開始時と同じ場合のみ保存する
+_SET_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+end
+"""
+
+
+class RedisCache:
+    """
+    Redisを使ってワーカー間で共有するキャッシュ（TTLCacheと同じ使い方。値は文字列）。
+    件数の上限はRedisのmaxmemory-policyに任せる。Redisに接続できない場合はキャッシュなしとして動く
+    """
+
+    def __init__(self, url: str, *, prefix: str, ttl: float):
+        # redisパッケージは共有キャッシュを使う場合のみ必要
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+        self._set_if_current = self._redis.register_script(_SET_IF_CURRENT)
+        self.prefix = prefix
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}{key}"
+
+    def _generation_key(self, key: Hashable) -> str:
+        return f"{self.prefix}generation:{key}"
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _failed(self, operation: str, e: Exception) -> None:
+        self._count("errors")
+        logger.warning("Cache %s failed for %s*: %s", operation, self.prefix, e)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        try:
+            value = self._redis.get(self._key(key))
+        except self._errors as e:
+            self._failed("get", e)
+            value = None
+        self._count("hits" if value is not None else "misses")
+        return value.decode() if value is not None else None
+
+    def token(self, key: Hashable) -> str:
+        try:
+            generation = self._redis.get(self._generation_key(key))
+        except self._errors as e:
+            self._failed("token", e)
+            return ""
+        return generation.decode() if generation is not None else "0"
+
+    def set(self, key: Hashable, value: str, *, token: Optional[str] = None) -> None:
+        if self.ttl <= 0 or token == "":
+            return
+        try:
+            if token is None:
+                self._redis.set(self._key(key), value, ex=math.ceil(self.ttl))
+            else:
+                self._set_if_current(
+                    keys=[self._key(key), self._generation_key(key)],
+                    args=[token, value, math.ceil(self.ttl)],
+                )
+        except self._errors as e:
+            self._failed("set", e)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._count("invalidations")
+        try:
+            pipeline = self._redis.pipeline()
+            pipeline.incr(self._generation_key(key))
+            # 世代は読み込み中の値を弾くためだけに使うので、TTLより十分長く残れば良い
+            pipeline.expire(self._generation_key(key), max(math.ceil(self.ttl) * 10, 60))
+            pipeline.delete(self._key(key))
+            pipeline.execute()
+        except self._errors as e:
+            self._failed("invalidate", e)
+
+    def clear(self) -> None:
+        try:
+            for key in self._redis.scan_iter(match=f"{self.prefix}*"):
+                self._redis.delete(key)
+        except self._errors as e:
+            self._failed("clear", e)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "errors": self.errors,
+            }
+
+
+def invalidate_on_commit(
+    db: Union[Session, AsyncSession], cache: Union[TTLCache, RedisCache], key: Hashable
+) -> None:
+    """
+    セッションのコミット後（ロールバック時も）にキャッシュを無効化する。
+    コミット前に消すと、並行するリクエストがコミット前の値を読み直して保存してしまうため
+    """
+    session = db.sync_session if isinstance(db, AsyncSession) else db
+    session.info.setdefault("cache_invalidations", []).append((cache, key))
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _invalidate_pending(session):
+    for cache, key in session.info.pop("cache_invalidations", ()):
+        cache.invalidate(key)
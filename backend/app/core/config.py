@@ -18,6 +18,86 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "interviewer_db"
     SQLALCHEMY_DATABASE_URI: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
 
+    # 接続プール（同期・非同期のエンジンそれぞれに適用）
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 30 * 60  # 30 minutes（-1で無効）
+    DB_POOL_PRE_PING: bool = True
+    # 接続の取得にこれ以上かかった場合は警告をログに出す
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 1.0
+
+    # 読み取り専用のレプリカ（カンマ区切りのURL。空の場合はすべてプライマリから読む）
+    DATABASE_REPLICA_URLS: str = ""
+    # 遅延がこれを超えたレプリカは使わずプライマリから読む
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    # 書き込み後、この秒数はそのクライアントの読み取りをプライマリに送る
+    DB_REPLICA_STICKY_SECONDS: int = 10
+
+    # 候補者画面の面接URLでの取得結果のキャッシュ（プロセスごと。0で無効）
+    # 他のワーカーやライフサイクル処理での更新はTTLが切れるまで反映されない
+    INTERVIEW_URL_CACHE_SIZE: int = 1024
+    INTERVIEW_URL_CACHE_TTL_SECONDS: float = 30.0
+    # 認証済みユーザー（id・企業・有効/管理者フラグ）のキャッシュ。0で無効
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    # 指定するとRedisでワーカー間で共有する（redisパッケージが必要）
+    PRINCIPAL_CACHE_REDIS_URL: str = ""
+    # 質問一覧のJSONのキャッシュ（求人・面接ごと。キーに版を含むため無効化は不要）
+    QUESTION_SET_CACHE_SIZE: int = 2048
+    QUESTION_SET_CACHE_TTL_SECONDS: float = 60 * 60
+
+    # 録画・書類の保存先（内容アドレス化ストア）
+    STORAGE_BACKEND: str = "local"  # local, s3
+    STORAGE_DIR: str = "recordings"
+    # 内容アドレス化以前の「recordings/xxx.webm」形式のファイルの置き場所（絶対パス）
+    LEGACY_RECORDINGS_DIR: str = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "recordings"
+    )
+    S3_BUCKET: str = "interviewer"
+    S3_ENDPOINT_URL: str = ""  # MinIO等のS3互換ストレージの場合に指定
+    S3_PUBLIC_ENDPOINT_URL: str = ""  # ブラウザから見たエンドポイント（署名付きURL用）
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: str = ""
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_MULTIPART_PART_SIZE: int = 8 * 1024 * 1024
+    S3_MAX_CONCURRENCY: int = 4
+    S3_MAX_POOL_CONNECTIONS: int = 20
+
+    # 録画配信（署名付きURL・フロントプロキシへのオフロード）
+    RECORDING_URL_TTL_SECONDS: int = 60 * 60  # 1 hour
+    # 例: "X-Accel-Redirect"（nginx）または "X-Sendfile"（Apache等）。空の場合はPythonから配信
+    RECORDING_OFFLOAD_HEADER: str = ""
+    # X-Accel-Redirectの場合はnginxのinternal locationのプレフィックス、X-Sendfileの場合はストアの絶対パス
+    RECORDING_OFFLOAD_PREFIX: str = "/protected-recordings/"
+
+    # 録画の再開可能アップロード
+    UPLOAD_SESSIONS_DIR: str = "uploads/sessions"
+    UPLOAD_SESSION_TTL_SECONDS: int = 60 * 60 * 24  # 24 hours
+
+    # ストレージへの直接アップロード（署名付きPUT URL）
+    DIRECT_UPLOAD_URL_TTL_SECONDS: int = 60 * 15  # 15 minutes
+    DIRECT_UPLOAD_MAX_SIZE: int = 2 * 1024 * 1024 * 1024  # 2 GiB
+    # 確定されないままのincoming/のオブジェクトは、URLの期限からこの時間が過ぎたらライフサイクル処理で削除する
+    DIRECT_UPLOAD_ABANDONED_AFTER_SECONDS: int = 60 * 60 * 24  # 24 hours
+
+    # 録画の後処理（ffmpeg）
+    FFMPEG_PATH: str = "ffmpeg"
+    FFPROBE_PATH: str = "ffprobe"
+    MEDIA_WORKERS: int = 2
+    MEDIA_QUEUE_MAX_PENDING: int = 100
+    MEDIA_JOB_MAX_RETRIES: int = 2
+
+    # 録画の保持ライフサイクル（企業ごとの設定がない場合の既定値。0で無効）
+    RECORDING_COLD_AFTER_DAYS: int = 30
+    RECORDING_RETENTION_DAYS: int = 0
+    RECORDING_COLD_VIDEO_BITRATE: str = "300k"
+    RECORDING_COLD_AUDIO_BITRATE: str = "32k"
+    RECORDING_LIFECYCLE_BATCH_SIZE: int = 50
+    # ライフサイクル処理で読み書きするバイト数の上限（毎秒）
+    RECORDING_LIFECYCLE_MAX_BYTES_PER_SECOND: int = 20 * 1024 * 1024
+
     class Config:
         case_sensitive = True
 
@@ -1,21 +1,121 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 import os
 
+from app.core.db_pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    InstrumentedQueuePool,
+    pool_options,
+)
+from app.core.db_routing import ReplicaSet, replica_urls
+
 SQLALCHEMY_DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "postgresql://postgres:postgres@db:5432/interviewer_db"
 )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _async_database_url(url: str) -> str:
+    """同期ドライバのURLを非同期ドライバ（asyncpg / aiosqlite）のURLに変換"""
+    scheme, _, rest = url.partition("://")
+    if scheme in ("postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+# プールの大きさ・タイムアウト等はSettingsのDB_POOL_*で設定する
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, poolclass=InstrumentedQueuePool, **pool_options()
+)
+# 読み取り専用のレプリカ（DATABASE_REPLICA_URLS）
+replicas = ReplicaSet(replica_urls())
+
+class RoutingSession(Session):
+    """
+    info["read_only"]が立っているセッションの読み取りをレプリカに振り分ける。
+    書き込み（flush・INSERT/UPDATE/DELETE）があればそれ以降はプライマリを使う
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get("read_only"):
+            if self._flushing or getattr(clause, "is_dml", False):
+                self.info["read_only"] = False
+            else:
+                if "replica" not in self.info:
+                    # 同じリクエスト内の読み取りは同じレプリカから行う
+                    self.info["replica"] = replicas.choose()
+                if self.info["replica"] is not None:
+                    return self.info["replica"]
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+# CRUDの書き込みはRETURNINGで値を受け取るため、コミット時に失効させない
+SessionLocal = sessionmaker(
+    class_=RoutingSession,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
+
+# async def のエンドポイント用（イベントループをブロックしない）
+async_engine = create_async_engine(
+    _async_database_url(SQLALCHEMY_DATABASE_URL),
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    **pool_options()
+)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+class QueryCounter:
+    """count_queriesで実行されたSQL文"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+# セッションごとの未コミットの書き込みとコミット回数（リクエスト単位のトランザクション用）
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_writes(session, flush_context):
+    session.info["pending_writes"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_executed_writes(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["pending_writes"] = True
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session):
+    session.info["commits"] = session.info.get("commits", 0) + 1
+    session.info["pending_writes"] = False
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info["pending_writes"] = False
+
+@contextmanager
+def count_queries(*engines) -> Iterator[QueryCounter]:
+    """ブロック内で実行されたクエリを数える（既定は同期・非同期の両エンジン）"""
+    engines = engines or (engine, async_engine.sync_engine)
+    counter = QueryCounter()
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", counter)
     try:
-        yield db
+        yield counter
     finally:
-        db.close() 
\ No newline at end of file
+        for bind in engines:
+            event.remove(bind, "before_cursor_execute", counter)
+
@@ -0,0 +1,109 @@
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, pool_options
+
+logger = logging.getLogger(__name__)
+
+# 書き込み後、この時刻（UNIX時間）まではプライマリから読む
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+READ_ONLY_METHODS = ("GET", "HEAD")
+
+_PG_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaSet:
+    """
+    読み取り専用のレプリカ。遅延（秒）は一定間隔でのみ確認し、
+    DB_REPLICA_MAX_LAG_SECONDSを超えたレプリカや接続できないレプリカは使わない
+    """
+
+    def __init__(self, urls: List[str]):
+        self.engines: List[Engine] = [
+            create_engine(url, poolclass=InstrumentedQueuePool, **pool_options()) for url in urls
+        ]
+        self._lock = threading.Lock()
+        self._lag: Dict[Engine, Optional[float]] = {}
+        self._checked_at: Dict[Engine, float] = {}
+        self._next = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def _measure_lag(self, engine: Engine) -> Optional[float]:
+        if engine.dialect.name != "postgresql":
+            # SQLite等（ローカルでの検証用）はレプリケーションしないため遅延なしとみなす
+            return 0.0
+        try:
+            with engine.connect() as connection:
+                lag = connection.execute(_PG_LAG_QUERY).scalar()
+        except Exception as e:
+            logger.warning("Replica %s is unavailable: %s", engine.url.render_as_string(), e)
+            return None
+        return float(lag or 0.0)
+
+    def lag(self, engine: Engine) -> Optional[float]:
+        """レプリカの遅延（秒）。接続できない場合はNone"""
+        now = time.monotonic()
+        with self._lock:
+            checked_at = self._checked_at.get(engine)
+            if checked_at is not None and now - checked_at < settings.DB_REPLICA_LAG_CHECK_INTERVAL:
+                # 初回の確認中で未計測の場合はNone（プライマリから読む）
+                return self._lag.get(engine)
+            # 確認中に他のスレッドが重ねて確認しないよう先に時刻を更新する
+            self._checked_at[engine] = now
+        lag = self._measure_lag(engine)
+        with self._lock:
+            previous = self._lag.get(engine, 0.0)
+            self._lag[engine] = lag
+        if lag is not None and lag > settings.DB_REPLICA_MAX_LAG_SECONDS and (
+            previous is None or previous <= settings.DB_REPLICA_MAX_LAG_SECONDS
+        ):
+            logger.warning(
+                "Replica %s is %.1fs behind, reading from the primary",
+                engine.url.render_as_string(), lag,
+            )
+        return lag
+
+    def choose(self) -> Optional[Engine]:
+        """遅延が許容範囲のレプリカを順番に選ぶ（なければNone）"""
+        if not self.engines:
+            return None
+        start = next(self._next)
+        for offset in range(len(self.engines)):
+            engine = self.engines[(start + offset) % len(self.engines)]
+            lag = self.lag(engine)
+            if lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS:
+                return engine
+        return None
+
+    def status(self) -> List[Dict]:
+        return [
+            {"url": engine.url.render_as_string(), "lag_seconds": self._lag.get(engine)}
+            for engine in self.engines
+        ]
+
+
+def replica_urls() -> List[str]:
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+
+
+def reads_from_replica(method: str, cookies: Dict[str, str]) -> bool:
+    """参照系のリクエストで、直近の書き込み後の期間でなければレプリカから読む"""
+    if method not in READ_ONLY_METHODS:
+        return False
+    try:
+        primary_until = float(cookies.get(READ_YOUR_WRITES_COOKIE, 0))
+    except ValueError:
+        primary_until = 0
+    return primary_until <= time.time()
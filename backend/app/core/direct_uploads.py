@@ -0,0 +1,158 @@
+import logging
+import re
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Optional
+
+from jose import JWTError, jwt
+
+from app.core.config import settings
+from app.core.storage import StoredObject, normalize_suffix, storage
+from app.core.storage.base import new_incoming_key
+
+logger = logging.getLogger(__name__)
+
+# アップロード対象と面接のカラム・既定の拡張子
+UPLOAD_TARGETS = {
+    "recording": ("recording_url", ".webm"),
+    "resume": ("resume_url", ".pdf"),
+    "cv": ("cv_url", ".pdf"),
+}
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_TOKEN_TYPE = "direct_upload"
+
+
+class InvalidDirectUpload(Exception):
+    pass
+
+
+@dataclass
+class DirectUpload:
+    """ストレージへの直接アップロードの情報"""
+    upload_token: str
+    interview_id: int
+    target: str
+    incoming_key: str
+    size: int
+    sha256: str
+    suffix: str
+    expires_at: int
+    upload_url: Optional[str] = None
+    upload_headers: Optional[Dict[str, str]] = None
+
+    @property
+    def column(self) -> str:
+        return UPLOAD_TARGETS[self.target][0]
+
+
+async def create_direct_upload(
+    interview_id: int,
+    target: str,
+    *,
+    size: int,
+    sha256: str,
+    filename: Optional[str] = None,
+) -> DirectUpload:
+    """
+    直接アップロードを発行する。
+    アップロード内容の期待値はトークンに署名して持たせ、サーバー側には状態を保存しない
+    """
+    if target not in UPLOAD_TARGETS:
+        raise InvalidDirectUpload(f"unknown upload target: {target}")
+    sha256 = sha256.lower()
+    if not _SHA256_RE.match(sha256):
+        raise InvalidDirectUpload("sha256 must be a hex digest")
+    if size <= 0 or size > settings.DIRECT_UPLOAD_MAX_SIZE:
+        raise InvalidDirectUpload(f"size must be between 1 and {settings.DIRECT_UPLOAD_MAX_SIZE}")
+
+    expires_in = settings.DIRECT_UPLOAD_URL_TTL_SECONDS
+    upload = DirectUpload(
+        upload_token="",
+        interview_id=interview_id,
+        target=target,
+        incoming_key=new_incoming_key(),
+        size=size,
+        sha256=sha256,
+        suffix=normalize_suffix(filename or "", UPLOAD_TARGETS[target][1]),
+        expires_at=int(time.time()) + expires_in,
+    )
+    upload.upload_token = jwt.encode(
+        {
+            "typ": _TOKEN_TYPE,
+            "sub": upload.incoming_key,
+            "iid": interview_id,
+            "target": target,
+            "size": size,
+            "sha256": sha256,
+            "suffix": upload.suffix,
+            "exp": upload.expires_at,
+        },
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+    presigned = await storage.presigned_put_url(
+        upload.incoming_key, size=size, sha256=sha256, expires_in=expires_in
+    )
+    if presigned is not None:
+        upload.upload_url = presigned.url
+        upload.upload_headers = presigned.headers
+    logger.info(
+        "Issued direct upload %s for interview %d (%s, %d bytes)",
+        upload.incoming_key, interview_id, target, size,
+    )
+    return upload
+
+
+def load_direct_upload(upload_token: str, *, verify_exp: bool = True) -> DirectUpload:
+    try:
+        claims = jwt.decode(
+            upload_token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+            options={"verify_exp": verify_exp},
+        )
+    except JWTError as e:
+        raise InvalidDirectUpload(str(e))
+    if claims.get("typ") != _TOKEN_TYPE:
+        raise InvalidDirectUpload("not a direct upload token")
+    return DirectUpload(
+        upload_token=upload_token,
+        interview_id=claims["iid"],
+        target=claims["target"],
+        incoming_key=claims["sub"],
+        size=claims["size"],
+        sha256=claims["sha256"],
+        suffix=claims["suffix"],
+        expires_at=claims["exp"],
+    )
+
+
+async def receive_direct_upload(
+    upload_id: str, upload_token: str, chunks: AsyncIterator[bytes]
+) -> DirectUpload:
+    """直接アップロードに対応しないストレージ向けに、APIでアップロードを受け付ける"""
+    upload = load_direct_upload(upload_token)
+    if upload.incoming_key != f"incoming/{upload_id}":
+        raise InvalidDirectUpload("upload token does not match the upload id")
+    await storage.put_incoming(upload.incoming_key, chunks, max_size=upload.size)
+    return upload
+
+
+async def finalize_direct_upload(upload_token: str, interview_id: int) -> tuple:
+    """
+    アップロードされたオブジェクトを検証して内容アドレスのキーへ移す。
+    URLの期限切れ直前に完了したアップロードも確定できるよう、有効期限は検証しない
+    （確定されないオブジェクトは、期限からDIRECT_UPLOAD_ABANDONED_AFTER_SECONDS後にライフサイクル処理で削除される）
+    """
+    upload = load_direct_upload(upload_token, verify_exp=False)
+    if upload.interview_id != interview_id:
+        raise InvalidDirectUpload("upload token does not belong to this interview")
+    stored: StoredObject = await storage.promote_incoming(
+        upload.incoming_key, size=upload.size, sha256=upload.sha256, suffix=upload.suffix
+    )
+    logger.info(
+        "Finalized direct upload %s as %s%s",
+        upload.incoming_key, stored.key, " (deduplicated)" if stored.deduplicated else "",
+    )
+    return upload, stored
@@ -0,0 +1,118 @@
+import json
+import os
+import subprocess
+import tempfile
+from typing import Any, Dict
+
+from app.core.config import settings
+
+
+class MediaProcessingError(Exception):
+    pass
+
+
+def _run(args) -> str:
+    result = subprocess.run(args, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise MediaProcessingError(
+            f"{args[0]} exited with {result.returncode}: {result.stderr.strip()[-500:]}"
+        )
+    return result.stdout
+
+
+def probe_duration(path: str) -> float:
+    """ffprobeで動画の長さ（秒）を取得"""
+    output = _run([
+        settings.FFPROBE_PATH,
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "json",
+        path,
+    ])
+    duration = json.loads(output).get("format", {}).get("duration")
+    return float(duration) if duration is not None else 0.0
+
+
+def remux_seekable(src: str, dst: str) -> None:
+    """
+    MediaRecorderの出力はCuesを持たずシークできないため、
+    再エンコードせずにコンテナのみ作り直す
+    """
+    _run([
+        settings.FFMPEG_PATH,
+        "-y", "-v", "error",
+        "-i", src,
+        "-c", "copy",
+        "-f", "webm",
+        dst,
+    ])
+
+
+def extract_audio(src: str, dst: str) -> None:
+    """音声トラックのみを再エンコードせずに抽出"""
+    _run([
+        settings.FFMPEG_PATH,
+        "-y", "-v", "error",
+        "-i", src,
+        "-vn",
+        "-c:a", "copy",
+        "-f", "ogg",
+        dst,
+    ])
+
+
+def reencode_for_cold_storage(src: str, work_dir: str) -> Dict[str, Any]:
+    """
+    長期保管用に低ビットレートで再エンコードした動画をwork_dirへ書き出す。
+    CPU使用率を抑えるためスレッド数は1に制限する
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    fd, dst = tempfile.mkstemp(dir=work_dir, prefix="cold-", suffix=".webm")
+    os.close(fd)
+    try:
+        _run([
+            settings.FFMPEG_PATH,
+            "-y", "-v", "error",
+            "-i", src,
+            "-c:v", "libvpx-vp9",
+            "-b:v", settings.RECORDING_COLD_VIDEO_BITRATE,
+            "-deadline", "good",
+            "-cpu-used", "4",
+            "-c:a", "libopus",
+            "-b:a", settings.RECORDING_COLD_AUDIO_BITRATE,
+            "-threads", "1",
+            "-f", "webm",
+            dst,
+        ])
+    except BaseException:
+        os.unlink(dst)
+        raise
+    return {"path": dst, "size": os.path.getsize(dst)}
+
+
+def process_recording(path: str, work_dir: str) -> Dict[str, Any]:
+    """
+    録画ファイルの後処理（ワーカープロセス内で実行される）。
+    シーク可能な形式に作り直した動画と抽出した音声をwork_dirへ書き出し、
+    メタデータと共にそのパスを返す。元のファイルは変更しない。
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    fd, remuxed_path = tempfile.mkstemp(dir=work_dir, prefix="remux-", suffix=".webm")
+    os.close(fd)
+    fd, audio_path = tempfile.mkstemp(dir=work_dir, prefix="audio-", suffix=".opus")
+    os.close(fd)
+    try:
+        remux_seekable(path, remuxed_path)
+        extract_audio(remuxed_path, audio_path)
+        duration = probe_duration(remuxed_path)
+    except BaseException:
+        for tmp_path in (remuxed_path, audio_path):
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        raise
+    return {
+        "remuxed_path": remuxed_path,
+        "audio_path": audio_path,
+        "recording_duration": duration,
+        "recording_size": os.path.getsize(remuxed_path),
+    }
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy import or_, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.media import process_recording
+from app.core.storage import storage
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+# 処理中に面接の録画が新しいものに置き換えられ、結果を反映しなかった
+JOB_SUPERSEDED = "superseded"
+
+# 完了済みジョブの保持件数
+JOB_HISTORY_SIZE = 1000
+
+
+class RecordingQueueFull(Exception):
+    pass
+
+
+@dataclass
+class RecordingJob:
+    """録画後処理ジョブ"""
+    job_id: str
+    interview_id: int
+    recording_key: str
+    status: str = JOB_QUEUED
+    attempts: int = 0
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # ストレージから取得した処理用のローカルファイル（ローカルストレージ以外では一時ファイル）
+    local_path: Optional[str] = None
+
+
+class RecordingJobQueue:
+    """
+    完了した面接の録画を別プロセスで後処理するジョブキュー。
+    同時実行数はワーカープロセス数、待機数はmax_pendingで制限する。
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int, max_retries: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._completion_executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: "OrderedDict[str, RecordingJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _get_completion_executor(self) -> ThreadPoolExecutor:
+        if self._completion_executor is None:
+            self._completion_executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="recording-job"
+            )
+        return self._completion_executor
+
+    def _pending_count(self) -> int:
+        return sum(
+            1 for job in self._jobs.values()
+            if job.status in (JOB_QUEUED, JOB_RUNNING)
+        )
+
+    def submit(self, interview_id: int, recording_key: str) -> RecordingJob:
+        with self._lock:
+            if self._pending_count() >= self.max_pending:
+                raise RecordingQueueFull(f"{self.max_pending} recording jobs already pending")
+            job = RecordingJob(
+                job_id=uuid.uuid4().hex,
+                interview_id=interview_id,
+                recording_key=recording_key,
+            )
+            self._jobs[job.job_id] = job
+            self._trim_history()
+        _set_recording_status(job, "processing")
+        self._dispatch(job)
+        logger.info("Queued recording job %s for interview %d", job.job_id, interview_id)
+        return job
+
+    def _dispatch(self, job: RecordingJob) -> None:
+        job.attempts += 1
+        job.status = JOB_RUNNING
+        try:
+            if job.local_path is None:
+                job.local_path = _run_storage(
+                    lambda: storage.fetch_to_local(job.recording_key, storage.work_dir)
+                )
+            future = self._get_executor().submit(
+                process_recording, job.local_path, storage.work_dir
+            )
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        future.add_done_callback(lambda f: self._on_done(job, f))
+
+    def _on_done(self, job: RecordingJob, future: Future) -> None:
+        # ProcessPoolExecutorの結果を受け渡すスレッドで呼ばれるため、
+        # ストレージへの保存・DBの更新は別スレッドで行い、他のジョブの完了を待たせない
+        try:
+            self._get_completion_executor().submit(self._complete, job, future)
+        except RuntimeError as e:
+            # シャットダウン後に完了した場合
+            logger.error("Recording job %s finished after shutdown: %s", job.job_id, e)
+
+    def _complete(self, job: RecordingJob, future: Future) -> None:
+        try:
+            self._handle_result(job, future)
+        except Exception:
+            logger.exception("Recording job %s could not be completed", job.job_id)
+            job.status = JOB_FAILED
+            job.finished_at = time.time()
+
+    def _handle_result(self, job: RecordingJob, future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception as e:
+            job.error = str(e)
+            if job.attempts <= self.max_retries:
+                delay = 2 ** job.attempts
+                logger.warning(
+                    "Recording job %s failed (attempt %d), retrying in %ds: %s",
+                    job.job_id, job.attempts, delay, e,
+                )
+                job.status = JOB_QUEUED
+                timer = threading.Timer(delay, self._dispatch, args=(job,))
+                timer.daemon = True
+                timer.start()
+                return
+            logger.error("Recording job %s failed permanently: %s", job.job_id, e)
+            job.status = JOB_FAILED
+            job.finished_at = time.time()
+            _release_local_copy(job)
+            _set_recording_status(job, "failed")
+            return
+
+        try:
+            applied = _store_processed_recording(job, result)
+        except Exception as e:
+            logger.error("Failed to save metadata for recording job %s: %s", job.job_id, e)
+            job.status = JOB_FAILED
+            job.error = str(e)
+            _set_recording_status(job, "failed")
+        else:
+            job.status = JOB_SUCCEEDED if applied else JOB_SUPERSEDED
+            job.result = result
+            job.error = None
+        job.finished_at = time.time()
+        _release_local_copy(job)
+
+    def _trim_history(self) -> None:
+        while len(self._jobs) > JOB_HISTORY_SIZE:
+            job_id, job = next(iter(self._jobs.items()))
+            if job.status in (JOB_QUEUED, JOB_RUNNING):
+                break
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[RecordingJob]:
+        return self._jobs.get(job_id)
+
+    def list_for_interview(self, interview_id: int) -> List[RecordingJob]:
+        return [job for job in self._jobs.values() if job.interview_id == interview_id]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._completion_executor is not None:
+            self._completion_executor.shutdown(wait=False, cancel_futures=True)
+            self._completion_executor = None
+
+
+def _run_storage(fn: Callable[[], Awaitable[T]]) -> T:
+    """ジョブのスレッドからストレージの非同期APIを呼び出す"""
+    async def run() -> T:
+        try:
+            return await fn()
+        finally:
+            # クライアントはイベントループごとに作られるため、ループと一緒に閉じる
+            await storage.close()
+
+    return asyncio.run(run())
+
+
+def _release_local_copy(job: RecordingJob) -> None:
+    """ストレージからダウンロードした一時ファイルを削除する"""
+    if job.local_path and job.local_path != storage.local_path(job.recording_key):
+        try:
+            os.unlink(job.local_path)
+        except FileNotFoundError:
+            pass
+    job.local_path = None
+
+
+def _set_recording_status(job: RecordingJob, status: str) -> None:
+    _update_interview(job, {"recording_status": status})
+
+
+def _store_processed_recording(job: RecordingJob, result: Dict[str, Any]) -> bool:
+    """
+    後処理済みの動画・音声をストアへ登録し、面接のキーとメタデータを更新する。
+    録画が新しいものに置き換えられていた場合は反映せずFalseを返す
+    """
+    try:
+        video = _run_storage(lambda: storage.put_file(result["remuxed_path"], suffix=".webm"))
+        try:
+            audio = _run_storage(lambda: storage.put_file(result["audio_path"], suffix=".opus"))
+        except Exception:
+            # 登録済みの動画が宙に浮かないよう、参照されていなければ削除する
+            if video.key != job.recording_key:
+                _delete_if_unreferenced(video.key)
+            raise
+    finally:
+        # put_fileは登録後に元ファイルを削除するが、失敗時は作業ディレクトリに残る
+        for tmp_path in (result["remuxed_path"], result["audio_path"]):
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+    applied = _update_interview(job, {
+        "recording_url": video.key,
+        "audio_url": audio.key,
+        "recording_duration": result["recording_duration"],
+        "recording_size": result["recording_size"],
+        "recording_status": "ready",
+    })
+    if not applied:
+        logger.info(
+            "Recording of interview %d was replaced while job %s ran, discarding its result",
+            job.interview_id, job.job_id,
+        )
+        for key in {video.key, audio.key} - {job.recording_key}:
+            _delete_if_unreferenced(key)
+        return False
+    if video.key != job.recording_key:
+        _delete_if_unreferenced(job.recording_key)
+    return True
+
+
+def _update_interview(job: RecordingJob, values: Dict[str, Any]) -> bool:
+    """
+    面接の録画がジョブの対象のままの場合のみ更新する（UPDATE ... WHERE recording_url = 対象のキー）。
+    処理中に新しい録画がアップロードされていれば上書きせずFalseを返す
+    """
+    # ジョブはリクエスト外で完了するため、専用のセッションで更新する
+    from app.crud.crud_interview import interview as crud_interview
+    from app.models.models import Interview
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            update(Interview)
+            .where(Interview.id == job.interview_id, Interview.recording_url == job.recording_key)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            crud_interview._invalidate_by_id(db, job.interview_id)
+        db.commit()
+        return bool(result.rowcount)
+    finally:
+        db.close()
+
+
+def _delete_if_unreferenced(recording_key: str) -> None:
+    # 重複排除により同じ内容を他の面接が参照している場合は残す
+    from app.models.models import Interview
+
+    db = SessionLocal()
+    try:
+        referenced = (
+            db.query(Interview.id)
+            .filter(or_(Interview.recording_url == recording_key, Interview.audio_url == recording_key))
+            .first()
+        )
+    finally:
+        db.close()
+    if not referenced:
+        _run_storage(lambda: storage.delete(recording_key))
+
+
+recording_jobs = RecordingJobQueue(
+    max_workers=settings.MEDIA_WORKERS,
+    max_pending=settings.MEDIA_QUEUE_MAX_PENDING,
+    max_retries=settings.MEDIA_JOB_MAX_RETRIES,
+)
@@ -0,0 +1,330 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.media import reencode_for_cold_storage
+from app.core.storage import InvalidContentKey, ObjectNotFound, storage
+from app.models.models import Company, Interview, RecordingLifecycleRun
+
+logger = logging.getLogger(__name__)
+
+TIER_COLD = "cold"
+TIER_PURGED = "purged"
+
+
+@dataclass
+class LifecycleStats:
+    """ライフサイクル処理の実行結果"""
+    compressed: int = 0
+    purged: int = 0
+    failed: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    reclaimed_bytes: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _Throttle:
+    """読み書きしたバイト数が毎秒の上限を超えないよう待機する"""
+
+    def __init__(self, max_bytes_per_second: int):
+        self.max_bytes_per_second = max_bytes_per_second
+        self.started = time.monotonic()
+        self.total = 0
+
+    async def consume(self, size: int) -> None:
+        if self.max_bytes_per_second <= 0:
+            return
+        self.total += size
+        delay = self.total / self.max_bytes_per_second - (time.monotonic() - self.started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def company_policy(company: Company) -> Tuple[int, int]:
+    """企業のコールド化・削除までの日数（0は無効）"""
+    cold_after = company.recording_cold_after_days
+    if cold_after is None:
+        cold_after = settings.RECORDING_COLD_AFTER_DAYS
+    retention = company.recording_retention_days
+    if retention is None:
+        retention = settings.RECORDING_RETENTION_DAYS
+    return cold_after, retention
+
+
+def _candidates(
+    db: Session, company_id: int, cutoff: datetime, after_id: int, limit: int, *, for_cold: bool
+) -> List[Interview]:
+    query = (
+        db.query(Interview)
+        .filter(
+            Interview.company_id == company_id,
+            Interview.recording_url.isnot(None),
+            Interview.created_at < cutoff,
+            Interview.id > after_id,
+        )
+    )
+    if for_cold:
+        query = query.filter(
+            or_(Interview.recording_tier.is_(None), Interview.recording_tier != TIER_COLD),
+            or_(Interview.recording_status.is_(None), Interview.recording_status != "processing"),
+        )
+    return query.order_by(Interview.id).limit(limit).all()
+
+
+def _is_referenced(db: Session, key: str) -> bool:
+    # 重複排除により他の面接が同じ内容を参照している場合がある
+    return db.query(Interview.id).filter(
+        or_(Interview.recording_url == key, Interview.audio_url == key)
+    ).first() is not None
+
+
+async def _delete_if_unreferenced(db: Session, key: str) -> int:
+    """参照されなくなったオブジェクトを削除し、解放したバイト数を返す"""
+    if _is_referenced(db, key):
+        return 0
+    try:
+        info = await storage.stat(key)
+    except (InvalidContentKey, ObjectNotFound):
+        return 0
+    await storage.delete(key)
+    return info.size
+
+
+async def _purge_batch(db: Session, interview_ids: List[int], stats: LifecycleStats, throttle: _Throttle) -> None:
+    """
+    保持期限を過ぎた録画をまとめて削除する。
+    先に面接のURLを消してコミットし、その後にストレージから削除するため、
+    存在しないオブジェクトを参照する状態にはならない
+    """
+    # 取得後に他の処理が更新中の行はスキップする
+    interviews = (
+        db.query(Interview)
+        .filter(Interview.id.in_(interview_ids), Interview.recording_url.isnot(None))
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    keys = set()
+    for interview in interviews:
+        keys.add(interview.recording_url)
+        if interview.audio_url:
+            keys.add(interview.audio_url)
+        interview.recording_url = None
+        interview.audio_url = None
+        interview.recording_size = None
+        interview.recording_tier = TIER_PURGED
+    db.commit()
+    stats.purged += len(interviews)
+
+    for key in keys:
+        freed = await _delete_if_unreferenced(db, key)
+        stats.bytes_before += freed
+        stats.reclaimed_bytes += freed
+        await throttle.consume(freed)
+
+
+async def _compress(db: Session, interview: Interview, stats: LifecycleStats, throttle: _Throttle) -> None:
+    """録画を低ビットレートで再エンコードし、差し替えた上で元のオブジェクトを削除する"""
+    interview_id = interview.id
+    old_key = interview.recording_url
+    before = (await storage.stat(old_key)).size
+    local_path = await storage.fetch_to_local(old_key, storage.work_dir)
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, reencode_for_cold_storage, local_path, storage.work_dir
+        )
+    finally:
+        if local_path != storage.local_path(old_key):
+            os.unlink(local_path)
+    await throttle.consume(before + result["size"])
+
+    if result["size"] >= before:
+        # 既に十分小さい録画は元のまま保管済みとして扱う
+        os.unlink(result["path"])
+        db.execute(
+            update(Interview)
+            .where(Interview.id == interview_id, Interview.recording_url == old_key)
+            .values(recording_tier=TIER_COLD)
+        )
+        db.commit()
+        return
+
+    stored = await storage.put_file(result["path"], suffix=".webm")
+    # 処理中に録画が差し替えられていた場合は上書きしない
+    updated = db.execute(
+        update(Interview)
+        .where(Interview.id == interview_id, Interview.recording_url == old_key)
+        .values(
+            recording_url=stored.key,
+            recording_size=stored.size,
+            recording_tier=TIER_COLD,
+        )
+    ).rowcount
+    db.commit()
+    if not updated:
+        await _delete_if_unreferenced(db, stored.key)
+        return
+
+    stats.compressed += 1
+    stats.bytes_before += before
+    stats.bytes_after += stored.size
+    freed = await _delete_if_unreferenced(db, old_key)
+    stats.reclaimed_bytes += freed - (0 if stored.deduplicated else stored.size)
+
+
+async def _purge_abandoned_uploads(stats: LifecycleStats, now: datetime, *, dry_run: bool) -> int:
+    """
+    URLの期限からDIRECT_UPLOAD_ABANDONED_AFTER_SECONDSが過ぎても確定されていない
+    incoming/のオブジェクトを削除し、件数を返す（解放した容量はreclaimed_bytesに加える）
+    """
+    older_than = now - timedelta(
+        seconds=settings.DIRECT_UPLOAD_URL_TTL_SECONDS + settings.DIRECT_UPLOAD_ABANDONED_AFTER_SECONDS
+    )
+    try:
+        count, size = await storage.purge_incoming(older_than, dry_run=dry_run)
+    except Exception as e:
+        stats.failed += 1
+        logger.error("Failed to purge abandoned direct uploads: %s", e)
+        return 0
+    stats.reclaimed_bytes += size
+    return count
+
+
+async def run_lifecycle(
+    *,
+    batch_size: Optional[int] = None,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> LifecycleStats:
+    """
+    企業ごとの保持ポリシーに従い、古い録画のコールド化（再エンコード）と削除を行う。
+    面接はバッチ単位で取得し、I/OはRECORDING_LIFECYCLE_MAX_BYTES_PER_SECONDで制限する。
+    あわせて、確定されずに残った直接アップロード（incoming/）を削除する
+    """
+    batch_size = batch_size or settings.RECORDING_LIFECYCLE_BATCH_SIZE
+    now = now or datetime.utcnow()
+    stats = LifecycleStats()
+    throttle = _Throttle(settings.RECORDING_LIFECYCLE_MAX_BYTES_PER_SECOND)
+
+    # 長時間のバッチでは一括UPDATEの結果を読み直すため、コミット時に失効させる
+    db = SessionLocal(expire_on_commit=True)
+    try:
+        run = None
+        if not dry_run:
+            run = RecordingLifecycleRun(started_at=now)
+            db.add(run)
+            db.commit()
+
+        for company in db.query(Company).order_by(Company.id).all():
+            cold_after, retention = company_policy(company)
+
+            if retention > 0:
+                cutoff = now - timedelta(days=retention)
+                after_id = 0
+                while True:
+                    batch = _candidates(db, company.id, cutoff, after_id, batch_size, for_cold=False)
+                    if not batch:
+                        break
+                    after_id = batch[-1].id
+                    if dry_run:
+                        stats.purged += len(batch)
+                        stats.reclaimed_bytes += sum(i.recording_size or 0 for i in batch)
+                        continue
+                    await _purge_batch(db, [i.id for i in batch], stats, throttle)
+
+            if cold_after > 0 and (retention <= 0 or cold_after < retention):
+                cutoff = now - timedelta(days=cold_after)
+                after_id = 0
+                while True:
+                    batch = _candidates(db, company.id, cutoff, after_id, batch_size, for_cold=True)
+                    if not batch:
+                        break
+                    after_id = batch[-1].id
+                    for interview in batch:
+                        if dry_run:
+                            stats.compressed += 1
+                            stats.bytes_before += interview.recording_size or 0
+                            continue
+                        try:
+                            await _compress(db, interview, stats, throttle)
+                        except Exception as e:
+                            db.rollback()
+                            stats.failed += 1
+                            logger.error(
+                                "Failed to compress recording of interview %d: %s", interview.id, e
+                            )
+
+        incoming_purged = await _purge_abandoned_uploads(stats, now, dry_run=dry_run)
+
+        if run is not None:
+            run.finished_at = datetime.utcnow()
+            for field, value in stats.as_dict().items():
+                setattr(run, field, value)
+            db.commit()
+    finally:
+        db.close()
+
+    logger.info(
+        "Recording lifecycle %s: %d compressed, %d purged, %d abandoned uploads, "
+        "%d failed, %d bytes reclaimed",
+        "dry run" if dry_run else "finished",
+        stats.compressed,
+        stats.purged,
+        incoming_purged,
+        stats.failed,
+        stats.reclaimed_bytes,
+    )
+    return stats
+
+
+def lifecycle_metrics(db: Session) -> Dict[str, Any]:
+    """解放した容量などのライフサイクル処理の累計と、ティアごとの録画数"""
+    totals = db.query(
+        func.count(RecordingLifecycleRun.id),
+        func.coalesce(func.sum(RecordingLifecycleRun.compressed), 0),
+        func.coalesce(func.sum(RecordingLifecycleRun.purged), 0),
+        func.coalesce(func.sum(RecordingLifecycleRun.failed), 0),
+        func.coalesce(func.sum(RecordingLifecycleRun.reclaimed_bytes), 0),
+    ).one()
+    last_run = (
+        db.query(RecordingLifecycleRun)
+        .filter(RecordingLifecycleRun.finished_at.isnot(None))
+        .order_by(RecordingLifecycleRun.id.desc())
+        .first()
+    )
+    tiers = dict(
+        db.query(func.coalesce(Interview.recording_tier, "hot"), func.count(Interview.id))
+        .filter(or_(Interview.recording_url.isnot(None), Interview.recording_tier == TIER_PURGED))
+        .group_by(func.coalesce(Interview.recording_tier, "hot"))
+        .all()
+    )
+    return {
+        "runs": totals[0],
+        "compressed": totals[1],
+        "purged": totals[2],
+        "failed": totals[3],
+        "reclaimed_bytes": totals[4],
+        "recordings_by_tier": tiers,
+        "last_run": None if last_run is None else {
+            "started_at": last_run.started_at,
+            "finished_at": last_run.finished_at,
+            "compressed": last_run.compressed,
+            "purged": last_run.purged,
+            "failed": last_run.failed,
+            "bytes_before": last_run.bytes_before,
+            "bytes_after": last_run.bytes_after,
+            "reclaimed_bytes": last_run.reclaimed_bytes,
+        },
+    }
@@ -1,3 +1,6 @@
+import hashlib
+import hmac
+import time
 from datetime import datetime, timedelta
 from typing import Any, Union
 from jose import jwt
@@ -27,4 +30,20 @@ def get_password_hash(password: str) -> str:
     print(f"Generating hash for password: {password}")
     hashed = pwd_context.hash(password)
     print(f"Generated hash: {hashed}")
-    return hashed 
\ No newline at end of file
+    return hashed 
+
+def sign_storage_key(key: str, expires: int) -> str:
+    """ストレージのキーと有効期限（UNIX時刻）に対する署名を生成"""
+    message = f"{key}:{expires}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+def create_signed_storage_url(path: str, key: str, expires_in: int) -> tuple:
+    """期限付きの署名済みURLと有効期限を返す"""
+    expires = int(time.time()) + expires_in
+    signature = sign_storage_key(key, expires)
+    return f"{path}?expires={expires}&signature={signature}", expires
+
+def verify_storage_signature(key: str, expires: int, signature: str) -> bool:
+    if expires < time.time():
+        return False
+    return hmac.compare_digest(sign_storage_key(key, expires), signature)
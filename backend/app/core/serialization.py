@@ -0,0 +1,51 @@
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # orjsonがない環境では標準のjsonで直列化する
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def type_adapter(type_: Any) -> TypeAdapter:
+    """型ごとのTypeAdapter（スキーマの構築は重いため、一度作ったものを使い回す）"""
+    return TypeAdapter(type_)
+
+
+def dump_json(type_: Any, value: Any) -> bytes:
+    """
+    ORMオブジェクトをtype_として検証し、辞書を経由せずにJSONのバイト列にする。
+    FastAPIのresponse_modelと同じくエイリアスのキーで出力する
+    """
+    adapter = type_adapter(type_)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True), by_alias=True)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    orjsonで直列化するJSONレスポンス。
+    直列化済みのバイト列はそのまま本文にする
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def model_response(response: Response, type_: Any, value: Any) -> FastJSONResponse:
+    """
+    response_modelと同じ型で直列化したレスポンス。
+    FastAPIによる検証・辞書への変換・標準のjsonでの直列化を1回の直列化で置き換える。
+    エンドポイントで設定したヘッダー（X-Next-Cursor等）は引き継ぐ
+    """
+    json_response = FastJSONResponse(dump_json(type_, value))
+    json_response.raw_headers.extend(response.raw_headers)
+    return json_response
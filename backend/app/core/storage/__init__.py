@@ -0,0 +1,34 @@
+from app.core.config import settings
+from app.core.storage.base import (
+    InvalidContentKey,
+    ObjectInfo,
+    ObjectNotFound,
+    PresignedUpload,
+    StorageBackend,
+    StoredObject,
+    UploadVerificationFailed,
+    is_content_key,
+    normalize_suffix,
+)
+from app.core.storage.local import LocalStorage
+from app.core.storage.s3 import S3Storage
+
+
+def create_storage() -> StorageBackend:
+    """設定に応じたストレージバックエンドを作成"""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            public_endpoint_url=settings.S3_PUBLIC_ENDPOINT_URL or None,
+            region_name=settings.S3_REGION,
+            access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            part_size=settings.S3_MULTIPART_PART_SIZE,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+        )
+    return LocalStorage(settings.STORAGE_DIR, legacy_root=settings.LEGACY_RECORDINGS_DIR)
+
+
+storage = create_storage()
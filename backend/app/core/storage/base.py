@@ -0,0 +1,213 @@
+import os
+import re
+import tempfile
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+
+# 1チャンクあたりの読み込みサイズ（1 MiB）
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+_CONTENT_KEY_RE = re.compile(r"^[0-9a-f]{64}(\.[0-9a-z]{1,10})?$")
+_SUFFIX_RE = re.compile(r"^\.[0-9a-z]{1,10}$")
+INCOMING_KEY_PREFIX = "incoming/"
+_INCOMING_KEY_RE = re.compile(r"^incoming/[0-9a-f]{32}$")
+# 内容アドレス化以前のキー（recordings/ 配下のファイル名のみ）
+LEGACY_KEY_PREFIX = "recordings/"
+_LEGACY_SEGMENT_RE = re.compile(r"^[0-9A-Za-z_-][0-9A-Za-z_.-]*$")
+
+
+class InvalidContentKey(Exception):
+    pass
+
+
+class ObjectNotFound(Exception):
+    pass
+
+
+class UploadVerificationFailed(Exception):
+    """直接アップロードされたオブジェクトのサイズまたはチェックサムが一致しない"""
+    pass
+
+
+@dataclass
+class StoredObject:
+    """ストレージへの保存結果"""
+    key: str
+    size: int
+    elapsed: float
+    peak_buffer_size: int
+    deduplicated: bool
+
+    @property
+    def bytes_per_second(self) -> float:
+        if self.elapsed <= 0:
+            return float(self.size)
+        return self.size / self.elapsed
+
+
+@dataclass
+class ObjectInfo:
+    key: str
+    size: int
+    last_modified: datetime
+    etag: str
+
+
+@dataclass
+class PresignedUpload:
+    """ブラウザからストレージへ直接PUTするための署名付きURL"""
+    url: str
+    headers: Dict[str, str]
+
+
+def normalize_suffix(filename: str, default: str = "") -> str:
+    """ファイル名から保存用の拡張子を取り出す（不正なものはdefault）"""
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return suffix if _SUFFIX_RE.match(suffix) else default
+
+
+def is_content_key(key: str) -> bool:
+    return bool(_CONTENT_KEY_RE.match(key))
+
+
+def is_legacy_key(key: str) -> bool:
+    if not key.startswith(LEGACY_KEY_PREFIX):
+        return False
+    segments = key[len(LEGACY_KEY_PREFIX):].split("/")
+    # 「.」で始まる要素（..を含む）や空の要素は認めない
+    return all(_LEGACY_SEGMENT_RE.match(segment) for segment in segments)
+
+
+def validate_key(key: str) -> str:
+    """
+    内容アドレス化されたキー（<sha256><拡張子>）か、
+    それ以前の「recordings/xxx.webm」形式のキーのみを受け付ける
+    """
+    if is_content_key(key) or is_legacy_key(key):
+        return key
+    raise InvalidContentKey(key)
+
+
+def as_utc(value: datetime) -> datetime:
+    """UTCのaware datetimeにする（naiveな値はUTCとみなす）"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def new_incoming_key() -> str:
+    """内容確定前のアップロード先キー"""
+    return f"{INCOMING_KEY_PREFIX}{uuid.uuid4().hex}"
+
+
+def validate_incoming_key(key: str) -> str:
+    if not _INCOMING_KEY_RE.match(key):
+        raise InvalidContentKey(key)
+    return key
+
+
+def shard_path(key: str, *, depth: int = 2, width: int = 2) -> str:
+    """キーの先頭のハッシュ文字で ab/cd/<key> のようにシャーディングする"""
+    if not is_content_key(key):
+        return validate_key(key)
+    shards = [key[i * width:(i + 1) * width] for i in range(depth)]
+    return "/".join(shards + [key])
+
+
+async def iter_upload(upload: UploadFile, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await upload.close()
+
+
+class StorageBackend:
+    """
+    録画・書類のストレージの共通インターフェース。
+    保存はSHA-256による内容アドレス化で行い、同一内容は一つだけ保存される。
+    """
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], *, suffix: str = "") -> StoredObject:
+        raise NotImplementedError
+
+    async def put_upload(self, upload: UploadFile, *, suffix: str = "") -> StoredObject:
+        return await self.put_stream(iter_upload(upload), suffix=suffix)
+
+    async def put_file(self, src: str, *, suffix: str = "") -> StoredObject:
+        """ローカルのファイルを保存する（srcは保存後に削除される）"""
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> ObjectInfo:
+        raise NotImplementedError
+
+    def iter_range(self, key: str, start: int, length: int) -> AsyncIterator[bytes]:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await self.stat(key)
+            return True
+        except ObjectNotFound:
+            return False
+
+    async def fetch_to_local(self, key: str, work_dir: str) -> str:
+        """
+        ffmpeg等で処理するためにローカルのファイルパスを返す。
+        ローカル以外のバックエンドではwork_dirへダウンロードした一時ファイルを返す
+        """
+        raise NotImplementedError
+
+    @property
+    def work_dir(self) -> str:
+        """後処理などの一時ファイルを置くディレクトリ"""
+        return tempfile.gettempdir()
+
+    def local_path(self, key: str) -> Optional[str]:
+        """ローカルファイルとして直接参照できる場合はそのパスを返す"""
+        return None
+
+    async def presigned_get_url(self, key: str, expires_in: int) -> Optional[str]:
+        """ストレージから直接ダウンロードできる署名付きURL（対応しない場合はNone）"""
+        return None
+
+    async def presigned_put_url(
+        self, incoming_key: str, *, size: int, sha256: str, expires_in: int
+    ) -> Optional[PresignedUpload]:
+        """
+        incoming/へ直接アップロードするための署名付きURL。
+        対応しない場合はNoneを返し、APIの署名付きPUTエンドポイント（put_incoming）を使う
+        """
+        return None
+
+    async def put_incoming(self, incoming_key: str, chunks: AsyncIterator[bytes], *, max_size: int) -> int:
+        raise NotImplementedError
+
+    async def promote_incoming(
+        self, incoming_key: str, *, size: int, sha256: str, suffix: str = ""
+    ) -> StoredObject:
+        """
+        直接アップロードされたオブジェクトのサイズとSHA-256を検証し、内容アドレスのキーへ移す。
+        一致しない場合はオブジェクトを破棄してUploadVerificationFailedを送出する
+        """
+        raise NotImplementedError
+
+    async def purge_incoming(self, older_than: datetime, *, dry_run: bool = False) -> Tuple[int, int]:
+        """
+        確定されずに残ったincoming/のオブジェクトのうち、older_than（UTC）より前のものを削除する。
+        削除した（dry_runでは削除対象の）件数とバイト数を返す
+        """
+        return 0, 0
+
+    async def close(self) -> None:
+        pass
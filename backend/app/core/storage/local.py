@@ -0,0 +1,289 @@
+import errno
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.storage.base import (
+    LEGACY_KEY_PREFIX,
+    UPLOAD_CHUNK_SIZE,
+    InvalidContentKey,
+    ObjectInfo,
+    ObjectNotFound,
+    StorageBackend,
+    StoredObject,
+    UploadVerificationFailed,
+    as_utc,
+    is_content_key,
+    shard_path,
+    validate_incoming_key,
+    validate_key,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 256 * 1024
+
+
+class LocalStorage(StorageBackend):
+    """
+    ローカルディスク上の内容アドレス化ストア。
+    ファイルは root/ab/cd/<sha256><拡張子> のようにシャーディングされる。
+    内容アドレス化以前の「recordings/xxx.webm」はlegacy_root配下のファイルとして扱う。
+    """
+
+    def __init__(
+        self, root: str, *, legacy_root: str, shard_depth: int = 2, shard_width: int = 2
+    ):
+        self.root = root
+        self.legacy_root = Path(legacy_root).resolve()
+        self.shard_depth = shard_depth
+        self.shard_width = shard_width
+
+    @property
+    def tmp_dir(self) -> str:
+        return os.path.join(self.root, ".tmp")
+
+    @property
+    def work_dir(self) -> str:
+        # ストアと同じファイルシステムに置き、登録時にリネームで済ませる
+        return self.tmp_dir
+
+    def relative_path(self, key: str) -> str:
+        return shard_path(key, depth=self.shard_depth, width=self.shard_width)
+
+    def _legacy_path(self, key: str) -> str:
+        relative = validate_key(key)[len(LEGACY_KEY_PREFIX):]
+        path = (self.legacy_root / relative).resolve()
+        # シンボリックリンク等で旧ディレクトリの外を指すものは扱わない
+        if not path.is_relative_to(self.legacy_root):
+            raise InvalidContentKey(key)
+        return str(path)
+
+    def path_for(self, key: str) -> str:
+        if not is_content_key(key):
+            # 内容アドレス化以前の「recordings/xxx.webm」形式のキー
+            return self._legacy_path(key)
+        return os.path.join(self.root, self.relative_path(key))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self.path_for(key)
+
+    def _commit(self, tmp_path: str, digest: str, suffix: str) -> tuple:
+        key = f"{digest}{suffix}"
+        path = self.path_for(key)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            return key, True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # 別ファイルシステムからは一度ストア内へコピーしてからリネームする
+            os.makedirs(self.tmp_dir, exist_ok=True)
+            fd, staged_path = tempfile.mkstemp(dir=self.tmp_dir, prefix="move-", suffix=".part")
+            os.close(fd)
+            shutil.copyfile(tmp_path, staged_path)
+            os.replace(staged_path, path)
+            os.unlink(tmp_path)
+        return key, False
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], *, suffix: str = "") -> StoredObject:
+        """
+        チャンクをハッシュしながら一時ファイルへ書き出し、
+        完了後に内容アドレスのパスへアトミックにリネームする。
+        書き込みはスレッドプールで行い、イベントループをブロックしない。
+        """
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, prefix="upload-", suffix=".part")
+        tmp_file = os.fdopen(fd, "wb")
+        digest = hashlib.sha256()
+        size = 0
+        peak_buffer_size = 0
+        started = time.monotonic()
+        try:
+            async for chunk in chunks:
+                peak_buffer_size = max(peak_buffer_size, len(chunk))
+                await run_in_threadpool(_write_chunk, tmp_file, digest, chunk)
+                size += len(chunk)
+            await run_in_threadpool(_flush_and_close, tmp_file)
+            key, deduplicated = await run_in_threadpool(
+                self._commit, tmp_path, digest.hexdigest(), suffix
+            )
+        except BaseException:
+            tmp_file.close()
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        stored = StoredObject(
+            key=key,
+            size=size,
+            elapsed=time.monotonic() - started,
+            peak_buffer_size=peak_buffer_size,
+            deduplicated=deduplicated,
+        )
+        logger.info(
+            "Stored upload %s: %d bytes in %.2fs (%.0f bytes/sec, peak buffer %d bytes%s)",
+            stored.key,
+            stored.size,
+            stored.elapsed,
+            stored.bytes_per_second,
+            stored.peak_buffer_size,
+            ", deduplicated" if deduplicated else "",
+        )
+        return stored
+
+    def _put_file_sync(self, src: str, suffix: str, expected: Optional[tuple] = None) -> StoredObject:
+        started = time.monotonic()
+        digest = hashlib.sha256()
+        size = 0
+        with open(src, "rb") as f:
+            while True:
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+        if expected is not None and expected != (size, digest.hexdigest()):
+            os.unlink(src)
+            raise UploadVerificationFailed(
+                f"expected {expected[0]} bytes sha256={expected[1]}, "
+                f"got {size} bytes sha256={digest.hexdigest()}"
+            )
+        key, deduplicated = self._commit(src, digest.hexdigest(), suffix)
+        return StoredObject(
+            key=key,
+            size=size,
+            elapsed=time.monotonic() - started,
+            peak_buffer_size=UPLOAD_CHUNK_SIZE,
+            deduplicated=deduplicated,
+        )
+
+    async def put_file(self, src: str, *, suffix: str = "") -> StoredObject:
+        return await run_in_threadpool(self._put_file_sync, src, suffix)
+
+    def _incoming_path(self, incoming_key: str) -> str:
+        name = validate_incoming_key(incoming_key).split("/", 1)[1]
+        return os.path.join(self.tmp_dir, f"incoming-{name}.part")
+
+    async def put_incoming(self, incoming_key: str, chunks: AsyncIterator[bytes], *, max_size: int) -> int:
+        path = self._incoming_path(incoming_key)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        # 同じキーへの再送は最初から書き直す
+        f = await run_in_threadpool(open, path, "wb")
+        size = 0
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadVerificationFailed(f"upload exceeds declared size {max_size}")
+                await run_in_threadpool(f.write, chunk)
+            await run_in_threadpool(_flush_and_close, f)
+        except BaseException:
+            f.close()
+            if os.path.exists(path):
+                os.unlink(path)
+            raise
+        return size
+
+    async def promote_incoming(
+        self, incoming_key: str, *, size: int, sha256: str, suffix: str = ""
+    ) -> StoredObject:
+        path = self._incoming_path(incoming_key)
+        if not os.path.exists(path):
+            raise ObjectNotFound(incoming_key)
+        return await run_in_threadpool(self._put_file_sync, path, suffix, (size, sha256))
+
+    def _purge_incoming_sync(self, older_than: datetime, dry_run: bool) -> Tuple[int, int]:
+        cutoff = as_utc(older_than).timestamp()
+        count = size = 0
+        try:
+            entries = list(os.scandir(self.tmp_dir))
+        except FileNotFoundError:
+            return 0, 0
+        for entry in entries:
+            if not (entry.name.startswith("incoming-") and entry.name.endswith(".part")):
+                continue
+            try:
+                st = entry.stat()
+                if st.st_mtime >= cutoff:
+                    continue
+                if not dry_run:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                # 確定処理で移動済み
+                continue
+            count += 1
+            size += st.st_size
+        return count, size
+
+    async def purge_incoming(self, older_than: datetime, *, dry_run: bool = False) -> Tuple[int, int]:
+        return await run_in_threadpool(self._purge_incoming_sync, older_than, dry_run)
+
+    async def stat(self, key: str) -> ObjectInfo:
+        try:
+            st = await run_in_threadpool(os.stat, self.path_for(key))
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+        if is_content_key(key):
+            # 内容アドレス化されたキーはハッシュそのものを強いETagとして使える
+            etag = os.path.splitext(key)[0]
+        else:
+            etag = f"{int(st.st_mtime)}-{st.st_size}"
+        return ObjectInfo(
+            key=key,
+            size=st.st_size,
+            last_modified=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+            etag=etag,
+        )
+
+    async def iter_range(self, key: str, start: int, length: int) -> AsyncIterator[bytes]:
+        try:
+            f = await run_in_threadpool(open, self.path_for(key), "rb")
+        except FileNotFoundError:
+            raise ObjectNotFound(key)
+        try:
+            await run_in_threadpool(f.seek, start)
+            remaining = length
+            while remaining > 0:
+                chunk = await run_in_threadpool(f.read, min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    async def delete(self, key: str) -> bool:
+        try:
+            await run_in_threadpool(os.unlink, self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def fetch_to_local(self, key: str, work_dir: str) -> str:
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            raise ObjectNotFound(key)
+        return path
+
+
+def _write_chunk(file, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    file.write(chunk)
+
+
+def _flush_and_close(file) -> None:
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
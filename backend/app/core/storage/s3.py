@@ -0,0 +1,396 @@
+import asyncio
+import base64
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.storage.base import (
+    INCOMING_KEY_PREFIX,
+    ObjectInfo,
+    ObjectNotFound,
+    PresignedUpload,
+    StorageBackend,
+    StoredObject,
+    UploadVerificationFailed,
+    as_utc,
+    is_content_key,
+    new_incoming_key,
+    shard_path,
+    validate_incoming_key,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_SIZE = 256 * 1024
+# S3のマルチパートアップロードは最終パート以外5 MiB以上が必要
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+class S3Storage(StorageBackend):
+    """
+    S3互換オブジェクトストレージ（MinIO等）上の内容アドレス化ストア。
+    アップロードはincoming/へのマルチパートアップロード（パートは並列送信）で行い、
+    完了後にハッシュから決まるキーへサーバー側でコピーする。
+    """
+
+    def __init__(
+        self,
+        *,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        public_endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+        max_concurrency: int = 4,
+        max_pool_connections: int = 20,
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.public_endpoint_url = public_endpoint_url or endpoint_url
+        self.region_name = region_name
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.max_concurrency = max_concurrency
+        self.max_pool_connections = max_pool_connections
+        # aiobotocoreのクライアントはイベントループごとに作成してコネクションを使い回す
+        self._clients: Dict[tuple, tuple] = {}
+
+    def object_key(self, key: str) -> str:
+        return shard_path(key)
+
+    async def _create_client(self, endpoint_url: Optional[str]):
+        from aiobotocore.config import AioConfig
+        from aiobotocore.session import get_session
+
+        stack = contextlib.AsyncExitStack()
+        client = await stack.enter_async_context(
+            get_session().create_client(
+                "s3",
+                endpoint_url=endpoint_url,
+                region_name=self.region_name,
+                aws_access_key_id=self.access_key_id,
+                aws_secret_access_key=self.secret_access_key,
+                config=AioConfig(
+                    signature_version="s3v4",
+                    max_pool_connections=self.max_pool_connections,
+                ),
+            )
+        )
+        return client, stack
+
+    async def client(self, *, public: bool = False):
+        loop = asyncio.get_running_loop()
+        cache_key = (loop, public)
+        if cache_key not in self._clients:
+            endpoint = self.public_endpoint_url if public else self.endpoint_url
+            self._clients[cache_key] = await self._create_client(endpoint)
+        return self._clients[cache_key][0]
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        for cache_key in [k for k in self._clients if k[0] is loop]:
+            _, stack = self._clients.pop(cache_key)
+            await stack.aclose()
+
+    async def _upload_part(
+        self,
+        client,
+        semaphore: asyncio.Semaphore,
+        incoming_key: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+    ) -> dict:
+        try:
+            response = await client.upload_part(
+                Bucket=self.bucket,
+                Key=incoming_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+            return {"ETag": response["ETag"], "PartNumber": part_number}
+        finally:
+            semaphore.release()
+
+    async def _promote(self, client, incoming_key: str, key: str) -> bool:
+        """incoming/のオブジェクトを内容アドレスのキーへ移す。既に存在すれば重複として破棄する"""
+        final_key = self.object_key(key)
+        deduplicated = True
+        try:
+            await client.head_object(Bucket=self.bucket, Key=final_key)
+        except client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                raise
+            deduplicated = False
+            await client.copy_object(
+                Bucket=self.bucket,
+                Key=final_key,
+                CopySource={"Bucket": self.bucket, "Key": incoming_key},
+            )
+        await client.delete_object(Bucket=self.bucket, Key=incoming_key)
+        return deduplicated
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], *, suffix: str = "") -> StoredObject:
+        client = await self.client()
+        incoming_key = new_incoming_key()
+        digest = hashlib.sha256()
+        size = 0
+        peak_buffer_size = 0
+        started = time.monotonic()
+
+        buffer = bytearray()
+        upload_id: Optional[str] = None
+        tasks: List[asyncio.Task] = []
+        # 送信中のパート数を制限し、メモリ使用量を part_size * max_concurrency に抑える
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def flush_part(body: bytes) -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                response = await client.create_multipart_upload(Bucket=self.bucket, Key=incoming_key)
+                upload_id = response["UploadId"]
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(self._upload_part(
+                client, semaphore, incoming_key, upload_id, len(tasks) + 1, body
+            )))
+
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                size += len(chunk)
+                buffer.extend(chunk)
+                peak_buffer_size = max(peak_buffer_size, len(buffer))
+                while len(buffer) >= self.part_size:
+                    body = bytes(buffer[:self.part_size])
+                    del buffer[:self.part_size]
+                    await flush_part(body)
+
+            if upload_id is None:
+                await client.put_object(Bucket=self.bucket, Key=incoming_key, Body=bytes(buffer))
+            else:
+                if buffer:
+                    await flush_part(bytes(buffer))
+                parts = await asyncio.gather(*tasks)
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=incoming_key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+                upload_id = None
+            buffer = bytearray()
+            key = f"{digest.hexdigest()}{suffix}"
+            deduplicated = await self._promote(client, incoming_key, key)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            if upload_id is not None:
+                await client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=incoming_key, UploadId=upload_id
+                )
+            raise
+
+        stored = StoredObject(
+            key=key,
+            size=size,
+            elapsed=time.monotonic() - started,
+            peak_buffer_size=peak_buffer_size,
+            deduplicated=deduplicated,
+        )
+        logger.info(
+            "Stored upload %s in s3://%s: %d bytes in %.2fs (%.0f bytes/sec, %d parts%s)",
+            stored.key,
+            self.bucket,
+            stored.size,
+            stored.elapsed,
+            stored.bytes_per_second,
+            len(tasks) or 1,
+            ", deduplicated" if deduplicated else "",
+        )
+        return stored
+
+    async def put_file(self, src: str, *, suffix: str = "") -> StoredObject:
+        async def read_file() -> AsyncIterator[bytes]:
+            loop = asyncio.get_running_loop()
+            with open(src, "rb") as f:
+                while True:
+                    chunk = await loop.run_in_executor(None, f.read, self.part_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        stored = await self.put_stream(read_file(), suffix=suffix)
+        os.unlink(src)
+        return stored
+
+    async def stat(self, key: str) -> ObjectInfo:
+        client = await self.client()
+        try:
+            response = await client.head_object(Bucket=self.bucket, Key=self.object_key(key))
+        except client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                raise ObjectNotFound(key)
+            raise
+        etag = os.path.splitext(key)[0] if is_content_key(key) else response["ETag"].strip('"')
+        return ObjectInfo(
+            key=key,
+            size=response["ContentLength"],
+            last_modified=response["LastModified"],
+            etag=etag,
+        )
+
+    async def iter_range(self, key: str, start: int, length: int) -> AsyncIterator[bytes]:
+        client = await self.client()
+        try:
+            response = await client.get_object(
+                Bucket=self.bucket,
+                Key=self.object_key(key),
+                Range=f"bytes={start}-{start + length - 1}",
+            )
+        except client.exceptions.NoSuchKey:
+            raise ObjectNotFound(key)
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await body.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str) -> bool:
+        client = await self.client()
+        await client.delete_object(Bucket=self.bucket, Key=self.object_key(key))
+        return True
+
+    async def fetch_to_local(self, key: str, work_dir: str) -> str:
+        info = await self.stat(key)
+        os.makedirs(work_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=work_dir, prefix="fetch-", suffix=os.path.splitext(key)[1])
+        loop = asyncio.get_running_loop()
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async for chunk in self.iter_range(key, 0, info.size):
+                    await loop.run_in_executor(None, f.write, chunk)
+        except BaseException:
+            os.unlink(path)
+            raise
+        return path
+
+    async def presigned_get_url(self, key: str, expires_in: int) -> Optional[str]:
+        client = await self.client(public=True)
+        return await client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.object_key(key)},
+            ExpiresIn=expires_in,
+        )
+
+    async def presigned_put_url(
+        self, incoming_key: str, *, size: int, sha256: str, expires_in: int
+    ) -> Optional[PresignedUpload]:
+        client = await self.client(public=True)
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = await client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": validate_incoming_key(incoming_key),
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+            },
+            ExpiresIn=expires_in,
+        )
+        # チェックサムヘッダーを付けて送信すると、ストレージ側で内容が検証される
+        return PresignedUpload(url=url, headers={"x-amz-checksum-sha256": checksum})
+
+    async def promote_incoming(
+        self, incoming_key: str, *, size: int, sha256: str, suffix: str = ""
+    ) -> StoredObject:
+        client = await self.client()
+        started = time.monotonic()
+        validate_incoming_key(incoming_key)
+        try:
+            head = await client.head_object(
+                Bucket=self.bucket, Key=incoming_key, ChecksumMode="ENABLED"
+            )
+        except client.exceptions.ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                raise ObjectNotFound(incoming_key)
+            raise
+
+        actual_size = head["ContentLength"]
+        checksum = head.get("ChecksumSHA256")
+        if checksum and "-" not in checksum:
+            actual_sha256 = base64.b64decode(checksum).hex()
+        else:
+            # チェックサムを保持しないストレージでは内容を読み出して検証する
+            digest = hashlib.sha256()
+            response = await client.get_object(Bucket=self.bucket, Key=incoming_key)
+            body = response["Body"]
+            try:
+                while True:
+                    chunk = await body.read(READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+            finally:
+                body.close()
+            actual_sha256 = digest.hexdigest()
+
+        if (actual_size, actual_sha256) != (size, sha256):
+            await client.delete_object(Bucket=self.bucket, Key=incoming_key)
+            raise UploadVerificationFailed(
+                f"expected {size} bytes sha256={sha256}, "
+                f"got {actual_size} bytes sha256={actual_sha256}"
+            )
+
+        key = f"{sha256}{suffix}"
+        deduplicated = await self._promote(client, incoming_key, key)
+        return StoredObject(
+            key=key,
+            size=size,
+            elapsed=time.monotonic() - started,
+            peak_buffer_size=0,
+            deduplicated=deduplicated,
+        )
+
+    async def purge_incoming(self, older_than: datetime, *, dry_run: bool = False) -> Tuple[int, int]:
+        client = await self.client()
+        cutoff = as_utc(older_than)
+        count = size = 0
+
+        paginator = client.get_paginator("list_objects_v2")
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=INCOMING_KEY_PREFIX):
+            stale = [obj for obj in page.get("Contents", []) if obj["LastModified"] < cutoff]
+            if not stale:
+                continue
+            if not dry_run:
+                await client.delete_objects(
+                    Bucket=self.bucket,
+                    Delete={"Objects": [{"Key": obj["Key"]} for obj in stale], "Quiet": True},
+                )
+            count += len(stale)
+            size += sum(obj["Size"] for obj in stale)
+
+        # put_streamの途中でプロセスが落ちると、完了も中止もされないマルチパートアップロードが残る
+        paginator = client.get_paginator("list_multipart_uploads")
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=INCOMING_KEY_PREFIX):
+            for upload in page.get("Uploads", []):
+                if upload["Initiated"] >= cutoff:
+                    continue
+                if not dry_run:
+                    await client.abort_multipart_upload(
+                        Bucket=self.bucket, Key=upload["Key"], UploadId=upload["UploadId"]
+                    )
+                count += 1
+        return count, size
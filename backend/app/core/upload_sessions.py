@@ -0,0 +1,242 @@
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.storage import StoredObject, storage
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSessionNotFound(Exception):
+    pass
+
+
+class UploadOffsetMismatch(Exception):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload offset mismatch: current offset is {offset}")
+        self.offset = offset
+
+
+class UploadSizeExceeded(Exception):
+    pass
+
+
+@dataclass
+class UploadSession:
+    """再開可能アップロードのセッション情報"""
+    session_id: str
+    interview_id: int
+    created_at: float
+    total_size: Optional[int] = None
+    offset: int = 0
+
+    @property
+    def expires_at(self) -> float:
+        return self._last_activity + settings.UPLOAD_SESSION_TTL_SECONDS
+
+    @property
+    def _last_activity(self) -> float:
+        try:
+            return os.path.getmtime(_part_path(self.session_id))
+        except FileNotFoundError:
+            return self.created_at
+
+
+def _sessions_dir() -> str:
+    return settings.UPLOAD_SESSIONS_DIR
+
+
+def _validate_session_id(session_id: str) -> str:
+    # パストラバーサル防止のためUUID形式のみ受け付ける
+    try:
+        return uuid.UUID(hex=session_id).hex
+    except ValueError:
+        raise UploadSessionNotFound(session_id)
+
+
+def _part_path(session_id: str) -> str:
+    return os.path.join(_sessions_dir(), f"{session_id}.part")
+
+
+def _meta_path(session_id: str) -> str:
+    return os.path.join(_sessions_dir(), f"{session_id}.json")
+
+
+def _create_session(interview_id: int, total_size: Optional[int]) -> UploadSession:
+    os.makedirs(_sessions_dir(), exist_ok=True)
+    session = UploadSession(
+        session_id=uuid.uuid4().hex,
+        interview_id=interview_id,
+        created_at=time.time(),
+        total_size=total_size,
+    )
+    with open(_part_path(session.session_id), "xb"):
+        pass
+    meta = asdict(session)
+    del meta["offset"]
+    with open(_meta_path(session.session_id), "w") as f:
+        json.dump(meta, f)
+    return session
+
+
+def _load_session(session_id: str, interview_id: int) -> UploadSession:
+    session_id = _validate_session_id(session_id)
+    try:
+        with open(_meta_path(session_id)) as f:
+            meta = json.load(f)
+        offset = os.path.getsize(_part_path(session_id))
+    except FileNotFoundError:
+        raise UploadSessionNotFound(session_id)
+    if meta["interview_id"] != interview_id:
+        raise UploadSessionNotFound(session_id)
+    return UploadSession(offset=offset, **meta)
+
+
+def _open_part(session_id: str):
+    # 確定済みのセッションのファイルを作り直さないよう、O_CREATなしで開く
+    try:
+        return open(_part_path(session_id), "r+b")
+    except FileNotFoundError:
+        raise UploadSessionNotFound(session_id)
+
+
+def _locked_part_size(session_id: str, part) -> int:
+    """
+    排他ロックを取得し、開いたファイルのサイズを返す。
+    ロック待ちの間に確定されてファイルが移動していれば、セッションは存在しないものとして扱う
+    """
+    fcntl.flock(part.fileno(), fcntl.LOCK_EX)
+    current = os.fstat(part.fileno())
+    try:
+        linked = os.stat(_part_path(session_id))
+    except FileNotFoundError:
+        raise UploadSessionNotFound(session_id)
+    if (linked.st_dev, linked.st_ino) != (current.st_dev, current.st_ino):
+        raise UploadSessionNotFound(session_id)
+    return current.st_size
+
+
+def _remove_session_files(session_id: str) -> None:
+    for path in (_part_path(session_id), _meta_path(session_id)):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+async def create_session(interview_id: int, total_size: Optional[int] = None) -> UploadSession:
+    """新しいアップロードセッションを作成する（期限切れセッションの掃除も兼ねる）"""
+    await run_in_threadpool(purge_expired_sessions)
+    session = await run_in_threadpool(_create_session, interview_id, total_size)
+    logger.info("Created upload session %s for interview %d", session.session_id, interview_id)
+    return session
+
+
+async def get_session(session_id: str, interview_id: int) -> UploadSession:
+    return await run_in_threadpool(_load_session, session_id, interview_id)
+
+
+async def append_chunk(
+    session_id: str,
+    interview_id: int,
+    offset: int,
+    chunks: AsyncIterator[bytes],
+) -> UploadSession:
+    """
+    指定オフセットにチャンクを追記する。
+    既存データは再読み込みせず、ファイル末尾への追記のみを行う。
+    """
+    session = await get_session(session_id, interview_id)
+    part = await run_in_threadpool(_open_part, session.session_id)
+    try:
+        # 同一セッションへの並行PATCH・確定処理を排他する
+        size = await run_in_threadpool(_locked_part_size, session.session_id, part)
+        if size != offset:
+            raise UploadOffsetMismatch(size)
+        await run_in_threadpool(part.seek, offset)
+    except BaseException:
+        part.close()
+        raise
+
+    try:
+        written = offset
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            written += len(chunk)
+            if session.total_size is not None and written > session.total_size:
+                raise UploadSizeExceeded(session.session_id)
+            await run_in_threadpool(part.write, chunk)
+        await run_in_threadpool(part.flush)
+        session.offset = written
+    except BaseException:
+        # 途中で失敗したチャンクは切り捨て、オフセットを元に戻す
+        part.truncate(offset)
+        raise
+    finally:
+        part.close()
+    return session
+
+
+async def finalize_session(
+    session_id: str, interview_id: int, *, suffix: str = ".webm"
+) -> Tuple[UploadSession, StoredObject]:
+    """
+    アップロード済みデータをストレージへ保存し、セッションを破棄する。
+    保存が終わるまでファイルのロックを保持し、並行するPATCHの追記を待たせる
+    """
+    session = await get_session(session_id, interview_id)
+    part = await run_in_threadpool(_open_part, session.session_id)
+    try:
+        # 追記中のPATCHが終わるのを待ってから、確定したサイズで検証する
+        session.offset = await run_in_threadpool(_locked_part_size, session.session_id, part)
+        if session.total_size is not None and session.offset != session.total_size:
+            raise UploadOffsetMismatch(session.offset)
+        stored = await storage.put_file(_part_path(session.session_id), suffix=suffix)
+    finally:
+        part.close()
+    await run_in_threadpool(_remove_session_files, session.session_id)
+    logger.info(
+        "Finalized upload session %s (%d bytes) as %s",
+        session.session_id,
+        session.offset,
+        stored.key,
+    )
+    return session, stored
+
+
+def purge_expired_sessions(max_age: Optional[int] = None) -> int:
+    """最終更新から一定時間が経過した放棄セッションを削除する"""
+    if max_age is None:
+        max_age = settings.UPLOAD_SESSION_TTL_SECONDS
+    directory = _sessions_dir()
+    if not os.path.isdir(directory):
+        return 0
+    threshold = time.time() - max_age
+    purged = 0
+    for name in os.listdir(directory):
+        session_id, ext = os.path.splitext(name)
+        if ext != ".json":
+            continue
+        part_path = _part_path(session_id)
+        try:
+            last_activity = max(
+                os.path.getmtime(_meta_path(session_id)),
+                os.path.getmtime(part_path) if os.path.exists(part_path) else 0,
+            )
+        except FileNotFoundError:
+            continue
+        if last_activity < threshold:
+            _remove_session_files(session_id)
+            purged += 1
+    if purged:
+        logger.info("Purged %d expired upload sessions", purged)
+    return purged
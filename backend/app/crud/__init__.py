@@ -2,4 +2,5 @@ from .crud_user import user
 from .crud_company import company
 from .crud_interview import interview
 from .crud_job_posting import job_posting
-from .crud_base_question import base_question 
\ No newline at end of file
+from .crud_base_question import base_question
+from .crud_job_posting_stats import job_posting_stats
@@ -1,36 +1,207 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+import typing
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Generic, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from pydantic import AliasChoices, BaseModel
+from sqlalchemy import delete, insert, inspect, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import ONETOMANY, Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.core.database import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+class InvalidCursor(Exception):
+    pass
+
+def _field_attribute_names(name: str, field) -> List[str]:
+    names = [name]
+    alias = field.validation_alias
+    if isinstance(alias, str):
+        names.insert(0, alias)
+    elif isinstance(alias, AliasChoices):
+        names[:0] = [choice for choice in alias.choices if isinstance(choice, str)]
+    return names
+
+def _nested_schema(annotation) -> Optional[Type[BaseModel]]:
+    """List[X] / Optional[X] などからネストしたスキーマを取り出す"""
+    candidates = [annotation, *typing.get_args(annotation)]
+    for candidate in candidates:
+        if isinstance(candidate, type) and issubclass(candidate, BaseModel):
+            return candidate
+        for arg in typing.get_args(candidate):
+            if isinstance(arg, type) and issubclass(arg, BaseModel):
+                return arg
+    return None
+
+@lru_cache(maxsize=None)
+def schema_loader_options(model, schema: Type[BaseModel], parent=None) -> Tuple:
+    """
+    レスポンススキーマに含まれるリレーションをselectinloadするローダーオプション。
+    ネストしたスキーマのリレーションも辿るため、一覧のシリアライズでも
+    クエリ数はリレーションの数だけで一定になる
+    """
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in schema.model_fields.items():
+        attribute = next(
+            (n for n in _field_attribute_names(name, field) if n in relationships), None
+        )
+        nested = _nested_schema(field.annotation)
+        if attribute is None or nested is None:
+            continue
+        relationship = getattr(model, attribute)
+        loader = selectinload(relationship) if parent is None else parent.selectinload(relationship)
+        options.append(loader)
+        options.extend(schema_loader_options(relationships[attribute].mapper.class_, nested, loader))
+    return tuple(options)
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
         """
         self.model = model
+        self.column_keys = tuple(attr.key for attr in inspect(model).column_attrs)
 
-    def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    def get(self, db: Session, id: Any, *, options: Sequence = ()) -> Optional[ModelType]:
+        return db.query(self.model).options(*options).filter(self.model.id == id).first()
+
+    def loader_options(self, schema: Type[BaseModel]) -> Tuple:
+        """schemaでシリアライズする際に必要なリレーションのローダーオプション"""
+        return schema_loader_options(self.model, schema)
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        result = await db.execute(select(self.model).where(self.model.id == id))
+        return result.scalars().first()
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        options: Sequence = ()
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        return self.paginate(
+            db.query(self.model), skip=skip, limit=limit, cursor=cursor, options=options
+        )
 
-    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+    def _keyset_columns(self) -> Tuple:
+        # created_atを持たないモデル（User等）はidのみで並べる
+        if hasattr(self.model, "created_at"):
+            return (self.model.created_at, self.model.id)
+        return (self.model.id,)
+
+    def paginate(
+        self,
+        query,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        options: Sequence = ()
+    ) -> List[ModelType]:
+        """
+        新しい順（created_at, id の降順）にページングする。
+        cursor指定時はキーセット方式、未指定時は従来どおりOFFSETを使う
+        """
+        columns = self._keyset_columns()
+        query = query.options(*options).order_by(*[column.desc() for column in columns])
+        if cursor:
+            values = self.decode_cursor(cursor)
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.offset(skip)
+        return query.limit(limit).all()
+
+    def encode_cursor(self, obj: ModelType) -> str:
+        values = []
+        for column in self._keyset_columns():
+            value = getattr(obj, column.key)
+            values.append(value.isoformat() if isinstance(value, datetime) else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> List[Any]:
+        columns = self._keyset_columns()
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(columns):
+                raise ValueError(cursor)
+            return [
+                datetime.fromisoformat(value) if column.key == "created_at" else int(value)
+                for column, value in zip(columns, values)
+            ]
+        except (ValueError, TypeError):
+            raise InvalidCursor(cursor)
+
+    def next_cursor(self, items: List[ModelType], limit: int) -> Optional[str]:
+        """次のページのカーソル（最終ページの場合はNone）"""
+        if not items or len(items) < limit:
+            return None
+        return self.encode_cursor(items[-1])
+
+    def _commit(self, db: Session) -> None:
+        """リクエスト単位のトランザクション中はflushのみ行い、コミットはルートに任せる"""
+        if db.info.get("unit_of_work"):
+            db.flush()
+        else:
+            db.commit()
+
+    async def _commit_async(self, db: AsyncSession) -> None:
+        if db.info.get("unit_of_work"):
+            await db.flush()
+        else:
+            await db.commit()
+
+    def _insert(self, db: Session, values: Dict[str, Any]) -> ModelType:
+        """
+        INSERT ... RETURNING で作成する。
+        セッションはコミット時に失効させないため、コミット後にrefreshで読み直さない
+        """
+        db_obj = self._insert_row(db, values)
+        self._commit(db)
         return db_obj
 
+    def _insert_row(self, db: Session, values: Dict[str, Any]) -> ModelType:
+        return db.scalars(insert(self.model).values(**values).returning(self.model)).one()
+
+    def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
+        return self._insert(db, jsonable_encoder(obj_in))
+
+    def _update_values(self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        return {field: value for field, value in update_data.items() if field in self.column_keys}
+
+    def _update_statement(
+        self, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ):
+        """カラムに対応する項目だけを更新する UPDATE ... RETURNING 文（変更がなければNone）"""
+        values = self._update_values(obj_in)
+        if not values:
+            return None
+        return (
+            update(self.model)
+            .where(self.model.id == db_obj.id)
+            .values(**values)
+            .returning(*[getattr(self.model, key) for key in self.column_keys])
+        )
+
+    def _apply_returned(self, db_obj: ModelType, row) -> None:
+        # onupdateで設定された値も含め、RETURNINGの結果を読み込み済みの値として反映する
+        for key, value in zip(self.column_keys, row):
+            set_committed_value(db_obj, key, value)
+
     def update(
         self,
         db: Session,
@@ -38,21 +209,45 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        statement = self._update_statement(db_obj, obj_in)
+        if statement is not None:
+            # 未反映の変更がRETURNINGの値で上書きされないよう先に書き出す
+            db.flush()
+            self._apply_returned(db_obj, db.execute(statement).one())
+        self._commit(db)
+        return db_obj
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        statement = self._update_statement(db_obj, obj_in)
+        if statement is not None:
+            await db.flush()
+            self._apply_returned(db_obj, (await db.execute(statement)).one())
+        await self._commit_async(db)
         return db_obj
 
-    def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
-        db.delete(obj)
-        db.commit()
-        return obj 
\ No newline at end of file
+    def _nullify_children(self, db: Session, id: int) -> None:
+        """db.delete()と同様に、子テーブルの外部キーをNULLにしてから削除できるようにする"""
+        for relationship in inspect(self.model).relationships:
+            if relationship.direction is not ONETOMANY or relationship.passive_deletes:
+                continue
+            child = relationship.mapper
+            for _, remote in relationship.local_remote_pairs:
+                attribute = getattr(child.class_, child.get_property_by_column(remote).key)
+                db.execute(update(child.class_).where(attribute == id).values({attribute: None}))
+
+    def _delete(self, db: Session, id: int) -> Optional[ModelType]:
+        self._nullify_children(db, id)
+        return db.scalars(
+            delete(self.model).where(self.model.id == id).returning(self.model)
+        ).first()
+
+    def remove(self, db: Session, *, id: int) -> Optional[ModelType]:
+        obj = self._delete(db, id)
+        self._commit(db)
+        return obj
@@ -1,6 +1,8 @@
-from typing import List
+from typing import Any, Dict, List, Optional, Union
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
+from app.crud.crud_job_posting import job_posting as crud_job_posting
 from app.models.models import BaseQuestion
 from app.schemas.base_question import BaseQuestionCreate, BaseQuestionUpdate
 
@@ -16,4 +18,29 @@ class CRUDBaseQuestion(CRUDBase[BaseQuestion, BaseQuestionCreate, BaseQuestionUp
             .all()
         )
 
+    # 求人の質問一覧のキャッシュの版を、質問の変更と同じトランザクションで進める
+    def create(self, db: Session, *, obj_in: BaseQuestionCreate) -> BaseQuestion:
+        db_obj = self._insert_row(db, jsonable_encoder(obj_in))
+        crud_job_posting.bump_questions_version(db, db_obj.job_posting_id)
+        self._commit(db)
+        return db_obj
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: BaseQuestion,
+        obj_in: Union[BaseQuestionUpdate, Dict[str, Any]]
+    ) -> BaseQuestion:
+        if self._update_values(obj_in):
+            crud_job_posting.bump_questions_version(db, db_obj.job_posting_id)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    def remove(self, db: Session, *, id: int) -> Optional[BaseQuestion]:
+        obj = self._delete(db, id)
+        if obj is not None:
+            crud_job_posting.bump_questions_version(db, obj.job_posting_id)
+        self._commit(db)
+        return obj
+
 base_question = CRUDBaseQuestion(BaseQuestion) 
\ No newline at end of file
@@ -1,7 +1,9 @@
 from typing import List, Optional
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
-from app.models.models import Company
+from app.crud.crud_user import user as crud_user
+from app.models.models import Company, User
 from app.schemas.company import CompanyCreate, CompanyUpdate
 
 class CRUDCompany(CRUDBase[Company, CompanyCreate, CompanyUpdate]):
@@ -9,15 +11,25 @@ class CRUDCompany(CRUDBase[Company, CompanyCreate, CompanyUpdate]):
         return db.query(Company).filter(Company.name == name).first()
     
     def get_multi_by_user(
-        self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        user_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[Company]:
-        return (
+        query = (
             db.query(Company)
             .join(Company.users)
             .filter(Company.users.any(id=user_id))
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self.paginate(query, skip=skip, limit=limit, cursor=cursor)
+
+    def remove(self, db: Session, *, id: int) -> Optional[Company]:
+        # 所属ユーザーのcompany_idがNULLになるため、認証済みユーザーのキャッシュも無効化する
+        for user_id in db.scalars(select(User.id).where(User.company_id == id)):
+            crud_user.invalidate_principal(db, user_id)
+        return super().remove(db, id=id)
 
 company = CRUDCompany(Company) 
\ No newline at end of file
@@ -1,74 +1,386 @@
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Sequence, Tuple, Union
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import uuid
-from datetime import datetime
 
+from app.core.cache import TTLCache, invalidate_on_commit
+from app.core.config import settings
 from app.crud.base import CRUDBase
-from app.models.models import Interview, CustomQuestion, InterviewResponse, BaseQuestion
+from app.crud.crud_job_posting import cached_question_set
+from app.crud.crud_job_posting_stats import StatsKey, job_posting_stats, stats_key
+from app.models.models import Interview, CustomQuestion, InterviewResponse, JobPosting
 from app.schemas.interview import (
+    Interview as InterviewSchema,
     InterviewCreate,
     InterviewUpdate,
+    CustomQuestion as CustomQuestionSchema,
     CustomQuestionCreate,
     InterviewResponseCreate,
 )
 
+class ResponseValidationError(Exception):
+    """一括保存する回答に不正な行がある（errorsに行ごとのエラー）"""
+    def __init__(self, errors: List[Dict[str, Any]]):
+        super().__init__(f"{len(errors)} invalid answers")
+        self.errors = errors
+
+# 候補者画面向けの面接URLでの取得結果（面接・質問・回答の書き込みのコミット後に無効化する）
+interview_url_cache = TTLCache(
+    settings.INTERVIEW_URL_CACHE_SIZE, settings.INTERVIEW_URL_CACHE_TTL_SECONDS
+)
+
+# 求人ごとの集計に使う面接の列
+_STATS_FIELDS = ("job_posting_id", "status", "ai_evaluation")
+
 class CRUDInterview(CRUDBase[Interview, InterviewCreate, InterviewUpdate]):
+    def invalidate_cached(
+        self, db: Union[Session, AsyncSession], db_obj: Optional[Interview]
+    ) -> None:
+        """面接URLでの取得結果のキャッシュをコミット後に無効化する"""
+        if db_obj is not None:
+            invalidate_on_commit(db, interview_url_cache, db_obj.interview_url)
+
+    def _invalidate_by_id(self, db: Session, interview_id: int) -> None:
+        # 同じリクエストで読み込み済みの面接はidentity mapから取得する
+        self.invalidate_cached(db, db.get(Interview, interview_id))
+
+    async def _invalidate_by_id_async(self, db: AsyncSession, interview_id: int) -> None:
+        self.invalidate_cached(db, await db.get(Interview, interview_id))
+
+    def _bump_questions_version_statement(self, interview_id: int):
+        return (
+            update(Interview)
+            .where(Interview.id == interview_id)
+            .values(questions_version=Interview.questions_version + 1)
+        )
+
+    def _custom_questions_changed(self, db: Session, interview_id: int) -> None:
+        """カスタム質問の変更と同じトランザクションで版を進め、URLでの取得結果を無効化する"""
+        db.execute(self._bump_questions_version_statement(interview_id))
+        self._invalidate_by_id(db, interview_id)
+
+    async def _custom_questions_changed_async(self, db: AsyncSession, interview_id: int) -> None:
+        await db.execute(self._bump_questions_version_statement(interview_id))
+        await self._invalidate_by_id_async(db, interview_id)
+
+    def get_question_versions(self, db: Session, *, interview_id: int):
+        """
+        質問一覧のキャッシュのキーに使う版（面接がなければNone）。
+        job_posting_id・questions_version（カスタム質問）・base_questions_version（求人のベース質問）
+        """
+        return db.execute(
+            select(
+                Interview.job_posting_id,
+                Interview.questions_version,
+                JobPosting.questions_version.label("base_questions_version"),
+            )
+            .outerjoin(JobPosting, JobPosting.id == Interview.job_posting_id)
+            .where(Interview.id == interview_id)
+        ).first()
+
+    def get_version(self, db: Session, *, interview_id: int):
+        """
+        条件付きGET用に、質問・回答を読まずに面接の版を1クエリで取得する（面接がなければNone）。
+        回答は追加・削除を件数と最大ID、更新を最終更新日時で検出する
+        """
+        return db.execute(
+            select(
+                Interview.updated_at,
+                Interview.questions_version,
+                func.count(InterviewResponse.id).label("response_count"),
+                func.max(InterviewResponse.id).label("last_response_id"),
+                func.max(InterviewResponse.updated_at).label("responses_updated_at"),
+            )
+            .outerjoin(InterviewResponse, InterviewResponse.interview_id == Interview.id)
+            .where(Interview.id == interview_id)
+            .group_by(Interview.id, Interview.updated_at, Interview.questions_version)
+        ).first()
+
+    def get_custom_questions_json(
+        self, db: Session, *, interview_id: int, version: int
+    ) -> bytes:
+        """カスタム質問一覧のJSON（版ごとにキャッシュする）"""
+        return cached_question_set(
+            db,
+            ("custom", interview_id, version),
+            List[CustomQuestionSchema],
+            lambda: self.get_custom_questions(db, interview_id=interview_id),
+        )
+
+    def _stats_key(self, db_obj: Interview) -> Optional[StatsKey]:
+        """求人ごとの集計での面接の状態"""
+        return stats_key(**{field: getattr(db_obj, field) for field in _STATS_FIELDS})
+
+    def _stats_transition(
+        self, values: Dict[str, Any], changes: Optional[Dict[str, Any]]
+    ) -> Tuple[Optional[StatsKey], Optional[StatsKey]]:
+        after = {**values, **{field: value for field, value in (changes or {}).items() if field in values}}
+        return stats_key(**values), stats_key(**after)
+
+    def _changes_stats(self, changes: Optional[Dict[str, Any]]) -> bool:
+        # 集計に関わる項目を変更しない更新では行ロックを取らない
+        return any(field in _STATS_FIELDS for field in changes or ())
+
+    def _locked_stats_statement(self, interview_id: int):
+        return (
+            select(*(getattr(Interview, field) for field in _STATS_FIELDS))
+            .where(Interview.id == interview_id)
+            .with_for_update()
+        )
+
+    def _record_stats(self, db: Session, db_obj: Interview, changes: Optional[Dict[str, Any]]) -> None:
+        """
+        変更前の状態を行ロック（SELECT ... FOR UPDATE）を取って読み直し、集計に差分を反映する。
+        読み込み済みのdb_objの値を使うと、同じ面接の並行した更新が同じ遷移を二重に加算してしまう。
+        ロックはコミットまで保持されるため、後続の更新は反映後の状態から差分を計算する
+        """
+        if not self._changes_stats(changes):
+            return
+        row = db.execute(self._locked_stats_statement(db_obj.id)).first()
+        if row is None:
+            return
+        before, after = self._stats_transition(dict(row._mapping), changes)
+        job_posting_stats.record(db, before=before, after=after)
+
+    async def _record_stats_async(
+        self, db: AsyncSession, db_obj: Interview, changes: Optional[Dict[str, Any]]
+    ) -> None:
+        if not self._changes_stats(changes):
+            return
+        row = (await db.execute(self._locked_stats_statement(db_obj.id))).first()
+        if row is None:
+            return
+        before, after = self._stats_transition(dict(row._mapping), changes)
+        await job_posting_stats.record_async(db, before=before, after=after)
+
     def create(self, db: Session, *, obj_in: InterviewCreate) -> Interview:
         interview_url = str(uuid.uuid4())
-        db_obj = Interview(
+        db_obj = self._insert_row(db, dict(
             **obj_in.dict(),
+            # 求人の企業IDをINSERT時にサブクエリで設定する
+            company_id=select(JobPosting.company_id)
+            .where(JobPosting.id == obj_in.job_posting_id)
+            .scalar_subquery(),
             interview_url=interview_url,
             status="scheduled"
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        ))
+        job_posting_stats.record(db, before=None, after=self._stats_key(db_obj))
+        self._commit(db)
         return db_obj
 
-    def get_by_url(self, db: Session, *, url: str) -> Optional[Interview]:
-        return db.query(Interview).filter(Interview.interview_url == url).first()
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Interview,
+        obj_in: Union[InterviewUpdate, Dict[str, Any]]
+    ) -> Interview:
+        self._record_stats(db, db_obj, self._update_values(obj_in))
+        self.invalidate_cached(db, db_obj)
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Interview,
+        obj_in: Union[InterviewUpdate, Dict[str, Any]]
+    ) -> Interview:
+        await self._record_stats_async(db, db_obj, self._update_values(obj_in))
+        self.invalidate_cached(db, db_obj)
+        return await super().update_async(db, db_obj=db_obj, obj_in=obj_in)
+
+    def remove(self, db: Session, *, id: int) -> Optional[Interview]:
+        obj = self._delete(db, id)
+        if obj is not None:
+            job_posting_stats.record(db, before=self._stats_key(obj), after=None)
+        self.invalidate_cached(db, obj)
+        self._commit(db)
+        return obj
+
+    def get_by_url(
+        self, db: Session, *, url: str, options: Sequence = ()
+    ) -> Optional[Interview]:
+        return db.query(Interview).options(*options).filter(Interview.interview_url == url).first()
+
+    def get_detail_by_url(self, db: Session, *, url: str) -> Optional[InterviewSchema]:
+        """
+        URLから質問・回答を含めて取得する（候補者画面用）。
+        結果はTTL付きでキャッシュし、面接・質問・回答の書き込みで無効化する
+        """
+        cached = interview_url_cache.get(url)
+        if cached is not None:
+            return cached
+        token = interview_url_cache.token(url)
+        db_obj = self.get_by_url(db, url=url, options=self.loader_options(InterviewSchema))
+        if db_obj is None:
+            return None
+        detail = InterviewSchema.model_validate(db_obj)
+        # 未コミットの書き込みがあるセッションで読んだ値は保存しない
+        if not db.info.get("pending_writes"):
+            interview_url_cache.set(url, detail, token=token)
+        return detail
+
+    async def get_detail_async(self, db: AsyncSession, *, id: int) -> Optional[Interview]:
+        """レスポンス用に質問・回答を含めて取得（非同期セッションでは遅延読み込みできないため）"""
+        result = await db.execute(
+            select(Interview)
+            .where(Interview.id == id)
+            .options(*self.loader_options(InterviewSchema))
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
 
     def get_by_company(
-        self, db: Session, *, company_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        company_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        options: Sequence = ()
     ) -> List[Interview]:
-        return (
-            db.query(Interview)
-            .join(Interview.job_posting)
-            .filter(Interview.job_posting.has(company_id=company_id))
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        # 非正規化したcompany_idで (company_id, created_at, id) のインデックスを範囲走査する
+        query = db.query(Interview).filter(Interview.company_id == company_id)
+        return self.paginate(query, skip=skip, limit=limit, cursor=cursor, options=options)
 
     def add_custom_question(
         self, db: Session, *, obj_in: CustomQuestionCreate
     ) -> CustomQuestion:
-        db_obj = CustomQuestion(**obj_in.dict())
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(
+            insert(CustomQuestion).values(**obj_in.dict()).returning(CustomQuestion)
+        ).one()
+        self._custom_questions_changed(db, obj_in.interview_id)
+        self._commit(db)
+        return db_obj
+
+    async def add_custom_question_async(
+        self, db: AsyncSession, *, obj_in: CustomQuestionCreate
+    ) -> CustomQuestion:
+        db_obj = (await db.scalars(
+            insert(CustomQuestion).values(**obj_in.dict()).returning(CustomQuestion)
+        )).one()
+        await self._custom_questions_changed_async(db, obj_in.interview_id)
+        await self._commit_async(db)
         return db_obj
 
+    def _insert_response_statement(self, obj_in: dict):
+        return insert(InterviewResponse).values(
+            interview_id=obj_in["interview_id"],
+            question_id=obj_in["question_id"],
+            question_text=obj_in["question_text"],
+            answer_text=obj_in["answer_text"],
+            question_type=obj_in["question_type"]
+        ).returning(InterviewResponse)
+
     def add_response(
         self, db: Session, *, obj_in: dict
     ) -> InterviewResponse:
         """面接回答を追加"""
         try:
-            db_obj = InterviewResponse(
-                interview_id=obj_in["interview_id"],
-                question_id=obj_in["question_id"],
-                question_text=obj_in["question_text"],
-                answer_text=obj_in["answer_text"],
-                question_type=obj_in["question_type"]
-            )
-            db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
+            db_obj = db.scalars(self._insert_response_statement(obj_in)).one()
+            self._invalidate_by_id(db, db_obj.interview_id)
+            self._commit(db)
             return db_obj
         except Exception as e:
             db.rollback()
             raise Exception(f"Failed to save response: {str(e)}")
 
+    async def add_response_async(
+        self, db: AsyncSession, *, obj_in: dict
+    ) -> InterviewResponse:
+        """面接回答を追加"""
+        try:
+            db_obj = (await db.scalars(self._insert_response_statement(obj_in))).one()
+            await self._invalidate_by_id_async(db, db_obj.interview_id)
+            await self._commit_async(db)
+            return db_obj
+        except Exception as e:
+            await db.rollback()
+            raise Exception(f"Failed to save response: {str(e)}")
+
+    def validate_responses(
+        self, *, interview_id: int, answers: Any
+    ) -> List[Dict[str, Any]]:
+        """保存前に全回答を検証し、不正な行があればまとめてResponseValidationErrorを送出"""
+        if not isinstance(answers, list):
+            raise ResponseValidationError(
+                [{"index": None, "errors": [{"loc": [], "msg": "Answers must be a list of objects"}]}]
+            )
+        rows = []
+        errors = []
+        for i, answer in enumerate(answers):
+            if not isinstance(answer, dict):
+                errors.append({"index": i, "errors": [{"loc": [], "msg": "Answer must be an object"}]})
+                continue
+            try:
+                row = InterviewResponseCreate(**{**answer, "interview_id": interview_id})
+            except ValidationError as e:
+                errors.append({
+                    "index": i,
+                    "errors": [{"loc": list(err["loc"]), "msg": err["msg"]} for err in e.errors()],
+                })
+                continue
+            rows.append(row.dict())
+        if errors:
+            raise ResponseValidationError(errors)
+        return rows
+
+    def add_responses(
+        self,
+        db: Session,
+        *,
+        db_obj: Interview,
+        answers: Any,
+        obj_in: Optional[Dict[str, Any]] = None
+    ) -> List[int]:
+        """
+        回答を一括保存する。全行を検証した上で1つのINSERT文で登録し、
+        obj_inによる面接の更新（ステータス等）と同じトランザクションでコミットする
+        """
+        rows = self.validate_responses(interview_id=db_obj.id, answers=answers)
+        try:
+            self._record_stats(db, db_obj, obj_in)
+            for field, value in (obj_in or {}).items():
+                setattr(db_obj, field, value)
+            ids = []
+            if rows:
+                ids = list(db.scalars(insert(InterviewResponse).returning(InterviewResponse.id), rows))
+            self.invalidate_cached(db, db_obj)
+            self._commit(db)
+        except Exception:
+            db.rollback()
+            raise
+        return ids
+
+    async def add_responses_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Interview,
+        answers: Any,
+        obj_in: Optional[Dict[str, Any]] = None
+    ) -> List[int]:
+        """add_responsesの非同期版"""
+        rows = self.validate_responses(interview_id=db_obj.id, answers=answers)
+        try:
+            await self._record_stats_async(db, db_obj, obj_in)
+            for field, value in (obj_in or {}).items():
+                setattr(db_obj, field, value)
+            ids = []
+            if rows:
+                result = await db.scalars(insert(InterviewResponse).returning(InterviewResponse.id), rows)
+                ids = list(result)
+            self.invalidate_cached(db, db_obj)
+            await self._commit_async(db)
+        except Exception:
+            await db.rollback()
+            raise
+        return ids
+
     def complete_interview(
         self,
         db: Session,
@@ -77,14 +389,19 @@ class CRUDInterview(CRUDBase[Interview, InterviewCreate, InterviewUpdate]):
         recording_url: str,
         ai_evaluation: Dict
     ) -> Interview:
-        db_obj.status = "completed"
-        db_obj.completed_at = datetime.utcnow()
-        db_obj.recording_url = recording_url
-        db_obj.ai_evaluation = ai_evaluation
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.update(db, db_obj=db_obj, obj_in={
+            "status": "completed",
+            "recording_url": recording_url,
+            "ai_evaluation": ai_evaluation,
+        })
+
+    def _document_values(self, resume_url: Optional[str], cv_url: Optional[str]) -> Dict[str, Any]:
+        values = {}
+        if resume_url:
+            values["resume_url"] = resume_url
+        if cv_url:
+            values["cv_url"] = cv_url
+        return values
 
     def upload_documents(
         self,
@@ -94,23 +411,18 @@ class CRUDInterview(CRUDBase[Interview, InterviewCreate, InterviewUpdate]):
         resume_url: Optional[str] = None,
         cv_url: Optional[str] = None
     ) -> Interview:
-        if resume_url:
-            db_obj.resume_url = resume_url
-        if cv_url:
-            db_obj.cv_url = cv_url
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        return self.update(db, db_obj=db_obj, obj_in=self._document_values(resume_url, cv_url))
 
-    def get_base_questions(
-        self, db: Session, *, job_posting_id: int
-    ) -> List[BaseQuestion]:
-        return (
-            db.query(BaseQuestion)
-            .filter(BaseQuestion.job_posting_id == job_posting_id)
-            .order_by(BaseQuestion.order)
-            .all()
+    async def upload_documents_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: Interview,
+        resume_url: Optional[str] = None,
+        cv_url: Optional[str] = None
+    ) -> Interview:
+        return await self.update_async(
+            db, db_obj=db_obj, obj_in=self._document_values(resume_url, cv_url)
         )
 
     def get_custom_questions(
@@ -134,15 +446,17 @@ class CRUDInterview(CRUDBase[Interview, InterviewCreate, InterviewUpdate]):
         )
 
     def get_by_job_posting(
-        self, db: Session, *, job_posting_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        job_posting_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        options: Sequence = ()
     ) -> List[Interview]:
-        return (
-            db.query(Interview)
-            .filter(Interview.job_posting_id == job_posting_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = db.query(Interview).filter(Interview.job_posting_id == job_posting_id)
+        return self.paginate(query, skip=skip, limit=limit, cursor=cursor, options=options)
 
     def get_by_job_posting_and_id(
         self, db: Session, *, job_posting_id: int, interview_id: int
@@ -160,12 +474,16 @@ class CRUDInterview(CRUDBase[Interview, InterviewCreate, InterviewUpdate]):
     def update_custom_question(
         self, db: Session, *, question_id: int, question_text: str
     ) -> Optional[CustomQuestion]:
-        question = self.get_custom_question(db, question_id=question_id)
+        question = db.scalars(
+            update(CustomQuestion)
+            .where(CustomQuestion.id == question_id)
+            .values(question_text=question_text)
+            .returning(CustomQuestion)
+            .execution_options(populate_existing=True)
+        ).first()
         if question:
-            question.question_text = question_text
-            db.add(question)
-            db.commit()
-            db.refresh(question)
+            self._custom_questions_changed(db, question.interview_id)
+            self._commit(db)
         return question
 
     def delete_custom_question(
@@ -174,7 +492,8 @@ class CRUDInterview(CRUDBase[Interview, InterviewCreate, InterviewUpdate]):
         question = self.get_custom_question(db, question_id=question_id)
         if question:
             db.delete(question)
-            db.commit()
+            self._custom_questions_changed(db, question.interview_id)
+            self._commit(db)
             return True
         return False
 
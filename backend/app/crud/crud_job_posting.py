@@ -1,50 +1,142 @@
-from typing import List, Optional
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Union
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.serialization import dump_json
 from app.crud.base import CRUDBase
-from app.models.models import JobPosting, BaseQuestion
-from app.schemas.job_posting import JobPostingCreate, JobPostingUpdate
-from app.schemas.interview import BaseQuestionCreate
+from app.models.models import JobPosting, BaseQuestion, Interview
+from app.schemas.interview import BaseQuestion as BaseQuestionSchema
+from app.schemas.job_posting import BaseQuestionIn, JobPostingCreate, JobPostingUpdate
+
+# 質問一覧のJSON。キーは ("base", 求人ID, 版) / ("custom", 面接ID, 版)
+question_set_cache = TTLCache(
+    settings.QUESTION_SET_CACHE_SIZE, settings.QUESTION_SET_CACHE_TTL_SECONDS
+)
+
+def cached_question_set(db: Session, key: Hashable, type_: Any, load) -> bytes:
+    """質問一覧をJSONにしてキャッシュする（キーに版を含めるため書き込み時の無効化は不要）"""
+    cached = question_set_cache.get(key)
+    if cached is not None:
+        return cached
+    content = dump_json(type_, load())
+    # 未コミットの書き込みがあるセッションで読んだ値は保存しない
+    if not db.info.get("pending_writes"):
+        question_set_cache.set(key, content)
+    return content
 
 class CRUDJobPosting(CRUDBase[JobPosting, JobPostingCreate, JobPostingUpdate]):
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: JobPosting,
+        obj_in: Union[JobPostingUpdate, Dict[str, Any]]
+    ) -> JobPosting:
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        company_id = update_data.get("company_id")
+        if company_id is not None and company_id != db_obj.company_id:
+            # 面接に非正規化した企業IDも同じトランザクションで付け替える
+            db.execute(
+                update(Interview)
+                .where(Interview.job_posting_id == db_obj.id)
+                .values(company_id=company_id)
+                .execution_options(synchronize_session="fetch")
+            )
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+
     def get_by_company(
-        self, db: Session, *, company_id: int, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        company_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        options: Sequence = ()
     ) -> List[JobPosting]:
-        return (
-            db.query(JobPosting)
-            .filter(JobPosting.company_id == company_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        query = db.query(JobPosting).filter(JobPosting.company_id == company_id)
+        return self.paginate(query, skip=skip, limit=limit, cursor=cursor, options=options)
 
     def get_active(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        options: Sequence = ()
     ) -> List[JobPosting]:
-        return (
-            db.query(JobPosting)
-            .filter(JobPosting.is_active == True)
-            .offset(skip)
-            .limit(limit)
-            .all()
+        query = db.query(JobPosting).filter(JobPosting.is_active == True)
+        return self.paginate(query, skip=skip, limit=limit, cursor=cursor, options=options)
+
+    def _insert_base_questions(
+        self, db: Session, job_posting_id: int, questions: List[BaseQuestionIn]
+    ) -> List[BaseQuestion]:
+        """複数行を1回の INSERT ... RETURNING で追加する"""
+        if not questions:
+            return []
+        return list(db.scalars(
+            insert(BaseQuestion).returning(BaseQuestion),
+            [
+                {
+                    "job_posting_id": job_posting_id,
+                    "question_text": question.question_text,
+                    "order": question.order,
+                }
+                for question in questions
+            ],
+        ))
+
+    def bump_questions_version(self, db: Session, job_posting_id: Optional[int]) -> None:
+        """ベース質問の変更と同じトランザクションで版を進める"""
+        if job_posting_id is None:
+            return
+        db.execute(
+            update(JobPosting)
+            .where(JobPosting.id == job_posting_id)
+            .values(questions_version=JobPosting.questions_version + 1)
+        )
+
+    def get_version(self, db: Session, *, job_posting_id: int):
+        """
+        条件付きGET用に、本文を読まずに求人の版を取得する（求人がなければNone）。
+        ベース質問の変更でもquestions_versionとupdated_atが進む
+        """
+        return db.execute(
+            select(
+                JobPosting.company_id,
+                JobPosting.created_at,
+                JobPosting.updated_at,
+                JobPosting.questions_version,
+            ).where(JobPosting.id == job_posting_id)
+        ).first()
+
+    def get_questions_version(self, db: Session, *, job_posting_id: int) -> Optional[int]:
+        """ベース質問の版（求人がなければNone）"""
+        return db.scalar(
+            select(JobPosting.questions_version).where(JobPosting.id == job_posting_id)
+        )
+
+    def get_base_questions_json(
+        self, db: Session, *, job_posting_id: int, version: int
+    ) -> bytes:
+        """ベース質問一覧のJSON（版ごとにキャッシュする）"""
+        return cached_question_set(
+            db,
+            ("base", job_posting_id, version),
+            List[BaseQuestionSchema],
+            lambda: self.get_base_questions(db, job_posting_id=job_posting_id),
         )
 
     def create_base_questions(
-        self, db: Session, *, job_posting_id: int, questions: List[BaseQuestionCreate]
+        self, db: Session, *, job_posting_id: int, questions: List[BaseQuestionIn]
     ) -> List[BaseQuestion]:
-        db_questions = []
-        for question in questions:
-            db_obj = BaseQuestion(
-                job_posting_id=job_posting_id,
-                question_text=question.question_text,
-                order=question.order,
-            )
-            db.add(db_obj)
-            db_questions.append(db_obj)
-        
-        db.commit()
-        for question in db_questions:
-            db.refresh(question)
-        
+        db_questions = self._insert_base_questions(db, job_posting_id, questions)
+        if db_questions:
+            self.bump_questions_version(db, job_posting_id)
+        self._commit(db)
         return db_questions
 
     def get_base_questions(
@@ -62,16 +154,59 @@ class CRUDJobPosting(CRUDBase[JobPosting, JobPostingCreate, JobPostingUpdate]):
         db: Session,
         *,
         job_posting_id: int,
-        questions: List[BaseQuestionCreate]
+        questions: List[BaseQuestionIn]
     ) -> List[BaseQuestion]:
-        # 既存の質問を削除
-        db.query(BaseQuestion).filter(
-            BaseQuestion.job_posting_id == job_posting_id
-        ).delete()
-        
-        # 新しい質問を作成
-        return self.create_base_questions(
-            db, job_posting_id=job_posting_id, questions=questions
-        )
+        """
+        既存の質問との差分だけを反映する（追加・変更・削除をそれぞれ1回の文で実行）。
+        idが一致する質問、idがなければ同じorderの質問を既存の質問とみなし、
+        変更のない質問は書き換えずidもそのまま残す
+        """
+        existing = {
+            question.id: question
+            for question in self.get_base_questions(db, job_posting_id=job_posting_id)
+        }
+        by_order = {}
+        for question in existing.values():
+            by_order.setdefault(question.order, question)
+
+        matched = {}
+        unmatched = []
+        for question in questions:
+            if question.id in existing and question.id not in matched:
+                matched[question.id] = question
+            else:
+                unmatched.append(question)
+        to_insert = []
+        for question in unmatched:
+            current = by_order.get(question.order)
+            if current is not None and current.id not in matched:
+                matched[current.id] = question
+            else:
+                to_insert.append(question)
+
+        changes = [
+            {"id": id, "question_text": question.question_text, "order": question.order}
+            for id, question in matched.items()
+            if (existing[id].question_text, existing[id].order)
+            != (question.question_text, question.order)
+        ]
+        removed = [id for id in existing if id not in matched]
+
+        if changes:
+            # 主キーによる一括UPDATE（executemany）
+            db.execute(update(BaseQuestion), changes)
+            for change in changes:
+                question = existing[change["id"]]
+                set_committed_value(question, "question_text", change["question_text"])
+                set_committed_value(question, "order", change["order"])
+        if removed:
+            db.execute(delete(BaseQuestion).where(BaseQuestion.id.in_(removed)))
+        inserted = self._insert_base_questions(db, job_posting_id, to_insert)
+        if changes or removed or inserted:
+            self.bump_questions_version(db, job_posting_id)
+        self._commit(db)
+
+        result = [existing[id] for id in matched] + inserted
+        return sorted(result, key=lambda question: (question.order, question.id))
 
 job_posting = CRUDJobPosting(JobPosting) 
\ No newline at end of file
@@ -0,0 +1,160 @@
+from datetime import datetime
+from numbers import Real
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import Interview, JobPostingStats
+
+# 集計の単位となる面接の状態（求人ID, ステータス, AIスコア）
+StatsKey = Tuple[int, str, Optional[float]]
+
+UNKNOWN_STATUS = "unknown"
+COMPLETED_STATUS = "completed"
+
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def ai_score(ai_evaluation: Optional[Dict[str, Any]]) -> Optional[float]:
+    """AI評価のscore（数値の場合のみ）"""
+    if not isinstance(ai_evaluation, dict):
+        return None
+    score = ai_evaluation.get("score")
+    if isinstance(score, bool) or not isinstance(score, Real):
+        return None
+    return float(score)
+
+
+def stats_key(
+    job_posting_id: Optional[int], status: Optional[str], ai_evaluation: Optional[Dict[str, Any]]
+) -> Optional[StatsKey]:
+    if job_posting_id is None:
+        return None
+    return (job_posting_id, status or UNKNOWN_STATUS, ai_score(ai_evaluation))
+
+
+def _empty_row(job_posting_id: int, status: str) -> Dict[str, Any]:
+    return {
+        "job_posting_id": job_posting_id,
+        "status": status,
+        "interview_count": 0,
+        "scored_count": 0,
+        "score_total": 0.0,
+        "last_activity_at": None,
+    }
+
+
+class CRUDJobPostingStats:
+    """
+    求人ごとの面接の集計。面接の作成・更新時に変更前後の状態の差分だけを
+    UPSERTで加算し、一覧を読まずに件数・平均スコアを返せるようにする
+    """
+
+    def _deltas(self, before: Optional[StatsKey], after: Optional[StatsKey]) -> List[Dict[str, Any]]:
+        rows: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        now = datetime.utcnow()
+        for key, sign in ((before, -1), (after, 1)):
+            if key is None:
+                continue
+            job_posting_id, status, score = key
+            row = rows.setdefault((job_posting_id, status), _empty_row(job_posting_id, status))
+            row["interview_count"] += sign
+            if score is not None:
+                row["scored_count"] += sign
+                row["score_total"] += sign * score
+            if sign > 0:
+                row["last_activity_at"] = now
+        # 同時に更新する行のロック順を揃えてデッドロックを避ける
+        return [rows[key] for key in sorted(rows)]
+
+    def _upsert_statement(self, db, rows: List[Dict[str, Any]]):
+        dialect = db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            raise NotImplementedError(f"job_posting_stats does not support {dialect}")
+        statement = _UPSERT_INSERTS[dialect](JobPostingStats).values(rows)
+        excluded = statement.excluded
+        return statement.on_conflict_do_update(
+            index_elements=[JobPostingStats.job_posting_id, JobPostingStats.status],
+            set_={
+                "interview_count": JobPostingStats.interview_count + excluded.interview_count,
+                "scored_count": JobPostingStats.scored_count + excluded.scored_count,
+                "score_total": JobPostingStats.score_total + excluded.score_total,
+                "last_activity_at": func.coalesce(
+                    excluded.last_activity_at, JobPostingStats.last_activity_at
+                ),
+            },
+        )
+
+    def record(
+        self, db: Session, *, before: Optional[StatsKey], after: Optional[StatsKey]
+    ) -> None:
+        """
+        面接の状態の変化を集計に反映する（作成はbefore=None、削除はafter=None）。
+        コミットは呼び出し側の書き込みと同じトランザクションで行う
+        """
+        if before == after:
+            return
+        db.execute(self._upsert_statement(db, self._deltas(before, after)))
+
+    async def record_async(
+        self, db: AsyncSession, *, before: Optional[StatsKey], after: Optional[StatsKey]
+    ) -> None:
+        if before == after:
+            return
+        await db.execute(self._upsert_statement(db, self._deltas(before, after)))
+
+    def get(self, db: Session, *, job_posting_id: int) -> Dict[str, Any]:
+        rows = db.query(JobPostingStats).filter(JobPostingStats.job_posting_id == job_posting_id).all()
+        by_status = {row.status: row.interview_count for row in rows if row.interview_count}
+        scored_count = sum(row.scored_count for row in rows)
+        score_total = sum(row.score_total for row in rows)
+        activity = [row.last_activity_at for row in rows if row.last_activity_at]
+        return {
+            "job_posting_id": job_posting_id,
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "completed": by_status.get(COMPLETED_STATUS, 0),
+            "average_ai_score": score_total / scored_count if scored_count else None,
+            "last_activity_at": max(activity) if activity else None,
+        }
+
+    def rebuild(
+        self, db: Session, *, job_posting_id: Optional[int] = None, batch_size: int = 1000
+    ) -> int:
+        """
+        面接テーブルから集計し直す（導入時のバックフィル・ずれの修正用）。
+        実行中に書き込まれた面接は反映されない場合があるため、書き込みの少ない時間帯に実行する
+        """
+        query = select(
+            Interview.job_posting_id,
+            Interview.status,
+            Interview.ai_evaluation,
+            func.coalesce(Interview.updated_at, Interview.created_at),
+        ).where(Interview.job_posting_id.isnot(None))
+        clear = delete(JobPostingStats)
+        if job_posting_id is not None:
+            query = query.where(Interview.job_posting_id == job_posting_id)
+            clear = clear.where(JobPostingStats.job_posting_id == job_posting_id)
+
+        totals: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for row in db.execute(query.execution_options(yield_per=batch_size)):
+            posting_id, status, score = stats_key(row[0], row[1], row[2])
+            total = totals.setdefault((posting_id, status), _empty_row(posting_id, status))
+            total["interview_count"] += 1
+            if score is not None:
+                total["scored_count"] += 1
+                total["score_total"] += score
+            if row[3] and (total["last_activity_at"] is None or row[3] > total["last_activity_at"]):
+                total["last_activity_at"] = row[3]
+
+        db.execute(clear)
+        if totals:
+            db.execute(insert(JobPostingStats), list(totals.values()))
+        db.commit()
+        return len(totals)
+
+
+job_posting_stats = CRUDJobPostingStats()
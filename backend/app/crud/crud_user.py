@@ -1,16 +1,48 @@
 from typing import Any, Dict, Optional, Union
 from sqlalchemy.orm import Session
+from app.core.cache import RedisCache, TTLCache, invalidate_on_commit
+from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.crud.base import CRUDBase
 from app.models.models import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import Principal, UserCreate, UserUpdate
+
+def _principal_cache() -> Union[TTLCache, RedisCache]:
+    if settings.PRINCIPAL_CACHE_REDIS_URL:
+        return RedisCache(
+            settings.PRINCIPAL_CACHE_REDIS_URL,
+            prefix="principal:",
+            ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+    return TTLCache(settings.PRINCIPAL_CACHE_SIZE, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+# 認証済みユーザーのスナップショット（ユーザーの更新・削除のコミット後に無効化する）
+principal_cache = _principal_cache()
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def get_principal(self, db: Session, *, id: int) -> Optional[Principal]:
+        """認証済みユーザーのスナップショット（TTL付きでキャッシュする）"""
+        cached = principal_cache.get(id)
+        if cached is not None:
+            return Principal.model_validate_json(cached)
+        token = principal_cache.token(id)
+        user = self.get(db, id=id)
+        if user is None:
+            return None
+        principal = Principal.model_validate(user)
+        # 未コミットの書き込みがあるセッションで読んだ値は保存しない
+        if not db.info.get("pending_writes"):
+            principal_cache.set(id, principal.model_dump_json(), token=token)
+        return principal
+
+    def invalidate_principal(self, db: Session, user_id: int) -> None:
+        invalidate_on_commit(db, principal_cache, user_id)
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
-        db_obj = User(
+        return self._insert(db, dict(
             email=obj_in.email,
             hashed_password=get_password_hash(obj_in.password),
             full_name=obj_in.full_name,
@@ -18,11 +50,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             is_superuser=obj_in.is_superuser,
             is_companyuser=obj_in.is_companyuser,
             company_id=obj_in.company_id,
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
+        ))
 
     def update(
         self, db: Session, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
@@ -35,8 +63,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
+        # 無効化・権限の変更を次のリクエストから反映する
+        self.invalidate_principal(db, db_obj.id)
         return super().update(db, db_obj=db_obj, obj_in=update_data)
 
+    def remove(self, db: Session, *, id: int) -> Optional[User]:
+        self.invalidate_principal(db, id)
+        return super().remove(db, id=id)
+
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         print(f"Authenticating user with email: {email}")
         user = self.get_by_email(db, email=email)
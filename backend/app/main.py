@@ -1,8 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.database import async_engine, engine
+from app.core.db_pool import pool_metrics
+from app.core.recording_jobs import recording_jobs
+from app.core.serialization import FastJSONResponse
+from app.core.storage import LocalStorage, storage
+from app.core.upload_sessions import purge_expired_sessions
+from app.crud.base import InvalidCursor
 import os
 import logging
 
@@ -11,7 +18,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    # response_modelで変換済みの値をorjsonで直列化する
+    default_response_class=FastJSONResponse,
 )
 
 # CORSミドルウェアの設定
@@ -21,17 +30,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Range", "Accept-Ranges", "Content-Length", "Content-Type"],
+    expose_headers=["Content-Range", "Accept-Ranges", "Content-Length", "Content-Type", "X-Next-Cursor"],
 )
 
 # APIルーターをマウント
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
-# 静的ファイルのマウント
-RECORDINGS_DIR = "/app/recordings"
-if not os.path.exists(RECORDINGS_DIR):
-    os.makedirs(RECORDINGS_DIR, mode=0o755, exist_ok=True)
-    logger.info(f"Created recordings directory: {RECORDINGS_DIR}")
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": "カーソルが不正です"})
 
-app.mount("/recordings", StaticFiles(directory=RECORDINGS_DIR), name="recordings")
-  
\ No newline at end of file
+# 録画・書類の保存先（配信は署名付きURLの /api/v1/recordings から行う）
+if isinstance(storage, LocalStorage):
+    RECORDINGS_DIR = storage.root
+    if not os.path.exists(RECORDINGS_DIR):
+        os.makedirs(RECORDINGS_DIR, mode=0o755, exist_ok=True)
+        logger.info(f"Created recordings directory: {RECORDINGS_DIR}")
+
+@app.on_event("startup")
+def cleanup_upload_sessions():
+    # 放棄された再開可能アップロードのセッションを削除
+    purge_expired_sessions()
+
+@app.on_event("shutdown")
+def shutdown_recording_jobs():
+    recording_jobs.shutdown()
+
+@app.on_event("shutdown")
+async def close_storage():
+    await storage.close()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    logger.info(
+        "Database pool metrics: sync=%s async=%s",
+        pool_metrics(engine),
+        pool_metrics(async_engine.sync_engine),
+    )
+    await async_engine.dispose()
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, ForeignKey, Index, Integer, String, DateTime, Text, JSON, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from ..core.database import Base
@@ -13,16 +13,22 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     is_companyuser = Column(Boolean, default=False)
-    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=True, index=True)
     
     company = relationship("Company", back_populates="users")
 
 class Company(Base):
     __tablename__ = "companies"
+    __table_args__ = (
+        Index("ix_companies_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(Text, nullable=True)
+    # 録画の保持ポリシー（日数）。Noneの場合は設定の既定値、0の場合は無効
+    recording_cold_after_days = Column(Integer, nullable=True)
+    recording_retention_days = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     users = relationship("User", back_populates="company")
@@ -30,13 +36,20 @@ class Company(Base):
 
 class JobPosting(Base):
     __tablename__ = "job_postings"
+    __table_args__ = (
+        Index("ix_job_postings_created_at_id", "created_at", "id"),
+        Index("ix_job_postings_company_id_created_at_id", "company_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(Text)
     requirements = Column(Text)
-    company_id = Column(Integer, ForeignKey("companies.id"))
+    company_id = Column(Integer, ForeignKey("companies.id"), index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # ベース質問を変更するたびに加算する（質問一覧のキャッシュのキー）
+    questions_version = Column(Integer, nullable=False, default=0, server_default="0")
     
     company = relationship("Company", back_populates="job_postings")
     interviews = relationship("Interview", back_populates="job_posting")
@@ -44,6 +57,9 @@ class JobPosting(Base):
 
 class BaseQuestion(Base):
     __tablename__ = "base_questions"
+    __table_args__ = (
+        Index("ix_base_questions_job_posting_id_order", "job_posting_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     job_posting_id = Column(Integer, ForeignKey("job_postings.id"))
@@ -54,19 +70,33 @@ class BaseQuestion(Base):
 
 class Interview(Base):
     __tablename__ = "interviews"
+    __table_args__ = (
+        Index("ix_interviews_created_at_id", "created_at", "id"),
+        Index("ix_interviews_job_posting_id_created_at_id", "job_posting_id", "created_at", "id"),
+        Index("ix_interviews_company_id_created_at_id", "company_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    job_posting_id = Column(Integer, ForeignKey("job_postings.id"))
+    job_posting_id = Column(Integer, ForeignKey("job_postings.id"), index=True)
+    # 求人の企業IDの非正規化（企業単位の一覧で求人を結合しないため）
+    company_id = Column(Integer, ForeignKey("companies.id", ondelete="SET NULL"), nullable=True)
     candidate_name = Column(String)
     candidate_email = Column(String)
     interview_url = Column(String, unique=True)
-    status = Column(String)  # pending, in_progress, completed
+    status = Column(String, index=True)  # pending, in_progress, completed
     avatar_type = Column(String)  # male: hayato, female: erika
     recording_url = Column(String, nullable=True)
+    recording_status = Column(String, nullable=True)  # pending, processing, ready, failed
+    recording_duration = Column(Float, nullable=True)
+    recording_size = Column(BigInteger, nullable=True)
+    audio_url = Column(String, nullable=True)
+    recording_tier = Column(String, nullable=True)  # hot, cold, purged
     resume_url = Column(String, nullable=True)
     cv_url = Column(String, nullable=True)
     ai_evaluation = Column(JSON, nullable=True)
     questions_generated = Column(Boolean, default=False)
+    # カスタム質問を変更するたびに加算する（質問一覧のキャッシュのキー）
+    questions_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -76,6 +106,9 @@ class Interview(Base):
 
 class CustomQuestion(Base):
     __tablename__ = "custom_questions"
+    __table_args__ = (
+        Index("ix_custom_questions_interview_id_order", "interview_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     interview_id = Column(Integer, ForeignKey("interviews.id"))
@@ -86,6 +119,9 @@ class CustomQuestion(Base):
 
 class InterviewResponse(Base):
     __tablename__ = "interview_responses"
+    __table_args__ = (
+        Index("ix_interview_responses_interview_id_created_at", "interview_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     interview_id = Column(Integer, ForeignKey("interviews.id"))
@@ -96,4 +132,31 @@ class InterviewResponse(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    interview = relationship("Interview", back_populates="interview_responses") 
\ No newline at end of file
+    interview = relationship("Interview", back_populates="interview_responses") 
+
+class RecordingLifecycleRun(Base):
+    __tablename__ = "recording_lifecycle_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    compressed = Column(Integer, default=0)
+    purged = Column(Integer, default=0)
+    failed = Column(Integer, default=0)
+    bytes_before = Column(BigInteger, default=0)
+    bytes_after = Column(BigInteger, default=0)
+    reclaimed_bytes = Column(BigInteger, default=0)
+
+class JobPostingStats(Base):
+    """求人ごと・ステータスごとの面接の集計（面接の書き込み時に差分で更新する）"""
+    __tablename__ = "job_posting_stats"
+
+    job_posting_id = Column(
+        Integer, ForeignKey("job_postings.id", ondelete="CASCADE"), primary_key=True
+    )
+    status = Column(String, primary_key=True)
+    interview_count = Column(Integer, nullable=False, default=0)
+    # AIスコアが付いた面接の件数と合計（平均はscore_total / scored_count）
+    scored_count = Column(Integer, nullable=False, default=0)
+    score_total = Column(Float, nullable=False, default=0)
+    last_activity_at = Column(DateTime, nullable=True)
@@ -5,6 +5,8 @@ from datetime import datetime
 class CompanyBase(BaseModel):
     name: str
     description: Optional[str] = None
+    recording_cold_after_days: Optional[int] = None
+    recording_retention_days: Optional[int] = None
 
 class CompanyCreate(CompanyBase):
     pass
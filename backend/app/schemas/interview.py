@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Dict
+from pydantic import AliasChoices, BaseModel, EmailStr, Field
+from typing import Literal, Optional, List, Dict
 from datetime import datetime
 
 class QuestionBase(BaseModel):
@@ -65,9 +65,7 @@ class InterviewUpdate(BaseModel):
     candidate_email: Optional[str] = None
     avatar_type: Optional[str] = None
     status: Optional[str] = None
-    recording_url: Optional[str] = None
-    resume_url: Optional[str] = None
-    cv_url: Optional[str] = None
+    # 録画・書類のキーはアップロード処理でのみ設定する（任意のパスを参照させないため）
     ai_evaluation: Optional[Dict] = None
 
 class InterviewStatusUpdate(BaseModel):
@@ -78,6 +76,11 @@ class InterviewInDBBase(InterviewBase):
     interview_url: str
     status: str
     recording_url: Optional[str] = None
+    recording_status: Optional[str] = None
+    recording_duration: Optional[float] = None
+    recording_size: Optional[int] = None
+    audio_url: Optional[str] = None
+    recording_tier: Optional[str] = None
     resume_url: Optional[str] = None
     cv_url: Optional[str] = None
     ai_evaluation: Optional[Dict] = None
@@ -89,7 +92,59 @@ class InterviewInDBBase(InterviewBase):
 
 class Interview(InterviewInDBBase):
     custom_questions: List[CustomQuestion] = []
-    responses: List[InterviewResponse] = []
+    responses: List[InterviewResponse] = Field(
+        default=[], validation_alias=AliasChoices("interview_responses", "responses")
+    )
+
+class InterviewSummary(InterviewBase):
+    """一覧用（質問・回答や評価を含まない）"""
+    id: int
+    interview_url: str
+    status: str
+    recording_status: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 class InterviewInDB(InterviewInDBBase):
-    pass 
\ No newline at end of file
+    pass 
+class RecordingUploadSessionCreate(BaseModel):
+    total_size: Optional[int] = None
+
+class RecordingUploadSession(BaseModel):
+    session_id: str
+    interview_id: int
+    offset: int
+    total_size: Optional[int] = None
+    expires_at: datetime
+
+class DirectUploadCreate(BaseModel):
+    target: Literal["recording", "resume", "cv"]
+    size: int
+    sha256: str
+    filename: Optional[str] = None
+
+class DirectUpload(BaseModel):
+    upload_token: str
+    upload_url: str
+    method: str = "PUT"
+    headers: Dict[str, str] = {}
+    expires_at: datetime
+
+class DirectUploadFinalize(BaseModel):
+    upload_token: str
+
+class RecordingJob(BaseModel):
+    job_id: str
+    interview_id: int
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+class RecordingURL(BaseModel):
+    url: str
+    expires_at: datetime
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from .interview import BaseQuestion
 
@@ -21,6 +21,7 @@ class JobPostingUpdate(JobPostingBase):
 class JobPostingInDBBase(JobPostingBase):
     id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -37,4 +38,19 @@ class JobPostingInDB(JobPostingInDBBase):
 # ベース質問用のスキーマ
 class BaseQuestionCreate(BaseModel):
     job_posting_id: int
-    questions: List[BaseQuestion] 
\ No newline at end of file
+    questions: List[BaseQuestion]
+
+class BaseQuestionIn(BaseModel):
+    """求人のベース質問の作成・一括更新の1件（idがあれば既存の質問の更新）"""
+    id: Optional[int] = None
+    question_text: str
+    order: int
+
+class JobPostingStats(BaseModel):
+    """求人ごとの面接の集計"""
+    job_posting_id: int
+    total: int
+    by_status: Dict[str, int]
+    completed: int
+    average_ai_score: Optional[float] = None
+    last_activity_at: Optional[datetime] = None
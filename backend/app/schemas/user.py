@@ -29,6 +29,19 @@ class User(UserInDBBase):
 class UserInDB(UserInDBBase):
     hashed_password: str
 
+class Principal(BaseModel):
+    """認証済みユーザーのスナップショット（認可の判定用。キャッシュに保存する）"""
+    id: int
+    email: str
+    full_name: Optional[str] = None
+    is_active: Optional[bool] = True
+    is_superuser: bool = False
+    is_companyuser: bool = False
+    company_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,116 @@
+"""
+CRUDの書き込みのベンチマーク
+
+従来の書き込み（add・commitの後にrefresh、取得してからdelete）と、
+CRUDBaseの INSERT/UPDATE/DELETE ... RETURNING とで、1件あたりのクエリ数と所要時間を比較する。
+求人を作成・更新・削除するため、検証用のデータベースに対して実行すること。
+
+    DATABASE_URL=postgresql://... python -m app.scripts.benchmark_crud_writes --iterations 500
+"""
+import argparse
+import time
+from typing import Callable, Dict
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, count_queries
+from app.crud import crud_job_posting
+from app.models.models import Company, JobPosting
+from app.schemas.job_posting import JobPostingCreate, JobPostingUpdate
+
+
+def _legacy_create(db: Session, obj_in: JobPostingCreate) -> JobPosting:
+    db_obj = JobPosting(**jsonable_encoder(obj_in))
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def _legacy_update(db: Session, db_obj: JobPosting, obj_in: JobPostingUpdate) -> JobPosting:
+    obj_data = jsonable_encoder(db_obj)
+    update_data = obj_in.dict(exclude_unset=True)
+    for field in obj_data:
+        if field in update_data:
+            setattr(db_obj, field, update_data[field])
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def _legacy_remove(db: Session, id: int) -> JobPosting:
+    obj = db.query(JobPosting).get(id)
+    db.delete(obj)
+    db.commit()
+    return obj
+
+
+def _run(
+    label: str,
+    company_id: int,
+    iterations: int,
+    create: Callable,
+    update: Callable,
+    remove: Callable,
+) -> None:
+    # 従来の書き込みはコミット時に失効させるセッションで計測する
+    db = SessionLocal(expire_on_commit=label == "legacy")
+    timings: Dict[str, float] = {"create": 0.0, "update": 0.0, "remove": 0.0}
+    queries: Dict[str, int] = {"create": 0, "update": 0, "remove": 0}
+    try:
+        for i in range(iterations):
+            obj = None
+            steps = (
+                ("create", lambda: create(db, JobPostingCreate(
+                    title=f"benchmark {i}", description="", requirements="", company_id=company_id
+                ))),
+                ("update", lambda: update(db, obj, JobPostingUpdate(title=f"updated {i}"))),
+                ("remove", lambda: remove(db, obj.id)),
+            )
+            for name, call in steps:
+                started = time.perf_counter()
+                with count_queries() as counter:
+                    obj = call()
+                    # レスポンスのシリアライズと同様に属性を読む
+                    obj.title, obj.created_at
+                timings[name] += time.perf_counter() - started
+                queries[name] += counter.count
+    finally:
+        db.close()
+    for name in timings:
+        print(
+            f"{label:10s} {name:7s} {queries[name] / iterations:5.1f} queries/op "
+            f"{timings[name] / iterations * 1000:8.3f} ms/op"
+        )
+
+
+def main(iterations: int) -> None:
+    db = SessionLocal()
+    company = Company(name="crud write benchmark")
+    db.add(company)
+    db.commit()
+    company_id = company.id
+    crud = crud_job_posting.job_posting
+    try:
+        _run("legacy", company_id, iterations, _legacy_create, _legacy_update, _legacy_remove)
+        _run(
+            "returning",
+            company_id,
+            iterations,
+            lambda db, obj_in: crud.create(db, obj_in=obj_in),
+            lambda db, obj, obj_in: crud.update(db, db_obj=obj, obj_in=obj_in),
+            lambda db, id: crud.remove(db, id=id),
+        )
+    finally:
+        db.delete(db.get(Company, company_id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+    main(args.iterations)
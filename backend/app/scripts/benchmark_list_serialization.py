@@ -0,0 +1,96 @@
+"""
+一覧のシリアライズのベンチマーク
+
+FastAPIのresponse_modelによる変換（検証 → 辞書への変換 → 標準のjsonで直列化）と、
+キャッシュしたTypeAdapterで検証してそのままJSONにする model_response とを、
+read_interviews・read_job_postings と同じクエリで読んだ行で比較する。
+データはトランザクション内で投入し、終了時にロールバックする。
+
+    python -m app.scripts.benchmark_list_serialization --rows 100 1000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.database import SessionLocal
+from app.core.serialization import model_response
+from app.crud import crud_interview, crud_job_posting
+from app.schemas.interview import InterviewSummary
+from app.schemas.job_posting import JobPosting
+from app.scripts.check_query_plans import _seed
+
+
+def _fastapi_body(type_: Any) -> Callable[[List], bytes]:
+    """変更前の経路（response_modelのフィールドで変換し、JSONResponseで直列化する）"""
+    field = create_response_field(name="Response", type_=type_, mode="serialization")
+    # asyncio.runの起動時間を含めないよう、イベントループは使い回す
+    loop = asyncio.new_event_loop()
+
+    def render(rows: List) -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+        return JSONResponse(content).body
+
+    return render
+
+
+def _model_response_body(type_: Any) -> Callable[[List], bytes]:
+    return lambda rows: model_response(Response(), type_, rows).body
+
+
+def _time(render: Callable[[List], bytes], rows: List, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render(rows)
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def main(row_counts: List[int], repeat: int) -> None:
+    db = SessionLocal()
+    try:
+        largest = max(row_counts)
+        ids = _seed(db, 1, largest, largest)
+        company_id = ids["company_id"]
+        listings = (
+            ("read_interviews", List[InterviewSummary], lambda limit: crud_interview.interview.get_by_company(
+                db, company_id=company_id, limit=limit
+            )),
+            ("read_job_postings", List[JobPosting], lambda limit: crud_job_posting.job_posting.get_by_company(
+                db, company_id=company_id, limit=limit,
+                options=crud_job_posting.job_posting.loader_options(JobPosting),
+            )),
+        )
+        print(f"{'endpoint':18s} {'rows':>5s} {'response_model':>15s} {'model_response':>15s} {'speedup':>8s}")
+        for name, type_, load in listings:
+            for count in row_counts:
+                rows = load(count)
+                before, after = _fastapi_body(type_), _model_response_body(type_)
+                # 本文が変わらないことを確認する
+                assert json.loads(before(rows)) == json.loads(after(rows)), f"{name} body differs"
+                before_ms = _time(before, rows, repeat) * 1000
+                after_ms = _time(after, rows, repeat) * 1000
+                print(
+                    f"{name:18s} {len(rows):5d} {before_ms:12.2f} ms {after_ms:12.2f} ms "
+                    f"{before_ms / after_ms:7.1f}x"
+                )
+    finally:
+        # シードデータは残さない
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
@@ -0,0 +1,97 @@
+"""
+録画配信のベンチマーク
+
+従来のStaticFilesマウントと、署名付きURLの配信エンドポイント
+（Python配信・X-Accel-Redirectによるオフロード）を比較する。
+
+    python -m app.scripts.benchmark_recording_delivery --size-mb 50 --requests 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+from app.core.config import settings
+from app.core.security import create_signed_storage_url
+from app.core.storage import LocalStorage
+
+
+def _build_apps(store: LocalStorage):
+    from app.api.v1.endpoints import recordings
+
+    recordings.storage = store
+
+    static_app = FastAPI()
+    static_app.mount("/recordings", StaticFiles(directory=store.root), name="recordings")
+
+    endpoint_app = FastAPI()
+    endpoint_app.include_router(recordings.router, prefix="/recordings")
+    return static_app, endpoint_app
+
+
+async def _run(client: httpx.AsyncClient, url: str, headers_list) -> tuple:
+    transferred = 0
+    started = time.perf_counter()
+    for headers in headers_list:
+        response = await client.get(url, headers=headers)
+        assert response.status_code in (200, 206, 304), response.status_code
+        transferred += len(response.content)
+    return time.perf_counter() - started, transferred
+
+
+async def main(size_mb: int, requests: int) -> None:
+    root = tempfile.mkdtemp()
+    store = LocalStorage(root, legacy_root=os.path.join(root, "legacy"))
+    src = os.path.join(root, "source.webm")
+    with open(src, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    stored = await store.put_file(src, suffix=".webm")
+    size = stored.size
+
+    static_app, endpoint_app = _build_apps(store)
+    static_url = "/recordings/" + store.relative_path(stored.key)
+    signed_url, _ = create_signed_storage_url(f"/recordings/{stored.key}", stored.key, 3600)
+
+    chunk = 1024 * 1024
+    scenarios = {
+        "full": [{} for _ in range(requests)],
+        "range 1MiB": [
+            {"Range": f"bytes={o}-{o + chunk - 1}"}
+            for o in (random.randrange(0, max(size - chunk, 1)) for _ in range(requests))
+        ],
+        "if-none-match": [{"If-None-Match": f'"{os.path.splitext(stored.key)[0]}"'} for _ in range(requests)],
+    }
+
+    targets = [
+        ("StaticFiles mount", static_app, static_url, ""),
+        ("signed endpoint", endpoint_app, signed_url, ""),
+        ("signed endpoint + X-Accel-Redirect", endpoint_app, signed_url, "X-Accel-Redirect"),
+    ]
+
+    print(f"file size: {size / 1024 / 1024:.1f} MiB, {requests} requests per scenario")
+    for name, app, url, offload_header in targets:
+        settings.RECORDING_OFFLOAD_HEADER = offload_header
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for scenario, headers_list in scenarios.items():
+                elapsed, transferred = await _run(client, url, headers_list)
+                print(
+                    f"{name:38s} {scenario:14s} "
+                    f"{elapsed / requests * 1000:8.2f} ms/req "
+                    f"{transferred / 1024 / 1024:9.1f} MiB through Python"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.size_mb, args.requests))
@@ -0,0 +1,94 @@
+"""
+企業単位の面接一覧のベンチマーク
+
+求人を結合してEXISTSで絞り込む従来のクエリと、非正規化したinterviews.company_idで
+(company_id, created_at, id) のインデックスを範囲走査するクエリとを比較する。
+データはトランザクション内で投入し、終了時にロールバックする。PostgreSQLが必要。
+
+    DATABASE_URL=postgresql://... python -m app.scripts.benchmark_tenant_listing --interviews 200000
+"""
+import argparse
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.crud import crud_interview
+from app.models.models import Interview
+from app.scripts.check_query_plans import _plan_nodes, _seed
+
+
+def _joined_query(db: Session, company_id: int, limit: int):
+    """変更前の get_by_company と同じクエリ"""
+    return (
+        db.query(Interview)
+        .join(Interview.job_posting)
+        .filter(Interview.job_posting.has(company_id=company_id))
+        .order_by(Interview.created_at.desc(), Interview.id.desc())
+        .limit(limit)
+    )
+
+
+def _denormalized_query(db: Session, company_id: int, limit: int):
+    return (
+        db.query(Interview)
+        .filter(Interview.company_id == company_id)
+        .order_by(Interview.created_at.desc(), Interview.id.desc())
+        .limit(limit)
+    )
+
+
+def _plan_summary(db: Session, query) -> str:
+    compiled = query.statement.compile(
+        dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [
+        f"{node['Node Type']}({node.get('Index Name') or node.get('Relation Name', '')})".replace("()", "")
+        for node in _plan_nodes(plan[0]["Plan"])
+    ]
+    return " > ".join(nodes)
+
+
+def _time(query, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        query.all()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations)
+
+
+def main(companies: int, postings_per_company: int, interviews: int, limit: int, repeat: int) -> None:
+    db = SessionLocal()
+    try:
+        ids = _seed(db, companies, postings_per_company, interviews)
+        company_id = ids["company_id"]
+        for name, build in (("join + exists", _joined_query), ("company_id", _denormalized_query)):
+            query = build(db, company_id, limit)
+            median = _time(query, repeat)
+            print(f"{name:14s} median {median * 1000:8.2f} ms  {_plan_summary(db, query)}")
+        # 実際の一覧と同じ結果になることを確認する
+        expected = [i.id for i in _joined_query(db, company_id, limit)]
+        actual = [i.id for i in crud_interview.interview.get_by_company(db, company_id=company_id, limit=limit)]
+        assert actual == expected, "denormalized listing differs from the joined listing"
+    finally:
+        # シードデータは残さない
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--postings-per-company", type=int, default=5)
+    parser.add_argument("--interviews", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.companies, args.postings_per_company, args.interviews, args.limit, args.repeat)
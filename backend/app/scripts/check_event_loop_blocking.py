@@ -0,0 +1,77 @@
+"""
+イベントループのブロッキング確認
+
+async def のエンドポイントから同期Sessionでクエリを実行した場合と、
+AsyncSessionで実行した場合とで、遅いクエリ（pg_sleep）の同時実行時の
+所要時間とイベントループの遅延を比較する。PostgreSQLが必要。
+
+    DATABASE_URL=postgresql://... python -m app.scripts.check_event_loop_blocking --requests 10 --sleep 0.5
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.database import async_engine
+
+
+def _build_app(sleep: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/sync-session")
+    async def sync_session(db: Session = Depends(deps.get_db)):
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": sleep})
+        return {}
+
+    @app.get("/async-session")
+    async def async_session(db: AsyncSession = Depends(deps.get_async_db)):
+        await db.execute(text("SELECT pg_sleep(:s)"), {"s": sleep})
+        return {}
+
+    return app
+
+
+async def _measure_loop_lag(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """一定間隔のsleepがどれだけ遅れて戻るか（ループがブロックされた時間）の最大値"""
+    max_lag = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, time.perf_counter() - started - interval)
+    return max_lag
+
+
+async def main(requests: int, sleep: float) -> None:
+    app = _build_app(sleep)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        for path in ("/sync-session", "/async-session"):
+            # 接続プールを温めておく
+            await client.get(path)
+            stop = asyncio.Event()
+            lag_task = asyncio.create_task(_measure_loop_lag(stop))
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(client.get(path) for _ in range(requests)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            max_lag = await lag_task
+            assert all(r.status_code == 200 for r in responses)
+            print(
+                f"{path:15s} {requests} concurrent x pg_sleep({sleep}): "
+                f"{elapsed:6.2f}s total, max event loop lag {max_lag * 1000:8.1f} ms"
+            )
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--sleep", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.sleep))
@@ -0,0 +1,166 @@
+"""
+エンドポイントごとのクエリ数の回帰チェック
+
+面接（カスタム質問・回答つき）の件数を増やしながら一覧・詳細のエンドポイントを呼び出し、
+実行されたクエリ数が件数によらず一定であること（N+1になっていないこと）を確認する。
+シードデータを書き込むため、検証用のデータベースに対して実行すること。
+
+    DATABASE_URL=sqlite:////tmp/query_counts.db python -m app.scripts.check_query_counts
+"""
+import argparse
+import sys
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import Base, SessionLocal, count_queries, engine
+from app.core.security import create_access_token
+from app.crud.crud_interview import interview_url_cache
+from app.crud.crud_job_posting import question_set_cache
+from app.crud.crud_user import principal_cache
+from app.main import app
+from app.models.models import (
+    BaseQuestion,
+    Company,
+    CustomQuestion,
+    Interview,
+    InterviewResponse,
+    JobPosting,
+    User,
+)
+
+QUESTIONS_PER_ITEM = 5
+
+
+def _seed_company(db: Session) -> Dict[str, int]:
+    company = Company(name=f"query-count-{uuid.uuid4().hex[:8]}")
+    db.add(company)
+    db.flush()
+    user = User(
+        email=f"query-count-{uuid.uuid4().hex}@example.com",
+        company_id=company.id,
+        is_active=True,
+    )
+    db.add(user)
+    db.flush()
+    db.execute(insert(JobPosting), [
+        {"title": f"posting {i}", "description": "", "requirements": "", "company_id": company.id}
+        for i in range(2)
+    ])
+    posting_ids = [p.id for p in db.query(JobPosting.id).filter(JobPosting.company_id == company.id)]
+    db.execute(insert(BaseQuestion), [
+        {"job_posting_id": posting_id, "question_text": "q", "order": order}
+        for posting_id in posting_ids
+        for order in range(QUESTIONS_PER_ITEM)
+    ])
+    db.commit()
+    return {"company_id": company.id, "user_id": user.id, "job_posting_id": posting_ids[0]}
+
+
+def _seed_interviews(db: Session, ids: Dict[str, int], count: int) -> None:
+    urls = [uuid.uuid4().hex for _ in range(count)]
+    db.execute(insert(Interview), [
+        {
+            "job_posting_id": ids["job_posting_id"],
+            "company_id": ids["company_id"],
+            "candidate_name": "candidate",
+            "candidate_email": "candidate@example.com",
+            "interview_url": url,
+            "status": "completed",
+            "avatar_type": "male",
+        }
+        for url in urls
+    ])
+    interview_ids = [
+        i.id for i in db.query(Interview.id).filter(Interview.interview_url.in_(urls))
+    ]
+    db.execute(insert(CustomQuestion), [
+        {"interview_id": interview_id, "question_text": "q", "order": order}
+        for interview_id in interview_ids
+        for order in range(QUESTIONS_PER_ITEM)
+    ])
+    db.execute(insert(InterviewResponse), [
+        {
+            "interview_id": interview_id,
+            "question_id": order,
+            "question_text": "q",
+            "answer_text": "a",
+            "question_type": "custom",
+        }
+        for interview_id in interview_ids
+        for order in range(QUESTIONS_PER_ITEM)
+    ])
+    db.commit()
+
+
+def _checks(db: Session, ids: Dict[str, int]) -> List[Tuple[str, Callable[[], str]]]:
+    """(名前, 呼び出すパスを返す関数)。詳細は毎回その時点で最新の面接を対象にする"""
+    prefix = settings.API_V1_STR
+
+    def latest() -> Interview:
+        return (
+            db.query(Interview)
+            .filter(Interview.job_posting_id == ids["job_posting_id"])
+            .order_by(Interview.id.desc())
+            .first()
+        )
+
+    return [
+        ("GET /interviews/", lambda: f"{prefix}/interviews/"),
+        ("GET /interviews/?job_posting_id",
+         lambda: f"{prefix}/interviews/?job_posting_id={ids['job_posting_id']}"),
+        ("GET /interviews/{id}", lambda: f"{prefix}/interviews/{latest().id}"),
+        ("GET /interviews/url/{url}", lambda: f"{prefix}/interviews/url/{latest().interview_url}"),
+        ("GET /interviews/by-url/{url}", lambda: f"{prefix}/interviews/by-url/{latest().interview_url}"),
+        ("GET /job-postings/", lambda: f"{prefix}/job-postings/"),
+    ]
+
+
+def _measure(client: TestClient, headers: Dict[str, str], path: str) -> int:
+    # キャッシュに当たらない場合のクエリ数を数える
+    interview_url_cache.clear()
+    principal_cache.clear()
+    question_set_cache.clear()
+    with count_queries() as counter:
+        response = client.get(path, headers=headers)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path}: {response.status_code} {response.text}")
+    return counter.count
+
+
+def main(sizes: List[int]) -> int:
+    Base.metadata.create_all(bind=engine)
+    client = TestClient(app)
+    db = SessionLocal()
+    try:
+        ids = _seed_company(db)
+        headers = {"Authorization": f"Bearer {create_access_token(ids['user_id'])}"}
+        checks = _checks(db, ids)
+        counts: Dict[str, List[int]] = {name: [] for name, _ in checks}
+        seeded = 0
+        for size in sizes:
+            _seed_interviews(db, ids, size - seeded)
+            seeded = size
+            for name, path in checks:
+                counts[name].append(_measure(client, headers, path()))
+    finally:
+        db.close()
+
+    failures = 0
+    print(f"{'':5s}{'endpoint':32s} " + " ".join(f"{f'n={size}':>7s}" for size in sizes))
+    for name, values in counts.items():
+        ok = len(set(values)) == 1
+        failures += 0 if ok else 1
+        print(f"{'ok  ' if ok else 'FAIL'} {name:32s} " + " ".join(f"{v:7d}" for v in values))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50])
+    args = parser.parse_args()
+    sys.exit(main(sorted(args.sizes)))
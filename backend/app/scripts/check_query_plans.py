@@ -0,0 +1,184 @@
+"""
+クエリプランの回帰チェック
+
+シードデータを投入した上でCRUDInterview・CRUDJobPostingの各クエリに対して
+EXPLAINを実行し、対象テーブルがシーケンシャルスキャンになっていれば失敗する。
+データはトランザクション内で投入し、終了時にロールバックする。PostgreSQLが必要。
+
+    DATABASE_URL=postgresql://... python -m app.scripts.check_query_plans --interviews 20000
+"""
+import argparse
+import json
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from sqlalchemy import event, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal, engine
+from app.crud import crud_interview, crud_job_posting
+from app.models.models import (
+    BaseQuestion,
+    Company,
+    CustomQuestion,
+    Interview,
+    InterviewResponse,
+    JobPosting,
+    User,
+)
+
+QUESTIONS_PER_ITEM = 5
+
+
+def _bulk_insert(db: Session, model, rows: List[Dict]) -> List[int]:
+    return list(db.scalars(insert(model).returning(model.id), rows))
+
+
+def _seed(db: Session, companies: int, postings_per_company: int, interviews: int) -> Dict[str, int]:
+    now = datetime.utcnow()
+    company_ids = _bulk_insert(db, Company, [
+        {"name": f"plan-check-{i}", "created_at": now} for i in range(companies)
+    ])
+    _bulk_insert(db, User, [
+        {"email": f"plan-check-{uuid.uuid4().hex}@example.com", "company_id": company_id}
+        for company_id in company_ids
+        for _ in range(5)
+    ])
+    posting_companies = [
+        company_id for company_id in company_ids for _ in range(postings_per_company)
+    ]
+    posting_ids = _bulk_insert(db, JobPosting, [
+        {"title": f"posting {i}", "description": "", "requirements": "", "company_id": company_id, "created_at": now}
+        for i, company_id in enumerate(posting_companies)
+    ])
+    _bulk_insert(db, BaseQuestion, [
+        {"job_posting_id": posting_id, "question_text": "q", "order": order}
+        for posting_id in posting_ids
+        for order in range(QUESTIONS_PER_ITEM)
+    ])
+    interview_ids = _bulk_insert(db, Interview, [
+        {
+            "job_posting_id": posting_ids[i % len(posting_ids)],
+            "company_id": posting_companies[i % len(posting_ids)],
+            "candidate_name": "candidate",
+            "candidate_email": "candidate@example.com",
+            "interview_url": uuid.uuid4().hex,
+            "status": ("scheduled", "in_progress", "completed")[i % 3],
+            "avatar_type": "male",
+            "created_at": now - timedelta(minutes=i),
+        }
+        for i in range(interviews)
+    ])
+    _bulk_insert(db, CustomQuestion, [
+        {"interview_id": interview_id, "question_text": "q", "order": order}
+        for interview_id in interview_ids
+        for order in range(QUESTIONS_PER_ITEM)
+    ])
+    _bulk_insert(db, InterviewResponse, [
+        {
+            "interview_id": interview_id,
+            "question_id": order,
+            "question_text": "q",
+            "answer_text": "a",
+            "question_type": "custom",
+            "created_at": now,
+        }
+        for interview_id in interview_ids
+        for order in range(QUESTIONS_PER_ITEM)
+    ])
+    db.execute(text("ANALYZE"))
+    return {
+        "company_id": company_ids[len(company_ids) // 2],
+        "job_posting_id": posting_ids[len(posting_ids) // 2],
+        "interview_id": interview_ids[len(interview_ids) // 2],
+    }
+
+
+def _checks(ids: Dict[str, int], interview_url: str) -> List[Tuple[str, str, Callable[[Session], object]]]:
+    """(名前, シーケンシャルスキャンを許容しないテーブル, CRUD呼び出し)"""
+    interview = crud_interview.interview
+    job_posting = crud_job_posting.job_posting
+    return [
+        ("interview.get", "interviews",
+         lambda db: interview.get(db, id=ids["interview_id"])),
+        ("interview.get_by_url", "interviews",
+         lambda db: interview.get_by_url(db, url=interview_url)),
+        ("interview.get_by_job_posting", "interviews",
+         lambda db: interview.get_by_job_posting(db, job_posting_id=ids["job_posting_id"])),
+        ("interview.get_by_company", "interviews",
+         lambda db: interview.get_by_company(db, company_id=ids["company_id"])),
+        ("interview.get_custom_questions", "custom_questions",
+         lambda db: interview.get_custom_questions(db, interview_id=ids["interview_id"])),
+        ("interview.get_responses", "interview_responses",
+         lambda db: interview.get_responses(db, interview_id=ids["interview_id"])),
+        ("job_posting.get_by_company", "job_postings",
+         lambda db: job_posting.get_by_company(db, company_id=ids["company_id"])),
+        ("job_posting.get_base_questions", "base_questions",
+         lambda db: job_posting.get_base_questions(db, job_posting_id=ids["job_posting_id"])),
+    ]
+
+
+def _capture_statements(db: Session, call: Callable[[Session], object]) -> List[Tuple[str, object]]:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        call(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def _plan_nodes(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _seq_scans(db: Session, statement: str, parameters) -> List[str]:
+    cursor = db.connection().connection.cursor()
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return [
+        node["Relation Name"]
+        for node in _plan_nodes(plan[0]["Plan"])
+        if node["Node Type"] == "Seq Scan"
+    ]
+
+
+def main(companies: int, postings_per_company: int, interviews: int) -> int:
+    db = SessionLocal()
+    failures = 0
+    try:
+        ids = _seed(db, companies, postings_per_company, interviews)
+        interview_url = db.get(Interview, ids["interview_id"]).interview_url
+        for name, table, call in _checks(ids, interview_url):
+            statements = _capture_statements(db, call)
+            scanned = set()
+            for statement, parameters in statements:
+                scanned.update(_seq_scans(db, statement, parameters))
+            ok = table not in scanned
+            failures += 0 if ok else 1
+            detail = f"seq scan on {', '.join(sorted(scanned))}" if scanned else "index only"
+            print(f"{'ok  ' if ok else 'FAIL'} {name:34s} {detail}")
+    finally:
+        # シードデータは残さない
+        db.rollback()
+        db.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--postings-per-company", type=int, default=5)
+    parser.add_argument("--interviews", type=int, default=20000)
+    args = parser.parse_args()
+    sys.exit(main(args.companies, args.postings_per_company, args.interviews))
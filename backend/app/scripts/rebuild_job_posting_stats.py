@@ -0,0 +1,30 @@
+"""
+求人ごとの面接の集計（job_posting_stats）の再作成
+
+面接テーブルから集計し直す。導入時のバックフィルと、集計がずれた場合の修正に使う。
+
+    python -m app.scripts.rebuild_job_posting_stats
+    python -m app.scripts.rebuild_job_posting_stats --job-posting-id 12
+"""
+import argparse
+from typing import Optional
+
+from app.core.database import SessionLocal
+from app.crud.crud_job_posting_stats import job_posting_stats
+
+
+def main(job_posting_id: Optional[int], batch_size: int) -> None:
+    db = SessionLocal()
+    try:
+        rows = job_posting_stats.rebuild(db, job_posting_id=job_posting_id, batch_size=batch_size)
+    finally:
+        db.close()
+    print(f"rebuilt {rows} job_posting_stats rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--job-posting-id", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    main(args.job_posting_id, args.batch_size)
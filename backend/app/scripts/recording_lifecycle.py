@@ -0,0 +1,33 @@
+"""
+録画の保持ライフサイクル処理
+
+企業ごとの保持ポリシーに従い、古い録画を低ビットレートで再エンコード（コールド化）し、
+保持期限を過ぎた録画を削除する。cron等で定期的に実行する。
+
+    python -m app.scripts.recording_lifecycle --dry-run
+    python -m app.scripts.recording_lifecycle --batch-size 20
+"""
+import argparse
+import asyncio
+import logging
+
+from app.core.recording_lifecycle import run_lifecycle
+from app.core.storage import storage
+
+
+async def main(batch_size: int, dry_run: bool) -> None:
+    try:
+        stats = await run_lifecycle(batch_size=batch_size, dry_run=dry_run)
+    finally:
+        await storage.close()
+    for field, value in stats.as_dict().items():
+        print(f"{field:16s} {value}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.dry_run))
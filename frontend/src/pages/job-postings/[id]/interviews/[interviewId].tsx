@@ -27,6 +27,7 @@ export default function InterviewDetail() {
   const [error, setError] = useState<string | null>(null);
   const [interview, setInterview] = useState<Interview | null>(null);
   const [responses, setResponses] = useState<InterviewResponse[]>([]);
+  const [videoUrl, setVideoUrl] = useState<string | null>(null);
   const [mounted, setMounted] = useState(false);
 
   useEffect(() => {
@@ -43,6 +44,12 @@ export default function InterviewDetail() {
         const interviewResponse = await apiClient.get(`/api/v1/interviews/${interviewId}`);
         setInterview(interviewResponse.data);
 
+        // 録画の署名付きURLを取得
+        if (interviewResponse.data.recording_url) {
+          const recordingUrlResponse = await apiClient.get(`/api/v1/interviews/${interviewId}/recording-url`);
+          setVideoUrl(getVideoUrl(recordingUrlResponse.data.url));
+        }
+
         // 面接の回答データを取得
         const responsesResponse = await apiClient.get(`/api/v1/interviews/${interviewId}/responses`);
         setResponses(responsesResponse.data);
@@ -129,14 +136,14 @@ export default function InterviewDetail() {
             </div>
 
             {/* 面接映像セクション */}
-            {interview.recording_url && (
+            {videoUrl && (
               <div className="border-t border-gray-200 px-4 py-5 sm:px-6">
                 <h3 className="text-lg leading-6 font-medium text-gray-900 mb-4">
                   面接映像
                 </h3>
                 <div className="aspect-w-16 aspect-h-9 bg-gray-100 rounded-lg overflow-hidden">
                   <video
-                    src={getVideoUrl(interview.recording_url)}
+                    src={videoUrl}
                     controls
                     className="w-full h-full object-contain"
                     controlsList="nodownload"